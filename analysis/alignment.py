@@ -0,0 +1,216 @@
+import os
+import re
+import glob
+import argparse
+import numpy as np
+
+from utils.frame_timing import read_timestamps
+from utils.sample_timing import reconstruct_sample_times
+from services.sync_log import iter_sync_log
+
+# 监护仪数值参数对应的标签名
+NUMERIC_LABELS = {
+    "MDC_ECG_HEART_RATE": "HR",
+    "MDC_PULS_OXIM_PULS_RATE": "PR",
+    "MDC_PULS_OXIM_SAT_O2": "SpO2",
+    "MDC_TTHOR_RESP_RATE": "RR",
+    "MDC_BLD_PERF_INDEX": "PI",
+}
+# 波形相邻采样点间隔超过该时长（秒）视为断连，其间的视频帧没有波形标签
+DEFAULT_MAX_GAP = 0.5
+# 数值参数超过该时长（秒）没有更新则视为缺失
+DEFAULT_MAX_NUMERIC_AGE = 10.0
+
+
+def load_physio_streams(sync_log_path):
+    """从同步日志读取各波形通道和数值参数的消息序列
+
+    Args:
+        sync_log_path: 同步日志路径（sync_data.jsonl）
+
+    Returns:
+        dict: {'waveforms': {通道名: {'arrival_ns', 'counts', 'values', 'rate'}},
+               'numerics': {标签名: {'arrival_ns', 'values'}}}
+               arrival_ns/counts按消息排列，values为该通道全部采样值（按到达顺序拼接）
+    """
+    waveforms = {}
+    numerics = {}
+    for record in iter_sync_log(sync_log_path):
+        arrival_ns = record.get("arrival_monotonic_ns")
+        event = record.get("data_event", {})
+        if arrival_ns is None or "samples" not in event:
+            continue
+        rates = event.get("sampling_rates", {})
+        for name, samples in event["samples"].items():
+            stream = waveforms.setdefault(name, {"arrival_ns": [], "counts": [], "values": [], "rate": rates.get(name)})
+            stream["arrival_ns"].append(arrival_ns)
+            stream["counts"].append(len(samples))
+            stream["values"].append(np.asarray(samples, dtype=np.float64))
+        for name, value in event.get("numerics", {}).items():
+            stream = numerics.setdefault(NUMERIC_LABELS.get(name, name), {"arrival_ns": [], "values": []})
+            stream["arrival_ns"].append(arrival_ns)
+            stream["values"].append(value)
+
+    if not waveforms and not numerics:
+        raise ValueError(f"同步日志中没有带到达时间和采样数据的记录: {sync_log_path}")
+
+    for stream in waveforms.values():
+        arrival_ns = np.asarray(stream["arrival_ns"], dtype=np.int64)
+        # 目录模式下不同文件的消息可能交错写入日志，按到达时间稳定排序
+        order = np.argsort(arrival_ns, kind="stable")
+        stream["arrival_ns"] = arrival_ns[order]
+        stream["counts"] = np.asarray(stream["counts"], dtype=np.int64)[order]
+        stream["values"] = np.concatenate([stream["values"][i] for i in order])
+    for stream in numerics.values():
+        arrival_ns = np.asarray(stream["arrival_ns"], dtype=np.int64)
+        order = np.argsort(arrival_ns, kind="stable")
+        stream["arrival_ns"] = arrival_ns[order]
+        stream["values"] = np.asarray(stream["values"], dtype=np.float64)[order]
+    return {"waveforms": waveforms, "numerics": numerics}
+
+
+def align_waveform(frame_ns, sample_ns, values, max_gap_ns):
+    """把波形线性插值到视频帧时刻
+
+    Args:
+        frame_ns: 视频帧时间戳，int64数组
+        sample_ns: 采样点时间戳（单调不减），int64数组
+        values: 采样值，NaN表示无效采样
+        max_gap_ns: 前后采样点间隔超过该值时结果为NaN
+
+    Returns:
+        np.ndarray: 每帧的波形值，float64数组，范围外或断连处为NaN
+    """
+    valid = ~np.isnan(values)
+    sample_ns, values = sample_ns[valid], values[valid]
+    if len(sample_ns) == 0:
+        return np.full(len(frame_ns), np.nan)
+    # 先减去公共起点，避免大数值的ns转换为float64时损失精度
+    origin = sample_ns[0]
+    frame_t = (frame_ns - origin).astype(np.float64)
+    result = np.interp(frame_t, (sample_ns - origin).astype(np.float64), values, left=np.nan, right=np.nan)
+
+    right = np.clip(np.searchsorted(sample_ns, frame_ns, side="left"), 1, len(sample_ns) - 1)
+    gaps = sample_ns[right] - sample_ns[right - 1]
+    result[gaps > max_gap_ns] = np.nan
+    return result
+
+
+def align_numeric(frame_ns, event_ns, values, max_age_ns):
+    """为每帧取在该帧之前最近一次更新的数值参数
+
+    Returns:
+        np.ndarray: 每帧的参数值，之前没有更新或更新已过期时为NaN
+    """
+    index = np.searchsorted(event_ns, frame_ns, side="right") - 1
+    result = np.full(len(frame_ns), np.nan)
+    has_value = index >= 0
+    result[has_value] = values[index[has_value]]
+    result[has_value & (frame_ns - event_ns[np.maximum(index, 0)] > max_age_ns)] = np.nan
+    return result
+
+
+def find_camera_timestamps(subject_dir):
+    """列出录制目录中各摄像头的逐帧时间戳文件 {摄像头ID: 路径}"""
+    cameras = {}
+    for path in glob.glob(os.path.join(subject_dir, "camera_*_timestamps.bin")):
+        cameras[int(re.search(r"camera_(\d+)_timestamps", os.path.basename(path)).group(1))] = path
+    return dict(sorted(cameras.items()))
+
+
+def find_sync_logs(subject_dir):
+    """列出录制目录中的同步日志 {设备名: 路径}
+
+    只有一个设备时日志为sync_data.jsonl（设备名为空），多个设备时为sync_data_{设备名}.jsonl
+    """
+    logs = {}
+    for path in sorted(glob.glob(os.path.join(subject_dir, "sync_data*.jsonl"))):
+        logs[re.match(r"sync_data_?(.*)\.jsonl$", os.path.basename(path)).group(1)] = path
+    return logs
+
+
+def load_device_streams(sync_logs):
+    """读取多个设备的同步日志并合并，多个设备时通道名前加“设备名:”区分"""
+    merged = {"waveforms": {}, "numerics": {}}
+    for device, path in sync_logs.items():
+        streams = load_physio_streams(path)
+        prefix = f"{device}:" if len(sync_logs) > 1 and device else ""
+        for kind in merged:
+            merged[kind].update({prefix + name: stream for name, stream in streams[kind].items()})
+    return merged
+
+
+def build_frame_labels(subject_dir, sync_log_path=None, max_gap=DEFAULT_MAX_GAP,
+                       max_numeric_age=DEFAULT_MAX_NUMERIC_AGE, streams=None):
+    """为每个摄像头的每一帧生成生理标签
+
+    Args:
+        subject_dir: 被测对象录制目录
+        sync_log_path: 同步日志路径，默认为录制目录下的全部同步日志（每个设备一个）
+        max_gap: 波形断连判定间隔（秒）
+        max_numeric_age: 数值参数过期时长（秒）
+        streams: 已读取的load_physio_streams结果，提供时不再读取同步日志
+
+    Returns:
+        dict: {摄像头ID: {列名: 数组}}，列依次为frame_index、capture_monotonic_ns、
+              各波形通道名和数值参数标签名（HR、SpO2等）
+    """
+    if streams is None:
+        sync_logs = {"": sync_log_path} if sync_log_path else find_sync_logs(subject_dir)
+        if not sync_logs:
+            raise ValueError(f"在 {subject_dir} 中没有找到同步日志")
+        streams = load_device_streams(sync_logs)
+
+    # 到达时间带抖动，按连续段拟合出每个采样点的时间
+    waveform_times = {name: reconstruct_sample_times(stream["arrival_ns"], stream["counts"], stream["rate"] or 100)[0]
+                      for name, stream in streams["waveforms"].items()}
+
+    labels = {}
+    for camera_id, path in find_camera_timestamps(subject_dir).items():
+        _, records = read_timestamps(path)
+        frame_ns = records["capture_monotonic_ns"]
+        columns = {"frame_index": records["frame_index"], "capture_monotonic_ns": frame_ns}
+        for name, stream in streams["waveforms"].items():
+            columns[name] = align_waveform(frame_ns, waveform_times[name], stream["values"], int(max_gap * 1e9))
+        for label, stream in streams["numerics"].items():
+            columns[label] = align_numeric(frame_ns, stream["arrival_ns"], stream["values"],
+                                           int(max_numeric_age * 1e9))
+        labels[camera_id] = columns
+    return labels
+
+
+def save_labels_csv(columns, output_path):
+    """将一个摄像头的逐帧标签保存为CSV"""
+    names = list(columns)
+    table = np.empty(len(columns["frame_index"]),
+                     dtype=[(name, np.int64 if i < 2 else np.float64) for i, name in enumerate(names)])
+    for name in names:
+        table[name] = columns[name]
+    np.savetxt(output_path, table, delimiter=",", header=",".join(names), comments="",
+               fmt=["%d", "%d"] + ["%.6g"] * (len(names) - 2))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="将同步日志中的生理数据与录制视频逐帧对齐")
+    parser.add_argument("subject_dir", help="被测对象录制目录（包含camera_*_timestamps.bin）")
+    parser.add_argument("--sync-log", help="同步日志路径，默认为录制目录下的全部同步日志")
+    parser.add_argument("--max-gap", type=float, default=DEFAULT_MAX_GAP, help="波形断连判定间隔（秒）")
+    parser.add_argument("--max-numeric-age", type=float, default=DEFAULT_MAX_NUMERIC_AGE,
+                        help="数值参数过期时长（秒）")
+    args = parser.parse_args()
+
+    labels = build_frame_labels(args.subject_dir, args.sync_log, args.max_gap, args.max_numeric_age)
+    if not labels:
+        print(f"在 {args.subject_dir} 中没有找到逐帧时间戳文件")
+        return
+
+    for camera_id, columns in labels.items():
+        output_path = os.path.join(args.subject_dir, f"camera_{camera_id}_labels.csv")
+        save_labels_csv(columns, output_path)
+        coverage = ", ".join(f"{name} {np.mean(~np.isnan(values)):.0%}"
+                             for name, values in list(columns.items())[2:])
+        print(f"摄像头 {camera_id}: {len(columns['frame_index'])} 帧，标签覆盖率: {coverage}，已保存至 {output_path}")
+
+
+if __name__ == "__main__":
+    main()
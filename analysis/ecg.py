@@ -0,0 +1,90 @@
+import numpy as np
+
+from analysis.peaks import (fill_gaps, moving_average, rolling_max, bandpass, find_peaks, enforce_min_distance,
+                            beat_intervals, variability_metrics)
+
+# QRS波群能量集中的频段（Hz）
+QRS_BAND = (5.0, 15.0)
+# 能量积分窗口（秒），约为QRS波群宽度
+INTEGRATION_SECONDS = 0.15
+# 不应期（秒）：两次R波的最小间隔，对应240次/分
+REFRACTORY_SECONDS = 0.25
+# 自适应阈值：取前后该时长（秒）内积分能量最大值的一定比例
+THRESHOLD_WINDOW_SECONDS = 2.5
+THRESHOLD_RATIO = 0.3
+# 噪声下限：低于全程能量包络中位数的该比例的峰值不计（导联脱落、平直段）
+NOISE_FLOOR_RATIO = 0.1
+
+
+def detect_r_peaks(ecg, sampling_rate):
+    """检测心电R波
+
+    带通滤波后求导数平方并做滑动积分（Pan-Tompkins的能量包络），在不应期内取局部最大值，
+    用前后几秒的能量最大值乘以比例作为自适应阈值，最后在积分窗口内找带通信号绝对值
+    最大处作为R波位置。全部为整体数组运算，没有逐采样点的Python循环。
+
+    Args:
+        ecg: 心电波形，NaN表示缺失采样
+        sampling_rate: 采样率（Hz）
+
+    Returns:
+        tuple: (R波位置int64数组, 缺失采样点的布尔数组)
+    """
+    values, missing = fill_gaps(ecg)
+    if len(values) < sampling_rate or missing.all():
+        return np.empty(0, dtype=np.int64), missing
+
+    filtered = bandpass(values - values.mean(), sampling_rate, QRS_BAND)
+    energy = np.gradient(filtered) ** 2
+    integrated = moving_average(energy, INTEGRATION_SECONDS * sampling_rate)
+    integrated[missing] = 0.0
+
+    envelope = rolling_max(integrated, THRESHOLD_WINDOW_SECONDS * sampling_rate)
+    noise_floor = NOISE_FLOOR_RATIO * np.median(envelope[~missing])
+    threshold = np.maximum(THRESHOLD_RATIO * envelope, noise_floor)
+    refractory = int(REFRACTORY_SECONDS * sampling_rate)
+    candidates = find_peaks(integrated, refractory, threshold)
+    if not len(candidates):
+        return candidates.astype(np.int64), missing
+
+    # 在积分峰值前后半个积分窗口内找带通信号绝对值最大处
+    half = max(int(INTEGRATION_SECONDS * sampling_rate / 2), 1)
+    window = np.clip(candidates[:, None] + np.arange(-half, half + 1), 0, len(values) - 1)
+    magnitude = np.abs(filtered)
+    peaks = window[np.arange(len(candidates)), np.argmax(magnitude[window], axis=1)]
+    peaks = np.unique(peaks)
+    peaks = enforce_min_distance(peaks, magnitude[peaks], refractory)
+    return peaks.astype(np.int64), missing
+
+
+def analyze_ecg(ecg, sampling_rate, timestamps=None):
+    """检测R波并计算逐搏心率和心率变异性
+
+    Args:
+        ecg: 心电波形
+        sampling_rate: 采样率（Hz）
+        timestamps: 每个采样点的时间戳（int64 ns），可选
+
+    Returns:
+        dict: r_peaks（R波采样点序号）、beat_seconds（相对波形起点的秒数）、
+              beat_ns（R波时间戳，没有时间戳时为None）、rr（RR间期秒数）、
+              heart_rate（逐搏心率，次/分，对应第2个R波起）、rr_valid（间期是否有效）、
+              beats、mean_rate、sdnn_ms、rmssd_ms、pnn50
+    """
+    peaks, missing = detect_r_peaks(ecg, sampling_rate)
+    if timestamps is not None and len(timestamps) != len(missing):
+        timestamps = None
+    rr, valid = beat_intervals(peaks, sampling_rate, timestamps, missing)
+    with np.errstate(divide="ignore"):
+        heart_rate = 60.0 / rr
+    result = {
+        "r_peaks": peaks,
+        "beat_seconds": peaks / float(sampling_rate),
+        "beat_ns": np.asarray(timestamps)[peaks] if timestamps is not None else None,
+        "rr": rr,
+        "heart_rate": heart_rate,
+        "rr_valid": valid,
+        "beats": len(peaks),
+    }
+    result.update(variability_metrics(rr, valid))
+    return result
@@ -0,0 +1,148 @@
+import numpy as np
+
+try:
+    from scipy.signal import butter, sosfiltfilt
+except ImportError:  # SciPy为可选依赖，没有时用滑动平均近似带通滤波
+    butter = None
+
+# 有效的逐搏间期范围（秒），对应 30-240 次/分
+INTERVAL_RANGE = (0.25, 2.0)
+# 间期内缺失采样累计超过该时长（秒）时间期无效；零星的无法解析的点插值后不影响检测
+MAX_MISSING_SECONDS = 0.05
+
+
+def fill_gaps(values):
+    """用线性插值填补NaN（缺失或无法解析的采样点）
+
+    Returns:
+        tuple: (填补后的float64数组, 缺失位置的布尔数组)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    missing = np.isnan(values)
+    if missing.any() and not missing.all():
+        index = np.arange(len(values))
+        values = values.copy()
+        values[missing] = np.interp(index[missing], index[~missing], values[~missing])
+    return values, missing
+
+
+def moving_average(values, window):
+    """居中的滑动平均（累加和实现，耗时与窗口长度无关），边缘处窗口向内平移"""
+    window = max(int(window), 1)
+    n = len(values)
+    sums = np.concatenate([[0.0], np.cumsum(values)])
+    start = np.clip(np.arange(n) - window // 2, 0, n)
+    end = np.clip(start + window, 0, n)
+    start = np.clip(end - window, 0, n)
+    return (sums[end] - sums[start]) / np.maximum(end - start, 1)
+
+
+def rolling_max(values, window):
+    """居中的滑动最大值
+
+    按窗口长度倍增逐次取两段的最大值，只需 log2(窗口) 次整体运算，
+    窗口较长时也比逐窗口求最大值快得多。
+    """
+    window = max(int(window), 1)
+    half = window // 2
+    result = np.concatenate([np.full(half, -np.inf), values, np.full(window - 1 - half, -np.inf)])
+    span = 1
+    while span * 2 <= window:
+        np.maximum(result[:-span], result[span:], out=result[:-span])
+        span *= 2
+    if span < window:
+        shift = window - span
+        np.maximum(result[:-shift], result[shift:], out=result[:-shift])
+    return result[:len(values)]
+
+
+def bandpass(values, sampling_rate, band):
+    """零相位带通滤波
+
+    有SciPy时使用2阶巴特沃斯滤波器正反向各滤一次；否则用两个滑动平均相减近似
+    （减去长窗口平均去除基线漂移，短窗口平均去除高频噪声）。
+    """
+    low, high = band
+    high = min(high, sampling_rate / 2 * 0.9)
+    if butter is not None:
+        sos = butter(2, [low, high], btype="band", fs=sampling_rate, output="sos")
+        return sosfiltfilt(sos, values)
+    smoothed = moving_average(values, sampling_rate / (2 * high))
+    return smoothed - moving_average(smoothed, sampling_rate / low)
+
+
+def find_peaks(values, min_distance, threshold):
+    """查找局部峰值：在前后min_distance个点内最大且超过阈值的点
+
+    Args:
+        values: 信号
+        min_distance: 相邻峰值的最小间隔（采样点数）
+        threshold: 阈值，标量或与信号等长的数组
+
+    Returns:
+        np.ndarray: 峰值位置（采样点序号）
+    """
+    min_distance = max(int(min_distance), 1)
+    peaks = np.flatnonzero((values >= rolling_max(values, 2 * min_distance + 1)) & (values > threshold))
+    # 平顶的峰会有多个相等的最大值，只保留第一个
+    return peaks[np.concatenate([[True], np.diff(peaks) > min_distance])] if len(peaks) else peaks
+
+
+def enforce_min_distance(peaks, amplitudes, min_distance):
+    """相邻峰值间隔小于min_distance时只保留幅值较大的一个"""
+    peaks = np.asarray(peaks)
+    amplitudes = np.asarray(amplitudes)
+    while len(peaks) > 1:
+        close = np.flatnonzero(np.diff(peaks) < min_distance)
+        if not len(close):
+            break
+        # 每对过近的峰去掉较小的一个（一轮处理所有互不相邻的对）
+        close = close[np.concatenate([[True], np.diff(close) > 1])]
+        drop = np.where(amplitudes[close] < amplitudes[close + 1], close, close + 1)
+        keep = np.ones(len(peaks), dtype=bool)
+        keep[drop] = False
+        peaks, amplitudes = peaks[keep], amplitudes[keep]
+    return peaks
+
+
+def beat_intervals(beats, sampling_rate, timestamps=None, missing=None, interval_range=INTERVAL_RANGE,
+                   max_missing=MAX_MISSING_SECONDS):
+    """由逐搏位置计算逐搏间期
+
+    Args:
+        beats: 逐搏位置（采样点序号）
+        sampling_rate: 采样率（Hz）
+        timestamps: 每个采样点的时间戳（int64 ns），提供时按时间戳计算间期（包含实测采样率）
+        missing: 缺失采样点的布尔数组，间期内缺失过多时标为无效
+        interval_range: 有效间期范围（秒）
+        max_missing: 间期内允许的缺失采样累计时长（秒）
+
+    Returns:
+        tuple: (间期秒数数组, 间期是否有效的布尔数组)，长度为搏数-1
+    """
+    beats = np.asarray(beats, dtype=np.int64)
+    if timestamps is not None and len(timestamps) > (beats.max() if len(beats) else -1):
+        intervals = np.diff(np.asarray(timestamps)[beats]) / 1e9
+    else:
+        intervals = np.diff(beats) / float(sampling_rate)
+    valid = (intervals >= interval_range[0]) & (intervals <= interval_range[1])
+    if missing is not None and len(beats):
+        missing_before = np.concatenate([[0], np.cumsum(missing)])
+        valid &= np.diff(missing_before[beats]) <= max_missing * sampling_rate
+    return intervals, valid
+
+
+def variability_metrics(intervals, valid):
+    """逐搏间期的变异性指标
+
+    Returns:
+        dict: {'mean_rate'(次/分), 'sdnn_ms', 'rmssd_ms', 'pnn50'(%)}，有效间期不足时为NaN
+    """
+    normal = intervals[valid]
+    successive = np.diff(intervals)[valid[1:] & valid[:-1]] if len(intervals) > 1 else np.empty(0)
+    return {
+        "mean_rate": float(60.0 / normal.mean()) if len(normal) else float("nan"),
+        "sdnn_ms": float(normal.std(ddof=1) * 1000) if len(normal) > 1 else float("nan"),
+        "rmssd_ms": float(np.sqrt(np.mean(successive ** 2)) * 1000) if len(successive) else float("nan"),
+        "pnn50": float(np.mean(np.abs(successive) > 0.05) * 100) if len(successive) else float("nan"),
+    }
@@ -0,0 +1,132 @@
+import numpy as np
+
+from analysis.peaks import fill_gaps, rolling_max, bandpass, find_peaks, beat_intervals
+
+# 脉搏波能量集中的频段（Hz）：去除呼吸引起的基线波动和高频噪声
+PULSE_BAND = (0.5, 8.0)
+# 不应期（秒）：两次脉搏的最小间隔，对应200次/分
+REFRACTORY_SECONDS = 0.3
+# 自适应阈值：取前后该时长（秒）内滤波后幅值最大值的一定比例
+THRESHOLD_WINDOW_SECONDS = 3.0
+THRESHOLD_RATIO = 0.3
+# 在峰值前该时长（秒）内、上一个峰值之后找脉搏起点（波谷）
+FOOT_SEARCH_SECONDS = 0.6
+# 与监护仪脉率比较时，取每次上报前该时长（秒）内的逐搏脉率平均（监护仪脉率本身是数秒的平均值）
+REFERENCE_AVERAGING_SECONDS = 8.0
+
+
+def detect_pulses(pleth, sampling_rate):
+    """检测脉搏波的峰值（收缩期最高点）和起点（波谷）
+
+    带通滤波后在不应期内取局部最大值，用前后几秒的最大幅值乘以比例作为自适应阈值；
+    每个峰值之前、上一个峰值之后的最低点作为该搏的起点。全部为整体数组运算。
+
+    Args:
+        pleth: 容积脉搏波，NaN表示缺失采样
+        sampling_rate: 采样率（Hz）
+
+    Returns:
+        tuple: (峰值位置int64数组, 起点位置int64数组, 缺失采样点的布尔数组)
+    """
+    values, missing = fill_gaps(pleth)
+    empty = np.empty(0, dtype=np.int64)
+    if len(values) < 2 * sampling_rate or missing.all():
+        return empty, empty, missing
+
+    filtered = bandpass(values - values.mean(), sampling_rate, PULSE_BAND)
+    filtered[missing] = 0.0
+    threshold = THRESHOLD_RATIO * rolling_max(filtered, THRESHOLD_WINDOW_SECONDS * sampling_rate)
+    peaks = find_peaks(filtered, REFRACTORY_SECONDS * sampling_rate, np.maximum(threshold, 0.0))
+    if not len(peaks):
+        return empty, empty, missing
+
+    # 起点：峰值前的搜索窗口内（不越过上一个峰值）滤波信号的最低点
+    span = max(int(FOOT_SEARCH_SECONDS * sampling_rate), 1)
+    offsets = np.arange(-span, 1)
+    window = peaks[:, None] + offsets
+    previous = np.concatenate([[-1], peaks[:-1]])
+    candidates = np.where(window > previous[:, None], filtered[np.clip(window, 0, len(values) - 1)], np.inf)
+    feet = peaks + offsets[np.argmin(candidates, axis=1)]
+    return peaks.astype(np.int64), feet.astype(np.int64), missing
+
+
+def analyze_pleth(pleth, sampling_rate, timestamps=None):
+    """检测脉搏并计算逐搏脉率和脉搏幅度
+
+    脉率按相邻起点的间隔计算（起点比峰值受波形形态和灌注变化的影响小），
+    幅度为每搏峰值与起点处原始波形的差值。
+
+    Args:
+        pleth: 容积脉搏波
+        sampling_rate: 采样率（Hz）
+        timestamps: 每个采样点的时间戳（int64 ns），可选
+
+    Returns:
+        dict: peaks、feet（采样点序号）、beat_seconds（起点相对波形起点的秒数）、
+              beat_ns（起点时间戳，没有时间戳时为None）、intervals（脉搏间期秒数）、
+              pulse_rate（逐搏脉率，次/分，对应第2搏起）、valid（间期是否有效）、
+              amplitude（逐搏幅度）、beats、mean_rate、mean_amplitude
+    """
+    peaks, feet, missing = detect_pulses(pleth, sampling_rate)
+    if timestamps is not None and len(timestamps) != len(missing):
+        timestamps = None
+    intervals, valid = beat_intervals(feet, sampling_rate, timestamps, missing)
+    values = fill_gaps(pleth)[0]
+    amplitude = values[peaks] - values[feet] if len(peaks) else np.empty(0)
+    with np.errstate(divide="ignore"):
+        pulse_rate = 60.0 / intervals
+    return {
+        "peaks": peaks,
+        "feet": feet,
+        "beat_seconds": feet / float(sampling_rate),
+        "beat_ns": np.asarray(timestamps)[feet] if timestamps is not None else None,
+        "intervals": intervals,
+        "pulse_rate": pulse_rate,
+        "valid": valid,
+        "amplitude": amplitude,
+        "beats": len(feet),
+        "mean_rate": float(60.0 / intervals[valid].mean()) if valid.any() else float("nan"),
+        "mean_amplitude": float(np.median(amplitude)) if len(amplitude) else float("nan"),
+    }
+
+
+def compare_pulse_rate(result, reference_ns, reference_values, window_seconds=REFERENCE_AVERAGING_SECONDS):
+    """把逐搏脉率与监护仪上报的脉率比较
+
+    对每次上报，取此前window_seconds内有效逐搏脉率的平均值与上报值配对。
+
+    Args:
+        result: analyze_pleth的结果，需要有beat_ns
+        reference_ns: 监护仪脉率的上报时间（int64 ns，升序）
+        reference_values: 监护仪脉率
+        window_seconds: 平均窗口（秒）
+
+    Returns:
+        dict: pairs（配对数）、bias（逐搏平均减监护仪，次/分）、mae、correlation，
+              无法比较时为None
+    """
+    if result["beat_ns"] is None or len(result["pulse_rate"]) == 0 or len(reference_ns) == 0:
+        return None
+    rate_ns = result["beat_ns"][1:]
+    valid = result["valid"] & np.isfinite(result["pulse_rate"])
+    sums = np.concatenate([[0.0], np.cumsum(np.where(valid, result["pulse_rate"], 0.0))])
+    counts = np.concatenate([[0], np.cumsum(valid)])
+    reference_ns = np.asarray(reference_ns, dtype=np.int64)
+    end = np.searchsorted(rate_ns, reference_ns, side="right")
+    start = np.searchsorted(rate_ns, reference_ns - int(window_seconds * 1e9), side="right")
+    count = counts[end] - counts[start]
+    paired = (count > 0) & np.isfinite(reference_values)
+    if not paired.any():
+        return None
+    measured = (sums[end] - sums[start])[paired] / count[paired]
+    reported = np.asarray(reference_values, dtype=np.float64)[paired]
+    difference = measured - reported
+    correlation = float("nan")
+    if paired.sum() > 2 and measured.std() > 0 and reported.std() > 0:
+        correlation = float(np.corrcoef(measured, reported)[0, 1])
+    return {
+        "pairs": int(paired.sum()),
+        "bias": float(difference.mean()),
+        "mae": float(np.abs(difference).mean()),
+        "correlation": correlation,
+    }
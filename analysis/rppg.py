@@ -0,0 +1,232 @@
+import os
+import re
+import glob
+import argparse
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+import cv2
+import numpy as np
+
+from utils.frame_timing import read_timestamps
+from workers.video_writers import open_raw_recording, read_segment_manifest
+
+# 每批的帧数，批内各帧的按列和最后用一次向量化归约得到通道均值
+DEFAULT_BATCH_SIZE = 64
+
+# 录制目录中的视频文件名
+_VIDEO_PATTERN = re.compile(r"camera_(\d+)(?:_seg(\d+))?\.avi$")
+_RAW_PATTERN = re.compile(r"camera_(\d+)(?:_seg(\d+))?_raw$")
+
+
+def find_video_jobs(subject_dir):
+    """列出录制目录中需要提取的视频（分段录制按分段拆分，便于并行）
+
+    Returns:
+        list: [(摄像头ID, 起始帧序号, 视频文件或原始帧目录路径), ...]
+    """
+    jobs = []
+    segmented = set()
+    for manifest_path in glob.glob(os.path.join(subject_dir, "camera_*_segments.json")):
+        camera_id = int(re.search(r"camera_(\d+)_segments", manifest_path).group(1))
+        segmented.add(camera_id)
+        for segment in read_segment_manifest(manifest_path):
+            if segment["frames"] > 0:
+                jobs.append((camera_id, segment["first_frame"], segment["path"]))
+
+    for name in sorted(os.listdir(subject_dir)):
+        match = _VIDEO_PATTERN.match(name) or _RAW_PATTERN.match(name)
+        if match and match.group(2) is None and int(match.group(1)) not in segmented:
+            jobs.append((int(match.group(1)), 0, os.path.join(subject_dir, name)))
+    return sorted(jobs)
+
+
+def _roi_slices(roi, width, height):
+    if roi is None:
+        return slice(0, height), slice(0, width)
+    x, y, w, h = roi
+    return slice(max(y, 0), min(y + h, height)), slice(max(x, 0), min(x + w, width))
+
+
+def _column_sums(region, out=None):
+    """ROI沿高度方向的整数和，region形状为 (..., 高, 宽, 通道)，返回 (..., 宽*通道)
+
+    把宽和通道合并成一维后沿高度归约，内层循环是连续的整行像素，比直接对长度为3的
+    通道轴求均值快一个数量级。
+    """
+    shape = region.shape
+    merged = region.reshape(shape[:-3] + (shape[-3], shape[-2] * shape[-1]))
+    return merged.sum(axis=-2, dtype=np.uint32, out=out)
+
+
+def _channel_means(column_sums, region_shape):
+    """由一批帧的按列和计算各通道均值，返回 (N, 通道)"""
+    height, width, channels = region_shape
+    sums = column_sums.reshape(len(column_sums), width, channels).sum(axis=1, dtype=np.uint64)
+    return sums / float(height * width)
+
+
+def extract_video_means(path, roi=None, batch_size=DEFAULT_BATCH_SIZE):
+    """逐批解码视频并计算每帧ROI内的B/G/R均值
+
+    Args:
+        path: 视频文件或原始帧分段目录
+        roi: 区域 (x, y, 宽, 高)，None表示整帧
+        batch_size: 每批帧数
+
+    Returns:
+        np.ndarray: 形状 (帧数, 3) 的float64数组，列顺序为B/G/R
+    """
+    if os.path.isdir(path):
+        # 原始帧分段是内存映射，直接对整批帧的视图归约
+        results = []
+        for chunk in open_raw_recording(path):
+            if chunk.ndim == 3:
+                chunk = chunk[..., np.newaxis]
+            rows, cols = _roi_slices(roi, chunk.shape[2], chunk.shape[1])
+            for start in range(0, len(chunk), batch_size):
+                region = chunk[start:start + batch_size, rows, cols]
+                results.append(_channel_means(_column_sums(region), region.shape[1:]))
+        return _as_bgr(np.concatenate(results)) if results else np.empty((0, 3))
+
+    cap = cv2.VideoCapture(path)
+    if not cap.isOpened():
+        raise IOError(f"无法打开视频文件: {path}")
+    results = []
+    frame = None
+    column_sums = None
+    count = 0
+    try:
+        while True:
+            # 解码到复用的帧缓冲区，每帧只把ROI的按列和写入预分配的批缓冲区
+            ok, frame = cap.read(frame)
+            if not ok:
+                break
+            if column_sums is None:
+                rows, cols = _roi_slices(roi, frame.shape[1], frame.shape[0])
+                region_shape = frame[rows, cols].shape
+                column_sums = np.empty((batch_size, region_shape[1] * region_shape[2]), dtype=np.uint32)
+            _column_sums(frame[rows, cols], out=column_sums[count])
+            count += 1
+            if count == batch_size:
+                results.append(_channel_means(column_sums, region_shape))
+                count = 0
+        if count:
+            results.append(_channel_means(column_sums[:count], region_shape))
+    finally:
+        cap.release()
+    return _as_bgr(np.concatenate(results)) if results else np.empty((0, 3))
+
+
+def _as_bgr(means):
+    """单通道（灰度）录制的均值复制到三列，保持输出格式一致"""
+    return np.repeat(means, 3, axis=1) if means.shape[1] == 1 else means
+
+
+def _extract_job(job, roi, batch_size):
+    camera_id, first_frame, path = job
+    cv2.setNumThreads(1)
+    return camera_id, first_frame, extract_video_means(path, roi, batch_size)
+
+
+def extract_rgb_traces(subject_dir, roi=None, workers=None, batch_size=DEFAULT_BATCH_SIZE, use_processes=True):
+    """并行提取录制目录中每个摄像头的逐帧ROI均值R/G/B曲线
+
+    Args:
+        subject_dir: 被测对象录制目录
+        roi: 区域 (x, y, 宽, 高)，None表示整帧
+        workers: 并行数，None表示CPU核数
+        batch_size: 每批解码的帧数
+        use_processes: True使用进程池，False使用线程池（解码和归约大部分会释放GIL）
+
+    Returns:
+        dict: {摄像头ID: {'frame_index', 'wall_clock_ns', 'r', 'g', 'b', 'fps'}}
+    """
+    jobs = find_video_jobs(subject_dir)
+    if not jobs:
+        return {}
+
+    executor_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_class(max_workers=workers or min(len(jobs), os.cpu_count() or 1)) as executor:
+        results = list(executor.map(_extract_job, jobs, [roi] * len(jobs), [batch_size] * len(jobs)))
+
+    per_camera = {}
+    for camera_id, first_frame, means in results:
+        per_camera.setdefault(camera_id, []).append((first_frame, means))
+
+    traces = {}
+    for camera_id, parts in per_camera.items():
+        parts.sort(key=lambda part: part[0])
+        means = np.concatenate([part[1] for part in parts])
+        frame_index = np.concatenate([np.arange(len(part[1])) + part[0] for part in parts])
+        fps, wall_clock_ns = _frame_wall_times(subject_dir, camera_id, frame_index)
+        traces[camera_id] = {
+            "frame_index": frame_index,
+            "wall_clock_ns": wall_clock_ns,
+            "r": means[:, 2],
+            "g": means[:, 1],
+            "b": means[:, 0],
+            "fps": fps,
+        }
+    return traces
+
+
+def _frame_wall_times(subject_dir, camera_id, frame_index):
+    """从时间戳附属文件查出各视频帧的墙上时钟，缺失时为-1"""
+    wall_clock_ns = np.full(len(frame_index), -1, dtype=np.int64)
+    path = os.path.join(subject_dir, f"camera_{camera_id}_timestamps.bin")
+    if not os.path.exists(path):
+        return None, wall_clock_ns
+    fps, records = read_timestamps(path)
+    lookup = np.full(int(max(frame_index.max(initial=-1), records["frame_index"].max(initial=-1))) + 1, -1,
+                     dtype=np.int64)
+    lookup[records["frame_index"]] = records["wall_clock_ns"]
+    wall_clock_ns[:] = lookup[frame_index]
+    return fps, wall_clock_ns
+
+
+def measured_fps(trace):
+    """由逐帧墙上时钟估计实际帧率，时间戳不可用时返回标称帧率"""
+    wall = trace["wall_clock_ns"]
+    valid = wall[wall >= 0]
+    if len(valid) > 1 and valid[-1] > valid[0]:
+        return (len(valid) - 1) / ((valid[-1] - valid[0]) / 1e9)
+    return trace["fps"] or 30
+
+
+def save_trace_csv(trace, output_path):
+    """将R/G/B曲线保存为CSV：帧序号, 墙上时钟ns, R, G, B"""
+    data = np.column_stack([trace["frame_index"], trace["wall_clock_ns"], trace["r"], trace["g"], trace["b"]])
+    np.savetxt(output_path, data, delimiter=",", header="frame_index,wall_clock_ns,r,g,b", comments="",
+               fmt=["%d", "%d", "%.4f", "%.4f", "%.4f"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="从录制视频提取逐帧ROI均值R/G/B曲线")
+    parser.add_argument("subject_dir", help="被测对象录制目录（包含camera_*.avi）")
+    parser.add_argument("--roi", type=int, nargs=4, metavar=("X", "Y", "W", "H"), help="ROI区域，默认整帧")
+    parser.add_argument("--workers", type=int, help="并行数，默认CPU核数")
+    parser.add_argument("--oximeter", help="血氧仪数据文件，提供时把R/G/B曲线与血氧仪通道一起导出到Excel")
+    args = parser.parse_args()
+
+    traces = extract_rgb_traces(args.subject_dir, roi=args.roi, workers=args.workers)
+    if not traces:
+        print(f"在 {args.subject_dir} 中没有找到录制视频")
+        return
+
+    for camera_id, trace in sorted(traces.items()):
+        output_path = os.path.join(args.subject_dir, f"camera_{camera_id}_rgb.csv")
+        save_trace_csv(trace, output_path)
+        print(f"摄像头 {camera_id}: {len(trace['frame_index'])} 帧, R/G/B曲线已保存至 {output_path}")
+
+    if args.oximeter:
+        from oximeter_data_analyzer import OximeterDataAnalyzer
+        analyzer = OximeterDataAnalyzer(args.oximeter)
+        analyzer.parse_file()
+        analyzer.add_video_traces(traces)
+        analyzer.analyze_heart_rate()
+        analyzer.analyze_pulse_rate()
+        analyzer.analyze_spectra()
+        analyzer.export_to_excel()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from analysis.peaks import fill_gaps
+
+# 心率和呼吸率的频段（Hz）：42-210 次/分、6-42 次/分
+HR_BAND = (0.7, 3.5)
+RR_BAND = (0.1, 0.7)
+# 默认窗口长度与步长（秒）：呼吸频率低，需要更长的窗口才能分辨
+HR_WINDOW_SECONDS = 10.0
+RR_WINDOW_SECONDS = 32.0
+STEP_SECONDS = 1.0
+# 窗口内缺失采样超过该比例时不给出估计
+MAX_MISSING_FRACTION = 0.2
+# 每批做FFT的最大采样点数（窗口数×窗口长度），限制长录制时窗口矩阵的内存
+BATCH_SAMPLES = 1 << 22
+
+
+def segment_spectra(values, segment, positions, nfft):
+    """取起点为positions、长度为segment的分段，逐段去均值、加汉宁窗后做rFFT
+
+    分段矩阵是原数组上的步幅视图（不复制），按BATCH_SAMPLES分批取出并计算功率谱。
+
+    Returns:
+        np.ndarray: 功率谱，形状为 (分段数, nfft // 2 + 1)
+    """
+    frames = sliding_window_view(values, segment)
+    taper = np.hanning(segment)
+    power = np.empty((len(positions), nfft // 2 + 1))
+    batch = max(BATCH_SAMPLES // segment, 1)
+    for start in range(0, len(positions), batch):
+        chunk = frames[positions[start:start + batch]]
+        chunk = (chunk - chunk.mean(axis=1, keepdims=True)) * taper
+        power[start:start + batch] = np.abs(np.fft.rfft(chunk, n=nfft, axis=1)) ** 2
+    return power
+
+
+def sliding_spectrum(values, sampling_rate, window_seconds, step_seconds=STEP_SECONDS, segments=1, pad=1):
+    """滑动窗口功率谱，所有窗口一次批量计算
+
+    segments为1时每个窗口直接做一次FFT；大于1时按Welch方法把窗口分成segments个
+    50%重叠的分段取平均（频率分辨率降低、方差减小），相邻窗口共用的分段只做一次FFT。
+
+    Args:
+        values: 信号，NaN会先线性插值
+        sampling_rate: 采样率（Hz）
+        window_seconds: 窗口长度（秒）
+        step_seconds: 窗口步长（秒）
+        segments: Welch平均的分段数
+        pad: FFT补零倍数（取不小于分段长度×pad的2的幂）
+
+    Returns:
+        tuple: (窗口起点采样序号数组, 窗口长度（采样点数）, 频率数组Hz, 功率谱（窗口数×频率数）)
+    """
+    values = fill_gaps(values)[0]
+    window = int(round(window_seconds * sampling_rate))
+    step = max(int(round(step_seconds * sampling_rate)), 1)
+    if segments > 1:
+        segment = int(2 * window / (segments + 1))
+        hop = max(segment // 2, 1)
+        window = segment + (segments - 1) * hop
+    else:
+        segment, hop = window, step
+    if segment < 4 or len(values) < window:
+        return np.empty(0, dtype=np.int64), window, np.empty(0), np.empty((0, 0))
+
+    nfft = 1 << int(np.ceil(np.log2(segment * pad)))
+    freqs = np.fft.rfftfreq(nfft, 1.0 / sampling_rate)
+    starts = np.arange((len(values) - window) // step + 1, dtype=np.int64) * step
+    if segments == 1:
+        return starts, window, freqs, segment_spectra(values, segment, starts, nfft)
+    # 第j个窗口取起点为 starts[j] + m*hop（m<segments）的分段谱平均，重复的分段起点只计算一次
+    positions, index = np.unique(starts[:, None] + np.arange(segments) * hop, return_inverse=True)
+    power = segment_spectra(values, segment, positions, nfft)
+    return starts, window, freqs, power[index.reshape(len(starts), segments)].mean(axis=1)
+
+
+def dominant_frequency(freqs, power, band):
+    """在频段内找每个窗口的主频率
+
+    峰值所在频点用相邻三点的对数功率做抛物线插值，得到比频率分辨率更细的估计。
+
+    Returns:
+        tuple: (主频率Hz数组, 峰值功率占频段总功率的比例数组，作为估计的可信度)
+    """
+    in_band = np.flatnonzero((freqs >= band[0]) & (freqs <= band[1]))
+    if not len(in_band) or not len(power):
+        return np.full(len(power), np.nan), np.full(len(power), np.nan)
+    band_power = power[:, in_band]
+    peak = np.argmax(band_power, axis=1)
+    rows = np.arange(len(power))
+    index = in_band[peak]
+
+    # 抛物线插值（峰值在频段边界时左右邻点取频段外的点，边界频点除外）
+    left = np.log(power[rows, np.maximum(index - 1, 0)] + 1e-300)
+    center = np.log(power[rows, index] + 1e-300)
+    right = np.log(power[rows, np.minimum(index + 1, power.shape[1] - 1)] + 1e-300)
+    denominator = left - 2 * center + right
+    with np.errstate(divide="ignore", invalid="ignore"):
+        offset = np.where(denominator < 0, 0.5 * (left - right) / denominator, 0.0)
+    resolution = freqs[1] - freqs[0]
+    frequency = freqs[index] + np.clip(offset, -0.5, 0.5) * resolution
+
+    total = band_power.sum(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        quality = np.where(total > 0, band_power[rows, peak] / total, np.nan)
+    frequency[~(total > 0)] = np.nan
+    return frequency, quality
+
+
+def frequency_track(values, sampling_rate, band, window_seconds, step_seconds=STEP_SECONDS, segments=1,
+                    pad=1, timestamps=None):
+    """计算一个通道的滑动窗口主频率曲线
+
+    Args:
+        values: 信号（NaN表示缺失）
+        sampling_rate: 采样率（Hz）
+        band: 频段（Hz）
+        window_seconds: 窗口长度（秒）
+        step_seconds: 窗口步长（秒）
+        segments: Welch平均的分段数
+        pad: FFT补零倍数
+        timestamps: 每个采样点的时间戳（int64 ns），可选；小于0表示未知
+
+    Returns:
+        dict: seconds（窗口中心相对信号起点的秒数）、timestamps_ns（窗口中心的时间戳，
+              未知时为-1，没有时间戳时为None）、frequency_hz、rate（次/分）、quality、
+              window_seconds、step_seconds
+    """
+    values = np.asarray(values, dtype=np.float64)
+    starts, window, freqs, power = sliding_spectrum(values, sampling_rate, window_seconds, step_seconds,
+                                                    segments, pad)
+    frequency, quality = dominant_frequency(freqs, power, band)
+
+    # 缺失采样过多的窗口不给出估计
+    if len(starts):
+        missing = np.concatenate([[0], np.cumsum(np.isnan(values))])
+        too_sparse = (missing[starts + window] - missing[starts]) > MAX_MISSING_FRACTION * window
+        frequency[too_sparse] = np.nan
+        quality[too_sparse] = np.nan
+
+    centers = starts + window // 2
+    timestamps_ns = None
+    if timestamps is not None and len(timestamps) == len(values):
+        timestamps_ns = np.asarray(timestamps, dtype=np.int64)[centers]
+    return {
+        "seconds": centers / float(sampling_rate),
+        "timestamps_ns": timestamps_ns,
+        "frequency_hz": frequency,
+        "rate": frequency * 60.0,
+        "quality": quality,
+        "window_seconds": window / float(sampling_rate),
+        "step_seconds": (starts[1] - starts[0]) / float(sampling_rate) if len(starts) > 1 else float(step_seconds),
+    }
+
+
+def heart_rate_track(values, sampling_rate, window_seconds=HR_WINDOW_SECONDS, **kwargs):
+    """心率频段（0.7-3.5Hz）的滑动窗口主频率，适用于PLETH和视频rPPG曲线"""
+    return frequency_track(values, sampling_rate, HR_BAND, window_seconds, **kwargs)
+
+
+def respiration_rate_track(values, sampling_rate, window_seconds=RR_WINDOW_SECONDS, **kwargs):
+    """呼吸频段（0.1-0.7Hz）的滑动窗口主频率，适用于胸阻抗和PLETH的基线波动"""
+    return frequency_track(values, sampling_rate, RR_BAND, window_seconds, **kwargs)
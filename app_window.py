@@ -4,8 +4,19 @@ from PyQt5.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
 from PyQt5.QtCore import QTimer, Qt
 
 from utils.helpers import get_beijing_time, get_timestamp
-from ui.camera_tab import CameraTab
-from ui.oximeter_tab import OximeterTab
+
+
+def _create_camera_tab():
+    # 摄像头选项卡依赖cv2和watchdog，首次激活时才导入
+    from ui.camera_tab import CameraTab
+    return CameraTab()
+
+
+def _create_oximeter_tab():
+    # 血氧仪选项卡依赖pandas和matplotlib，首次激活时才导入
+    from ui.oximeter_tab import OximeterTab
+    return OximeterTab()
+
 
 class MultiCameraRecorder(QMainWindow):
     """多功能生理数据采集工具主窗口"""
@@ -50,13 +61,13 @@ class MultiCameraRecorder(QMainWindow):
             }
         """)
         
-        # 添加摄像头录制选项卡
-        self.camera_tab = CameraTab()
-        self.tab_widget.addTab(self.camera_tab, "多摄像头录制")
-        
-        # 添加血氧仪分析选项卡
-        self.oximeter_tab = OximeterTab()
-        self.tab_widget.addTab(self.oximeter_tab, "血氧仪数据分析")
+        # 选项卡延迟创建：先放置占位页，首次激活时再构建真实页面
+        self.camera_tab = None
+        self.oximeter_tab = None
+        self._tab_factories = {}
+        self.add_lazy_tab("camera_tab", _create_camera_tab, "多摄像头录制")
+        self.add_lazy_tab("oximeter_tab", _create_oximeter_tab, "血氧仪数据分析")
+        self.tab_widget.currentChanged.connect(self.ensure_tab)
         
         # 将选项卡Widget添加到主布局
         self.main_layout.addWidget(self.tab_widget)
@@ -93,6 +104,49 @@ class MultiCameraRecorder(QMainWindow):
         self.time_timer.timeout.connect(self.update_beijing_time)
         self.time_timer.start(1000)
         self.update_beijing_time()
+        
+        # 窗口显示后再构建当前选项卡，避免阻塞首帧绘制
+        QTimer.singleShot(0, lambda: self.ensure_tab(self.tab_widget.currentIndex()))
+    
+    def add_lazy_tab(self, attr_name, factory, title):
+        """添加一个延迟构建的选项卡
+        
+        Args:
+            attr_name: 构建完成后保存选项卡实例的属性名
+            factory: 创建选项卡实例的无参函数
+            title: 选项卡标题
+        """
+        placeholder = QWidget()
+        placeholder_layout = QVBoxLayout(placeholder)
+        loading_label = QLabel("正在加载...")
+        loading_label.setAlignment(Qt.AlignCenter)
+        loading_label.setStyleSheet("font-size: 14px; color: #666666;")
+        placeholder_layout.addWidget(loading_label)
+        
+        index = self.tab_widget.addTab(placeholder, title)
+        self._tab_factories[index] = (attr_name, factory)
+    
+    def ensure_tab(self, index):
+        """确保指定位置的选项卡已构建，首次调用时用真实页面替换占位页"""
+        if index not in self._tab_factories:
+            return
+        
+        attr_name, factory = self._tab_factories.pop(index)
+        title = self.tab_widget.tabText(index)
+        placeholder = self.tab_widget.widget(index)
+        was_current = self.tab_widget.currentIndex() == index
+        
+        tab = factory()
+        setattr(self, attr_name, tab)
+        
+        # 替换占位页时暂停信号，防止removeTab/insertTab触发递归构建
+        self.tab_widget.blockSignals(True)
+        self.tab_widget.removeTab(index)
+        self.tab_widget.insertTab(index, tab, title)
+        if was_current:
+            self.tab_widget.setCurrentIndex(index)
+        self.tab_widget.blockSignals(False)
+        placeholder.deleteLater()
     
     def create_time_display(self):
         """创建北京时间显示区域"""
@@ -136,7 +190,8 @@ class MultiCameraRecorder(QMainWindow):
         if self.time_timer.isActive():
             self.time_timer.stop()
         
-        # 调用CameraTab的清理方法
-        self.camera_tab.cleanup()
+        # 调用CameraTab的清理方法（仅在选项卡已构建时）
+        if self.camera_tab is not None:
+            self.camera_tab.cleanup()
         
         super().closeEvent(event)
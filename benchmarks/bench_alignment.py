@@ -0,0 +1,131 @@
+"""
+视频帧与生理采样对齐基准测试
+
+合成指定时长的监护仪消息序列（每秒一条，ECG/PLETH波形加HR/SpO2数值）和N个摄像头的
+逐帧时间戳，测量逐采样点时间戳重建和逐帧标签对齐的耗时，检查耗时随会话时长线性增长。
+加 --with-log 时同时写出同步日志并测量从日志读取的耗时。
+
+用法：
+    python benchmarks/bench_alignment.py
+    python benchmarks/bench_alignment.py --hours 1 2 4 -n 4
+    python benchmarks/bench_alignment.py --hours 0.5 1 --with-log
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from analysis.alignment import load_physio_streams, align_waveform, align_numeric, DEFAULT_MAX_GAP, DEFAULT_MAX_NUMERIC_AGE
+from utils.sample_timing import reconstruct_sample_times
+from services.sync_log import SyncLogWriter
+
+# 合成波形通道: (名称, 采样率)
+CHANNELS = (("MDC_ECG_ELEC_POTL_II", 500.0), ("MDC_PULS_OXIM_PLETH", 125.0))
+START_NS = 10 ** 15  # 模拟开机较久后的单调时钟
+
+
+def synthesize_streams(seconds, rng):
+    """合成每秒一条消息的生理数据，到达时间带±20ms抖动"""
+    messages = int(seconds)
+    arrival_ns = START_NS + np.arange(1, messages + 1, dtype=np.int64) * 10 ** 9
+    arrival_ns += rng.integers(-20_000_000, 20_000_000, messages)
+    waveforms = {}
+    for name, rate in CHANNELS:
+        counts = np.full(messages, int(rate), dtype=np.int64)
+        t = np.arange(counts.sum()) / rate
+        waveforms[name] = {"arrival_ns": arrival_ns, "counts": counts, "rate": rate,
+                           "values": np.sin(2 * np.pi * 1.2 * t) * 1000}
+    numerics = {
+        "HR": {"arrival_ns": arrival_ns, "values": np.full(messages, 72.0)},
+        "SpO2": {"arrival_ns": arrival_ns, "values": np.full(messages, 98.0)},
+    }
+    return {"waveforms": waveforms, "numerics": numerics}
+
+
+def synthesize_frames(seconds, fps, rng):
+    """合成一个摄像头的逐帧采集时间（带±2ms抖动）"""
+    frames = int(seconds * fps)
+    frame_ns = START_NS + np.round(np.arange(frames) * (1e9 / fps)).astype(np.int64)
+    return frame_ns + rng.integers(-2_000_000, 2_000_000, frames)
+
+
+def write_sync_log(path, streams):
+    """把合成数据写成同步日志（每条消息一条记录）"""
+    log = SyncLogWriter(path, max_buffered=1024)
+    first = next(iter(streams["waveforms"].values()))
+    offsets = {name: np.concatenate([[0], np.cumsum(stream["counts"])])
+               for name, stream in streams["waveforms"].items()}
+    for i, arrival_ns in enumerate(first["arrival_ns"]):
+        samples = {name: stream["values"][offsets[name][i]:offsets[name][i + 1]].tolist()
+                   for name, stream in streams["waveforms"].items()}
+        log.append({
+            "arrival_monotonic_ns": int(arrival_ns),
+            "data_event": {
+                "samples": samples,
+                "sampling_rates": {name: stream["rate"] for name, stream in streams["waveforms"].items()},
+                "numerics": {"MDC_ECG_HEART_RATE": 72.0, "MDC_PULS_OXIM_SAT_O2": 98.0},
+            },
+        })
+    log.close()
+
+
+def align_all(streams, cameras):
+    """重建逐采样点时间戳并对齐每个摄像头的全部帧"""
+    times = {name: reconstruct_sample_times(stream["arrival_ns"], stream["counts"], stream["rate"])[0]
+             for name, stream in streams["waveforms"].items()}
+    for frame_ns in cameras:
+        for name, stream in streams["waveforms"].items():
+            align_waveform(frame_ns, times[name], stream["values"], int(DEFAULT_MAX_GAP * 1e9))
+        for stream in streams["numerics"].values():
+            align_numeric(frame_ns, stream["arrival_ns"], stream["values"], int(DEFAULT_MAX_NUMERIC_AGE * 1e9))
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    print(f"摄像头: {args.cameras}  帧率: {args.fps}  通道: {', '.join(name for name, _ in CHANNELS)}")
+    print(f"{'时长(小时)':<12}{'帧数':>12}{'采样点':>14}{'对齐耗时(s)':>14}{'每小时(s)':>12}"
+          + (f"{'读日志(s)':>12}" if args.with_log else ""))
+    for hours in args.hours:
+        seconds = hours * 3600
+        streams = synthesize_streams(seconds, rng)
+        cameras = [synthesize_frames(seconds, args.fps, rng) for _ in range(args.cameras)]
+        samples = sum(len(stream["values"]) for stream in streams["waveforms"].values())
+
+        start = time.perf_counter()
+        align_all(streams, cameras)
+        elapsed = time.perf_counter() - start
+        line = (f"{hours:<12g}{sum(len(c) for c in cameras):>12}{samples:>14}"
+                f"{elapsed:>14.3f}{elapsed / hours:>12.3f}")
+
+        if args.with_log:
+            output_dir = tempfile.mkdtemp(prefix="bench_alignment_")
+            try:
+                path = os.path.join(output_dir, "sync_data.jsonl")
+                write_sync_log(path, streams)
+                start = time.perf_counter()
+                load_physio_streams(path)
+                line += f"{time.perf_counter() - start:>12.3f}"
+            finally:
+                shutil.rmtree(output_dir, ignore_errors=True)
+        print(line)
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="视频帧与生理采样对齐基准测试")
+    parser.add_argument("--hours", type=float, nargs="+", default=[0.5, 1, 2], help="会话时长（小时），可给多个")
+    parser.add_argument("-n", "--cameras", type=int, default=2, help="摄像头数量")
+    parser.add_argument("--fps", type=float, default=30.0)
+    parser.add_argument("--with-log", action="store_true", help="同时测量从同步日志读取的耗时")
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
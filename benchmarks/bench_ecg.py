@@ -0,0 +1,107 @@
+"""
+心电R波检测基准测试
+
+合成指定时长的500Hz心电波形（带心率变化、基线漂移、工频干扰和噪声，可选一段导联脱落），
+测量R波检测与心率/HRV计算的耗时，并与合成时的真实R波位置比对检出率和误检数。
+有SciPy时分别测量巴特沃斯带通和滑动平均近似两种滤波路径。
+
+用法：
+    python benchmarks/bench_ecg.py
+    python benchmarks/bench_ecg.py --hours 1 2 --rate 500
+    python benchmarks/bench_ecg.py --hours 1 --budget 1.0
+"""
+
+import os
+import sys
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import analysis.peaks as peaks
+from analysis.ecg import analyze_ecg
+
+# 与真实R波相差不超过该时长（秒）时算检出
+MATCH_SECONDS = 0.05
+
+
+def synthesize_ecg(seconds, sampling_rate, rng, dropout=True):
+    """合成心电波形，返回 (波形, 真实R波时间秒数)"""
+    # 心率在55-85次/分之间缓慢变化，逐搏加30ms抖动
+    mean_interval = 60.0 / 70
+    count = int(seconds / mean_interval * 1.3) + 2
+    phase = np.arange(count) * mean_interval
+    intervals = 60.0 / (70 + 15 * np.sin(2 * np.pi * phase / 300)) + rng.normal(0, 0.03, count)
+    beats = 0.5 + np.concatenate([[0.0], np.cumsum(intervals)])
+    beats = beats[beats < seconds - 1]
+
+    n = int(seconds * sampling_rate)
+    t = np.arange(n) / sampling_rate
+    values = np.zeros(n)
+    # (相对R波的偏移秒, 宽度秒, 幅值)：P、Q、R、S、T波
+    for offset, width, amplitude in ((-0.16, 0.025, 120), (-0.02, 0.008, -150), (0.0, 0.01, 1000),
+                                     (0.02, 0.008, -250), (0.25, 0.04, 300)):
+        half = int(width * sampling_rate * 4)
+        kernel = amplitude * np.exp(-0.5 * (np.arange(-half, half + 1) / (width * sampling_rate)) ** 2)
+        impulses = np.zeros(n)
+        impulses[np.clip(np.round((beats + offset) * sampling_rate).astype(np.int64), 0, n - 1)] = 1.0
+        values += np.convolve(impulses, kernel, mode="same")
+    values += 300 * np.sin(2 * np.pi * 0.25 * t) + 60 * np.sin(2 * np.pi * 50 * t) + rng.normal(0, 25, n)
+    values = np.round(values + 2000)
+
+    if dropout and seconds > 120:
+        start, end = 100, 103
+        values[int(start * sampling_rate):int(end * sampling_rate)] = np.nan
+        beats = beats[(beats < start) | (beats > end)]
+    return values, beats
+
+
+def match_beats(detected, truth):
+    """返回 (检出的真实R波数, 误检数, 检出R波的位置误差中位数ms)"""
+    if not len(detected):
+        return 0, 0, float("nan")
+    j = np.clip(np.searchsorted(detected, truth), 1, max(len(detected) - 1, 1))
+    nearest = np.minimum(np.abs(detected[j] - truth), np.abs(detected[j - 1] - truth))
+    hits = nearest < MATCH_SECONDS
+    return int(hits.sum()), int(len(detected) - hits.sum()), float(np.median(nearest[hits]) * 1000)
+
+
+def run(args):
+    rng = np.random.default_rng(0)
+    paths = ["scipy", "numpy"] if peaks.butter is not None else ["numpy"]
+    butter = peaks.butter
+    print(f"采样率: {args.rate:g} Hz  滤波路径: {', '.join(paths)}")
+    print(f"{'时长(小时)':<12}{'路径':<8}{'采样点':>12}{'耗时(s)':>10}{'真实R波':>10}{'检出':>10}"
+          f"{'误检':>8}{'误差(ms)':>10}{'平均心率':>10}")
+    over_budget = False
+    for hours in args.hours:
+        values, truth = synthesize_ecg(hours * 3600, args.rate, rng)
+        for path in paths:
+            peaks.butter = butter if path == "scipy" else None
+            start = time.perf_counter()
+            result = analyze_ecg(values, args.rate)
+            elapsed = time.perf_counter() - start
+            hits, false_positives, error_ms = match_beats(result["beat_seconds"], truth)
+            print(f"{hours:<12g}{path:<8}{len(values):>12}{elapsed:>10.3f}{len(truth):>10}{hits:>10}"
+                  f"{false_positives:>8}{error_ms:>10.2f}{result['mean_rate']:>10.1f}")
+            if args.budget and elapsed > args.budget * hours:
+                over_budget = True
+    peaks.butter = butter
+    if over_budget:
+        print(f"超出预算: 每小时 {args.budget:g} s")
+        return 1
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="心电R波检测基准测试")
+    parser.add_argument("--hours", type=float, nargs="+", default=[0.25, 1], help="波形时长（小时），可给多个")
+    parser.add_argument("--rate", type=float, default=500.0, help="采样率（Hz）")
+    parser.add_argument("--budget", type=float, default=0.0, help="每小时波形的耗时预算（秒），0表示不检查")
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+预览渲染基准测试
+
+对比旧的预览路径（每帧 cvtColor + QImage + QPixmap.fromImage + 平滑缩放）
+与当前路径（录制线程缩放到复用缓冲池 + CameraView直接绘制BGR888图像），
+统计每帧的平均耗时，以及用tracemalloc统计每帧的NumPy堆分配峰值和发生帧级分配的帧数。
+
+用法：
+    python benchmarks/bench_preview.py
+    python benchmarks/bench_preview.py -n 500 --width 1920 --height 1080
+"""
+
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QApplication, QLabel
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QImage, QPixmap
+
+from ui.camera_view import CameraView, HAS_BGR888
+from workers.video_recorder import VideoRecorder
+
+
+def legacy_render(label, frame):
+    """旧的预览路径：GUI线程中颜色转换、创建QPixmap并平滑缩放"""
+    h, w, c = frame.shape
+    rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+    q_img = QImage(rgb_frame.data, w, h, 3 * w, QImage.Format_RGB888)
+    pixmap = QPixmap.fromImage(q_img)
+    pixmap = pixmap.scaled(label.width(), label.height(), Qt.KeepAspectRatio, Qt.SmoothTransformation)
+    label.setPixmap(pixmap)
+    label.repaint()
+
+
+def pooled_render(recorder, view, frame):
+    """当前预览路径：复用缓冲池缩放 + 直接绘制"""
+    preview = recorder._make_preview(frame)
+    view.update_frame(preview)
+    view.video_label.repaint()
+
+
+def measure(render, frames):
+    """测量渲染函数的每帧平均耗时（毫秒）"""
+    # 预热，排除首帧的一次性分配
+    for frame in frames[:5]:
+        render(frame)
+
+    start = time.perf_counter()
+    for frame in frames:
+        render(frame)
+    return (time.perf_counter() - start) / len(frames) * 1000.0
+
+
+def measure_allocations(render, frames):
+    """测量单帧渲染过程中的NumPy堆分配峰值
+
+    Returns:
+        tuple: (每帧平均峰值字节数, 出现帧级分配（超过1KB）的帧数)
+    """
+    tracemalloc.start()
+    total_peak = 0
+    allocating_frames = 0
+    for frame in frames:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        render(frame)
+        _, frame_peak = tracemalloc.get_traced_memory()
+        total_peak += frame_peak - base
+        if frame_peak - base > 1024:
+            allocating_frames += 1
+    tracemalloc.stop()
+    return total_peak / len(frames), allocating_frames
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='预览渲染基准测试')
+    parser.add_argument('-n', '--frames', type=int, default=300, help='渲染帧数')
+    parser.add_argument('--width', type=int, default=1280, help='采集帧宽度')
+    parser.add_argument('--height', type=int, default=720, help='采集帧高度')
+    args = parser.parse_args()
+
+    app = QApplication(sys.argv)
+
+    rng = np.random.default_rng(0)
+    frames = [rng.integers(0, 255, (args.height, args.width, 3), dtype=np.uint8) for _ in range(8)]
+    frames = [frames[i % len(frames)] for i in range(args.frames)]
+
+    legacy_label = QLabel()
+    legacy_label.resize(320, 240)
+    legacy_label.show()
+
+    view = CameraView(0)
+    view.resize(340, 320)
+    view.show()
+    app.processEvents()
+
+    recorder = VideoRecorder(0, ".")
+    recorder.set_preview_size(*view.preview_size())
+
+    legacy = measure(lambda f: legacy_render(legacy_label, f), frames)
+    pooled = measure(lambda f: pooled_render(recorder, view, f), frames)
+    legacy_alloc = measure_allocations(lambda f: legacy_render(legacy_label, f), frames)
+    pooled_alloc = measure_allocations(lambda f: pooled_render(recorder, view, f), frames)
+
+    print(f"帧尺寸: {args.width}x{args.height}，预览尺寸: {recorder.preview_size[0]}x{recorder.preview_size[1]}，"
+          f"BGR888: {'支持' if HAS_BGR888 else '不支持'}")
+    print(f"{'路径':<8}{'耗时/帧(ms)':>14}{'分配峰值/帧(字节)':>20}{'有分配的帧数':>14}")
+    print(f"{'旧路径':<8}{legacy:>14.3f}{legacy_alloc[0]:>20.0f}{legacy_alloc[1]:>14d}")
+    print(f"{'缓冲池':<8}{pooled:>14.3f}{pooled_alloc[0]:>20.0f}{pooled_alloc[1]:>14d}")
+    print(f"缓冲池累计分配缓冲区: {recorder._preview_pool.allocations}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+"""
+录制吞吐基准测试
+
+用N个合成测试图案虚拟摄像头运行完整的录制流程（采集 → 环形缓冲区 → 编码线程 → 写入），
+统计每个摄像头的实际帧率、丢帧、编码耗时和写入速度。--fps 0 表示采集不限速，用于测量
+流水线的最大吞吐。原始帧格式下会读回录制文件，按帧内编码的序号检查丢帧和重复帧。
+
+用法：
+    python benchmarks/bench_recorder.py
+    python benchmarks/bench_recorder.py -n 4 --width 1280 --height 720 --fps 60 --seconds 10
+    python benchmarks/bench_recorder.py -n 2 --fps 0 --format raw --backend process
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import numpy as np
+from PyQt5.QtCore import QCoreApplication
+
+from workers.video_recorder import VideoRecorder
+from workers.process_recorder import ProcessVideoRecorder
+from workers.recording_trigger import RecordingTrigger
+from workers.video_writers import RECORDING_FORMATS, open_raw_recording
+from workers.capture_sources import read_synthetic_frame_index
+
+
+def wait_until(app, condition, timeout):
+    """处理Qt事件直到条件成立或超时"""
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        app.processEvents()
+        time.sleep(0.005)
+    return True
+
+
+def check_raw_sequence(raw_dir):
+    """读回原始帧录制，按帧内序号统计丢失和重复的帧"""
+    indices = np.array([read_synthetic_frame_index(frame)
+                        for chunk in open_raw_recording(raw_dir) for frame in chunk])
+    if len(indices) < 2:
+        return 0, 0
+    steps = np.diff(indices)
+    return int(np.clip(steps - 1, 0, None).sum()), int((steps == 0).sum())
+
+
+def run(args):
+    app = QCoreApplication.instance() or QCoreApplication([])
+    output_dir = args.output or tempfile.mkdtemp(prefix="bench_recorder_")
+    source = f"synthetic:{args.width}x{args.height}@{args.fps:g}"
+    recorder_class = ProcessVideoRecorder if args.backend == "process" else VideoRecorder
+    record_fps = args.fps if args.fps > 0 else 30
+
+    recorders = []
+    results = {}
+    for camera_id in range(args.cameras):
+        recorder = recorder_class(camera_id, output_dir, fps=record_fps, source=source)
+        recorder.recording_format = args.format
+        recorder.buffer_depth = args.buffer_depth
+        if args.fps == 0:
+            # 不限速时关闭节拍器，由采集源决定速度；写入的标称帧率仍为采集源的30帧/秒，
+            # 否则容器帧率过高会导致FFmpeg时间戳不单调而丢帧
+            recorder.pacing = False
+        recorder.update_frame.connect(lambda frame, cid: recorders[cid].preview_consumed())
+        recorder.recording_finished.connect(lambda cid, info: results.__setitem__(cid, info))
+        recorder.error.connect(lambda msg, cid: print(f"摄像头 {cid} 错误: {msg}"))
+        recorders.append(recorder)
+        recorder.start()
+
+    try:
+        if not wait_until(app, lambda: all(r.frame_size() for r in recorders), 30):
+            print("采集源启动超时")
+            return 1
+
+        trigger = RecordingTrigger()
+        armed = {}
+        for recorder in recorders:
+            recorder.armed_changed.connect(lambda cid, ok: armed.__setitem__(cid, ok))
+            recorder.arm(subject_name="bench", trigger=trigger)
+        if not wait_until(app, lambda: len(armed) == len(recorders), 30) or not all(armed.values()):
+            print("摄像头预备失败")
+            return 1
+
+        trigger.fire_start()
+        wait_until(app, lambda: False, args.seconds)
+        trigger.fire_stop()
+        if not wait_until(app, lambda: len(results) == len(recorders), 60):
+            print("等待录制结束超时")
+            return 1
+    finally:
+        for recorder in recorders:
+            recorder.stop_recording()
+            recorder.stop()
+
+    print(f"后端: {args.backend}  摄像头: {args.cameras}  分辨率: {args.width}x{args.height}  "
+          f"采集帧率: {'不限' if args.fps == 0 else args.fps}  格式: {args.format}  时长: {args.seconds}s")
+    print(f"{'摄像头':>6} {'帧数':>7} {'实际FPS':>9} {'丢帧':>6} {'编码p50':>9} {'编码p99':>9} {'MB/s':>8}", end="")
+    print(f" {'缺失':>6} {'重复':>6}" if args.format == "raw" else "")
+
+    total_frames = 0
+    total_mb = 0.0
+    for camera_id in sorted(results):
+        info = results[camera_id]
+        duration = max(info["duration_seconds"], 1e-6)
+        total_frames += info["frames_written"]
+        total_mb += info.get("bytes_written", 0) / 1e6
+        line = (f"{camera_id:>6} {info['frames_written']:>7} {info.get('measured_fps', 0):>9.2f} "
+                f"{info.get('dropped_frames', 0):>6} {info.get('encode_p50_ms', 0):>9.3f} "
+                f"{info.get('encode_p99_ms', 0):>9.3f} {info.get('bytes_written', 0) / 1e6 / duration:>8.2f}")
+        if args.format == "raw":
+            missing, repeated = check_raw_sequence(os.path.join(output_dir, "bench", info["filename"]))
+            line += f" {missing:>6} {repeated:>6}"
+        print(line)
+
+    print(f"合计: {total_frames / args.seconds:.1f} 帧/秒, {total_mb / args.seconds:.1f} MB/s")
+
+    if not args.output and not args.keep:
+        shutil.rmtree(output_dir, ignore_errors=True)
+    else:
+        print(f"录制文件: {output_dir}")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="多虚拟摄像头录制吞吐基准测试")
+    parser.add_argument("-n", "--cameras", type=int, default=2, help="虚拟摄像头数量")
+    parser.add_argument("--width", type=int, default=640)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--fps", type=float, default=30, help="采集帧率，0表示不限速")
+    parser.add_argument("--seconds", type=float, default=5, help="录制时长（秒）")
+    parser.add_argument("--format", choices=list(RECORDING_FORMATS), default="xvid", help="录制格式")
+    parser.add_argument("--backend", choices=["thread", "process"], default="thread", help="录制后端")
+    parser.add_argument("--buffer-depth", type=int, default=32, help="环形缓冲区深度")
+    parser.add_argument("--output", help="录制输出目录，默认使用临时目录并在结束后删除")
+    parser.add_argument("--keep", action="store_true", help="保留临时目录中的录制文件")
+    return run(parser.parse_args())
+
+
+if __name__ == "__main__":
+    sys.exit(main())
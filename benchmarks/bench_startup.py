@@ -0,0 +1,164 @@
+"""
+启动耗时基准测试
+
+使用 `python -X importtime` 统计主窗口模块的导入耗时，并在子进程中
+冷启动主窗口（创建QApplication、构建并显示MultiCameraRecorder），
+将结果与启动预算对比；同时报告首个选项卡延迟构建完成的耗时。
+超出预算时返回非零退出码，便于在构建服务器上检查回退。
+
+用法：
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --import-budget 400 --startup-budget 1500 -r 5
+"""
+
+import os
+import re
+import sys
+import argparse
+import subprocess
+
+# 仓库根目录（本脚本位于 benchmarks/ 下）
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 冷启动预算（毫秒）
+DEFAULT_IMPORT_BUDGET_MS = 400
+DEFAULT_STARTUP_BUDGET_MS = 1500
+
+# 启动阶段不应被导入的重量级模块
+HEAVY_MODULES = ['cv2', 'pandas', 'matplotlib', 'watchdog', 'xlsxwriter']
+
+IMPORTTIME_PATTERN = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+
+STARTUP_SCRIPT = """
+import sys, time
+t0 = time.perf_counter()
+from PyQt5.QtWidgets import QApplication
+app = QApplication(sys.argv)
+from app_window import MultiCameraRecorder
+window = MultiCameraRecorder()
+window.show()
+t1 = time.perf_counter()
+loaded = [m for m in {heavy!r} if m in sys.modules]
+# 处理首批事件，当前选项卡在此时延迟构建
+app.processEvents()
+t2 = time.perf_counter()
+print('STARTUP_MS', (t1 - t0) * 1000.0)
+print('TAB_READY_MS', (t2 - t0) * 1000.0)
+print('HEAVY_LOADED', ','.join(loaded))
+"""
+
+
+def measure_import_time(module="app_window"):
+    """使用 -X importtime 测量模块导入耗时
+
+    Args:
+        module: 要导入的模块名
+
+    Returns:
+        tuple: (总耗时毫秒, [(累计耗时毫秒, 模块名), ...] 按耗时降序)
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"导入 {module} 失败:\n{result.stderr}")
+
+    entries = []
+    total_us = 0
+    for line in result.stderr.splitlines():
+        match = IMPORTTIME_PATTERN.match(line)
+        if not match:
+            continue
+        cumulative_us = int(match.group(2))
+        indent = len(match.group(3))
+        name = match.group(4)
+        entries.append((cumulative_us / 1000.0, name))
+        # 顶层导入（缩进为1）的累计耗时之和即为总耗时
+        if indent == 1:
+            total_us += cumulative_us
+
+    entries.sort(reverse=True)
+    return total_us / 1000.0, entries
+
+
+def measure_startup_time():
+    """在新进程中冷启动主窗口并测量耗时
+
+    Returns:
+        tuple: (窗口显示耗时毫秒, 首个选项卡就绪耗时毫秒, 窗口显示前已加载的重量级模块列表)
+    """
+    env = dict(os.environ)
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    result = subprocess.run(
+        [sys.executable, "-c", STARTUP_SCRIPT.format(heavy=HEAVY_MODULES)],
+        cwd=REPO_ROOT, capture_output=True, text=True, env=env
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"启动主窗口失败:\n{result.stderr}")
+
+    startup_ms = None
+    tab_ready_ms = None
+    heavy_loaded = []
+    for line in result.stdout.splitlines():
+        if line.startswith("STARTUP_MS"):
+            startup_ms = float(line.split()[1])
+        elif line.startswith("TAB_READY_MS"):
+            tab_ready_ms = float(line.split()[1])
+        elif line.startswith("HEAVY_LOADED"):
+            value = line[len("HEAVY_LOADED"):].strip()
+            heavy_loaded = [m for m in value.split(",") if m]
+    return startup_ms, tab_ready_ms, heavy_loaded
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(description='启动耗时基准测试')
+    parser.add_argument('--import-budget', type=float, default=DEFAULT_IMPORT_BUDGET_MS, help='导入耗时预算（毫秒）')
+    parser.add_argument('--startup-budget', type=float, default=DEFAULT_STARTUP_BUDGET_MS, help='冷启动耗时预算（毫秒）')
+    parser.add_argument('-r', '--repeat', type=int, default=3, help='重复次数，取中位数')
+    parser.add_argument('-t', '--top', type=int, default=10, help='显示最慢的前N个模块')
+    args = parser.parse_args()
+
+    import_times = []
+    startup_times = []
+    tab_ready_times = []
+    slowest = []
+    heavy_loaded = []
+    for _ in range(max(1, args.repeat)):
+        total_ms, entries = measure_import_time()
+        import_times.append(total_ms)
+        slowest = entries
+        startup_ms, tab_ready_ms, heavy_loaded = measure_startup_time()
+        startup_times.append(startup_ms)
+        tab_ready_times.append(tab_ready_ms)
+
+    import_ms = sorted(import_times)[len(import_times) // 2]
+    startup_ms = sorted(startup_times)[len(startup_times) // 2]
+    tab_ready_ms = sorted(tab_ready_times)[len(tab_ready_times) // 2]
+
+    print(f"导入 app_window 耗时: {import_ms:.1f} ms (预算 {args.import_budget:.0f} ms)")
+    print(f"冷启动主窗口耗时: {startup_ms:.1f} ms (预算 {args.startup_budget:.0f} ms)")
+    print(f"首个选项卡就绪耗时: {tab_ready_ms:.1f} ms")
+    print(f"最慢的 {args.top} 个模块（累计耗时）:")
+    for cumulative_ms, name in slowest[:args.top]:
+        print(f"  {cumulative_ms:8.1f} ms  {name}")
+
+    failed = False
+    if heavy_loaded:
+        print(f"失败: 窗口显示前加载了重量级模块: {', '.join(heavy_loaded)}")
+        failed = True
+    if import_ms > args.import_budget:
+        print("失败: 导入耗时超出预算")
+        failed = True
+    if startup_ms > args.startup_budget:
+        print("失败: 冷启动耗时超出预算")
+        failed = True
+
+    if not failed:
+        print("通过: 启动耗时在预算之内")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
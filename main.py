@@ -1,19 +1,13 @@
 import sys
-import matplotlib
+import multiprocessing
 from PyQt5.QtWidgets import QApplication
 
 # 从新模块导入
 from app_window import MultiCameraRecorder
-from utils.helpers import setup_chinese_fonts
 
 def main():
     """主函数，用于启动应用程序"""
-    # 尝试设置中文字体
-    if not setup_chinese_fonts():
-        # 如果设置失败，使用备选方案
-        matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial Unicode MS']
-        matplotlib.rcParams['axes.unicode_minus'] = False
-        matplotlib.rcParams['font.family'] = 'sans-serif'
+    # 中文字体在首次绘图（血氧仪选项卡或分析器绘图）时配置，避免启动时加载matplotlib
     
     # 启动Qt应用
     app = QApplication(sys.argv)
@@ -22,4 +16,6 @@ def main():
     sys.exit(app.exec_())
 
 if __name__ == "__main__":
+    # 多进程录制后端以spawn方式启动子进程，打包为可执行文件时需要
+    multiprocessing.freeze_support()
     main()
@@ -1,28 +1,35 @@
-import re
 import os
 import numpy as np
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.gridspec import GridSpec
 from datetime import datetime
 import argparse
-import matplotlib
 
 # 从 utils 模块导入字体设置函数
+# pandas/matplotlib导入较慢，仅在导出或绘图时才加载，字体也在首次绘图时配置
 from utils.helpers import setup_chinese_fonts
+from utils.sample_timing import reconstruct_sample_times, datetime_to_ns
+from utils.hl7_patterns import RECEIVED_AT_PATTERN, OBX_PATTERN, default_sampling_rate
 
-# 在程序开始时调用字体设置
-setup_chinese_fonts()
+# 按信号类型计算的滑动窗口频谱估计：HR为心率频段，RR为呼吸频段
+SPECTRAL_TRACKS = {
+    'PLETH': ('HR', 'RR'),
+    'IMPED': ('RR',),
+    'rPPG': ('HR',)
+}
 
 class OximeterDataAnalyzer:
     def __init__(self, input_file):
         """初始化分析器"""
         self.input_file = input_file
         self.signals = {}  # 存储所有信号数据
-        self.timestamps = {}  # 存储时间戳
+        self.timestamps = {}  # 每个采样点的墙上时钟时间戳（int64 ns数组）
+        self.timing_segments = {}  # 各信号的连续段（实际采样率、数据中断）
         self.sampling_rates = {}  # 存储采样率
         self.units = {}  # 存储单位
         self.discrete_params = {}  # 存储离散参数
+        self.numeric_series = {}  # 离散参数的逐次上报 {参数名: (接收时间int64 ns数组, 数值数组)}
+        self.heart_rate = {}  # 由ECG波形计算的R波、逐搏心率和心率变异性 {信号名: 结果}
+        self.pulse_rate = {}  # 由PLETH波形计算的逐搏脉率和脉搏幅度 {信号名: 结果}
+        self.spectral_tracks = {}  # 滑动窗口频谱估计的心率/呼吸率曲线 {信号名: {'HR'/'RR': 曲线}}
         
     def parse_file(self):
         """解析输入文件"""
@@ -31,15 +38,18 @@ class OximeterDataAnalyzer:
         with open(self.input_file, 'r', encoding='utf-8') as file:
             content = file.read()
         
-        # 提取时间戳
-        timestamp_matches = re.findall(r'Received at\s+(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})', content)
-        all_timestamps = [datetime.strptime(ts, '%Y-%m-%d %H:%M:%S') for ts in timestamp_matches]
+        # 提取每条消息的接收时间及其在文件中的位置，用于确定各数据块属于哪条消息
+        received_matches = list(RECEIVED_AT_PATTERN.finditer(content))
+        message_positions = np.array([match.start() for match in received_matches], dtype=np.int64)
+        message_ns = np.array([datetime_to_ns(datetime.strptime(match.group(1), '%Y-%m-%d %H:%M:%S'))
+                               for match in received_matches], dtype=np.int64)
+        block_positions = {}  # 信号名 -> 每个数据块在文件中的位置
+        block_counts = {}  # 信号名 -> 每个数据块的采样点数
+        numeric_reports = {}  # 参数名 -> [(在文件中的位置, 数值)]
         
-        # 提取OBX段落（包含实际数据）
-        obx_segments = re.findall(r'OBX\|\d+\|([A-Z]{2})\|([\d\^]+)\^([^\^]+)\^[^\|]+\|([^\|]+)\|([^\|]+)', content)
-        
-        # 提取不同类型的信号
-        for segment_type, signal_code, signal_name, signal_id, values in obx_segments:
+        # 提取不同类型的信号（OBX段落包含实际数据）
+        for obx_match in OBX_PATTERN.finditer(content):
+            segment_type, signal_code, signal_name, signal_id, values = obx_match.groups()
             # 处理NA类型（波形数据）
             if segment_type == 'NA':
                 # 提取波形数据值
@@ -61,14 +71,12 @@ class OximeterDataAnalyzer:
                         # 存储波形数据
                         if signal_name not in self.signals:
                             self.signals[signal_name] = []
-                            self.timestamps[signal_name] = []
+                            block_positions[signal_name] = []
+                            block_counts[signal_name] = []
                         
                         self.signals[signal_name].extend(data_values)
-                        
-                        # 如果有时间戳，则与数据关联
-                        if all_timestamps:
-                            timestamp = all_timestamps[0]  # 使用当前数据块的时间戳
-                            self.timestamps[signal_name].append(timestamp)
+                        block_positions[signal_name].append(obx_match.start())
+                        block_counts[signal_name].append(len(data_values))
                     except Exception as e:
                         print(f"解析'{signal_name}'信号数据时出错: {str(e)}")
             
@@ -95,26 +103,27 @@ class OximeterDataAnalyzer:
                     try:
                         value = float(values)
                         self.discrete_params[signal_name] = value
+                        numeric_reports.setdefault(signal_name, []).append((obx_match.start(), value))
                     except (ValueError, TypeError):
                         print(f"无法解析'{signal_name}'的值: {values}")
         
         # 检查并设置默认采样率
-        default_sampling_rates = {
-            'ECG': 500,
-            'PLETH': 60,
-            'IMPED': 256
-        }
-        
         for signal_name in self.signals.keys():
             if signal_name not in self.sampling_rates:
                 # 根据信号名称设置默认采样率
-                for signal_type, rate in default_sampling_rates.items():
-                    if signal_type in signal_name:
-                        self.sampling_rates[signal_name] = rate
-                        break
-                else:
-                    # 如果没有匹配的信号类型，使用通用默认值
-                    self.sampling_rates[signal_name] = 100
+                self.sampling_rates[signal_name] = default_sampling_rate(signal_name)
+        
+        # 离散参数每次上报的时间取其所在消息的接收时间
+        for signal_name, reports in (numeric_reports.items() if len(message_ns) else []):
+            positions, values = zip(*reports)
+            message_index = np.maximum(np.searchsorted(message_positions, positions, side='right') - 1, 0)
+            self.numeric_series[signal_name] = (message_ns[message_index], np.array(values, dtype=np.float64))
+        
+        # 重建每个采样点的时间戳
+        for signal_name in self.signals.keys():
+            self.timestamps[signal_name], self.timing_segments[signal_name] = self.reconstruct_timestamps(
+                message_positions, message_ns, block_positions[signal_name], block_counts[signal_name],
+                self.sampling_rates[signal_name])
         
         # 检查是否成功解析到数据
         if not self.signals:
@@ -123,7 +132,37 @@ class OximeterDataAnalyzer:
             print(f"成功解析到 {len(self.signals)} 种信号:")
             for signal_name, data in self.signals.items():
                 sampling_rate = self.sampling_rates.get(signal_name, "未知")
-                print(f"  - {signal_name}: {len(data)} 个采样点, 采样率: {sampling_rate} Hz")
+                segments = self.timing_segments.get(signal_name)
+                timing = ""
+                if segments:
+                    measured = sum(s['rate_hz'] * (s['end_sample'] - s['start_sample']) for s in segments) / len(data)
+                    timing = f"（实测 {measured:.2f} Hz, {len(segments)} 段连续数据）"
+                print(f"  - {signal_name}: {len(data)} 个采样点, 采样率: {sampling_rate} Hz{timing}")
+    
+    @staticmethod
+    def reconstruct_timestamps(message_positions, message_ns, positions, counts, sampling_rate):
+        """由消息接收时间重建一个信号每个采样点的时间戳
+        
+        Args:
+            message_positions: 各条消息"Received at"行在文件中的位置
+            message_ns: 各条消息的接收时间（纳秒）
+            positions: 该信号各数据块在文件中的位置
+            counts: 各数据块的采样点数
+            sampling_rate: 标称采样率
+        
+        Returns:
+            tuple: (int64纳秒时间戳数组, 连续段列表)，文件中没有接收时间时为空
+        """
+        if len(message_ns) == 0:
+            return np.empty(0, dtype=np.int64), []
+        # 数据块归属于其前面最近的一条消息，同一消息中的数据块合并
+        message_index = np.searchsorted(message_positions, positions, side='right') - 1
+        message_index = np.maximum(message_index, 0)
+        block_messages, first_blocks = np.unique(message_index, return_index=True)
+        merged_counts = np.add.reduceat(np.asarray(counts, dtype=np.int64), first_blocks)
+        # "Received at"只精确到秒
+        return reconstruct_sample_times(message_ns[block_messages], merged_counts, sampling_rate,
+                                        resolution_ns=10**9)
     
     def get_parent_signal(self, signal_id):
         """从信号ID中提取父信号名称"""
@@ -138,12 +177,99 @@ class OximeterDataAnalyzer:
                     return signal_name
         return None
     
+    def analyze_heart_rate(self):
+        """对每个ECG导联检测R波，计算逐搏心率和心率变异性（结果见self.heart_rate）"""
+        from analysis.ecg import analyze_ecg
+        
+        self.heart_rate = {}
+        for signal_name, data in self.signals.items():
+            if 'ECG' not in signal_name:
+                continue
+            result = analyze_ecg(np.asarray(data, dtype=np.float64), self.sampling_rates.get(signal_name, 500),
+                                 self.timestamps.get(signal_name))
+            self.heart_rate[signal_name] = result
+            print(f"  - {signal_name}: {result['beats']} 个R波, 平均心率 {result['mean_rate']:.1f} 次/分, "
+                  f"SDNN {result['sdnn_ms']:.1f} ms, RMSSD {result['rmssd_ms']:.1f} ms")
+        return self.heart_rate
+    
+    def analyze_pulse_rate(self):
+        """对每个PLETH通道检测脉搏，计算逐搏脉率和脉搏幅度，并与监护仪上报的脉率比较（结果见self.pulse_rate）"""
+        from analysis.pleth import analyze_pleth, compare_pulse_rate
+        
+        self.pulse_rate = {}
+        reference = self.numeric_series.get('MDC_PULS_OXIM_PULS_RATE')
+        for signal_name, data in self.signals.items():
+            if 'PLETH' not in signal_name:
+                continue
+            result = analyze_pleth(np.asarray(data, dtype=np.float64), self.sampling_rates.get(signal_name, 60),
+                                   self.timestamps.get(signal_name))
+            result['reference'] = compare_pulse_rate(result, *reference) if reference else None
+            self.pulse_rate[signal_name] = result
+            summary = f"  - {signal_name}: {result['beats']} 次脉搏, 平均脉率 {result['mean_rate']:.1f} 次/分"
+            if result['reference']:
+                summary += (f", 与监护仪脉率相差 {result['reference']['bias']:+.1f} 次/分"
+                            f"（平均绝对误差 {result['reference']['mae']:.1f}）")
+            print(summary)
+        return self.pulse_rate
+    
+    def analyze_spectra(self, signal_names=None):
+        """对PLETH、胸阻抗和视频rPPG曲线计算滑动窗口频谱的心率/呼吸率曲线（结果见self.spectral_tracks）
+        
+        Args:
+            signal_names: 要计算的信号，None表示按SPECTRAL_TRACKS中的信号类型自动选择；
+                          指定的信号不属于这些类型时计算心率曲线
+        """
+        from analysis.spectral import heart_rate_track, respiration_rate_track
+        
+        track_functions = {'HR': heart_rate_track, 'RR': respiration_rate_track}
+        self.spectral_tracks = {}
+        for signal_name, data in self.signals.items():
+            if signal_names is not None and signal_name not in signal_names:
+                continue
+            kinds = next((kinds for signal_type, kinds in SPECTRAL_TRACKS.items() if signal_type in signal_name),
+                         ('HR',) if signal_names is not None else ())
+            if not kinds:
+                continue
+            values = np.asarray(data, dtype=np.float64)
+            sampling_rate = self.sampling_rates.get(signal_name, default_sampling_rate(signal_name))
+            self.spectral_tracks[signal_name] = {
+                kind: track_functions[kind](values, sampling_rate, timestamps=self.timestamps.get(signal_name))
+                for kind in kinds
+            }
+            for kind, track in self.spectral_tracks[signal_name].items():
+                label = '心率' if kind == 'HR' else '呼吸率'
+                rate = np.nanmedian(track['rate']) if np.isfinite(track['rate']).any() else float('nan')
+                print(f"  - {signal_name}: 频谱{label}中位数 {rate:.1f} 次/分（{len(track['rate'])} 个窗口）")
+        return self.spectral_tracks
+    
+    def add_video_traces(self, traces):
+        """把视频提取的逐帧R/G/B曲线作为信号加入，与血氧仪通道一起显示和导出
+        
+        Args:
+            traces: analysis.rppg.extract_rgb_traces的结果
+        """
+        from analysis.rppg import measured_fps
+        
+        for camera_id, trace in sorted(traces.items()):
+            fps = measured_fps(trace)
+            for channel in ("r", "g", "b"):
+                signal_name = f"rPPG_camera{camera_id}_{channel.upper()}"
+                self.signals[signal_name] = trace[channel].tolist()
+                # 逐帧墙上时钟，缺失的帧为-1
+                self.timestamps[signal_name] = trace["wall_clock_ns"].astype(np.int64)
+                self.sampling_rates[signal_name] = round(fps)
+        
     def visualize_waveforms(self):
         """可视化波形数据"""
         if not self.signals:
             print("无数据可供可视化")
             return
         
+        import matplotlib
+        import matplotlib.pyplot as plt
+        from matplotlib.gridspec import GridSpec
+        setup_chinese_fonts()
+        
         # 将信号分类
         ecg_signals = {k: v for k, v in self.signals.items() if 'ECG' in k}
         pleth_signals = {k: v for k, v in self.signals.items() if 'PLETH' in k}
@@ -247,6 +373,8 @@ class OximeterDataAnalyzer:
             print("无数据可供导出")
             return
         
+        import pandas as pd
+        
         # 创建安全的文件名（移除特殊字符）
         base_name = os.path.basename(self.input_file)
         base_name = base_name.replace(',', '_').replace(' ', '_')
@@ -316,6 +444,18 @@ class OximeterDataAnalyzer:
                 worksheet = writer.sheets[sheet_name]
                 worksheet.set_column(0, len(reshaped_data), 12)
             
+            # 导出由ECG计算的逐搏心率和心率变异性
+            if self.heart_rate:
+                self._export_heart_rate(writer)
+            
+            # 导出由PLETH计算的逐搏脉率和脉搏幅度
+            if self.pulse_rate:
+                self._export_pulse_rate(writer)
+            
+            # 导出滑动窗口频谱估计的心率/呼吸率曲线
+            if self.spectral_tracks:
+                self._export_spectral_tracks(writer)
+            
             # 导出离散参数
             if self.discrete_params:
                 # 创建DataFrame
@@ -355,6 +495,105 @@ class OximeterDataAnalyzer:
         except Exception as e:
             print(f"导出Excel时出错: {str(e)}")
             return None
+    
+    def _export_heart_rate(self, writer):
+        """把逐搏心率写入“逐搏心率”表，心率变异性汇总写入“心率变异性”表"""
+        import pandas as pd
+        
+        beats = []
+        for signal_name, result in self.heart_rate.items():
+            if result['beats'] < 2:
+                continue
+            beat_frame = pd.DataFrame({
+                '信号': signal_name,
+                'R波时间(秒)': result['beat_seconds'][1:],
+                'RR间期(ms)': result['rr'] * 1000,
+                '心率(次/分)': result['heart_rate'],
+                '有效': result['rr_valid']
+            })
+            if result['beat_ns'] is not None:
+                beat_frame.insert(2, 'R波时间', pd.to_datetime(result['beat_ns'][1:], unit='ns', utc=True)
+                                  .tz_convert(datetime.now().astimezone().tzinfo).tz_localize(None))
+            beats.append(beat_frame)
+        if beats:
+            pd.concat(beats, ignore_index=True).to_excel(writer, sheet_name='逐搏心率', index=False)
+            writer.sheets['逐搏心率'].set_column(0, 6, 18)
+        
+        summary = pd.DataFrame([{
+            '信号': signal_name,
+            'R波数': result['beats'],
+            '平均心率(次/分)': result['mean_rate'],
+            'SDNN(ms)': result['sdnn_ms'],
+            'RMSSD(ms)': result['rmssd_ms'],
+            'pNN50(%)': result['pnn50']
+        } for signal_name, result in self.heart_rate.items()])
+        summary.to_excel(writer, sheet_name='心率变异性', index=False)
+        writer.sheets['心率变异性'].set_column(0, 5, 18)
+    
+    def _export_pulse_rate(self, writer):
+        """把逐搏脉率和幅度写入“逐搏脉率”表，各通道汇总及与监护仪脉率的比较写入“脉率统计”表"""
+        import pandas as pd
+        
+        pulses = []
+        for signal_name, result in self.pulse_rate.items():
+            if result['beats'] < 2:
+                continue
+            pulse_frame = pd.DataFrame({
+                '信号': signal_name,
+                '脉搏起点时间(秒)': result['beat_seconds'][1:],
+                '间期(ms)': result['intervals'] * 1000,
+                '脉率(次/分)': result['pulse_rate'],
+                '脉搏幅度': result['amplitude'][1:],
+                '有效': result['valid']
+            })
+            if result['beat_ns'] is not None:
+                pulse_frame.insert(2, '脉搏起点时间', pd.to_datetime(result['beat_ns'][1:], unit='ns', utc=True)
+                                   .tz_convert(datetime.now().astimezone().tzinfo).tz_localize(None))
+            pulses.append(pulse_frame)
+        if pulses:
+            pd.concat(pulses, ignore_index=True).to_excel(writer, sheet_name='逐搏脉率', index=False)
+            writer.sheets['逐搏脉率'].set_column(0, 6, 18)
+        
+        no_reference = {'pairs': 0, 'bias': np.nan, 'mae': np.nan, 'correlation': np.nan}
+        summary = pd.DataFrame([{
+            '信号': signal_name,
+            '脉搏数': result['beats'],
+            '平均脉率(次/分)': result['mean_rate'],
+            '脉搏幅度中位数': result['mean_amplitude'],
+            '与监护仪比较次数': (result['reference'] or no_reference)['pairs'],
+            '与监护仪脉率偏差(次/分)': (result['reference'] or no_reference)['bias'],
+            '平均绝对误差(次/分)': (result['reference'] or no_reference)['mae'],
+            '相关系数': (result['reference'] or no_reference)['correlation']
+        } for signal_name, result in self.pulse_rate.items()])
+        summary.to_excel(writer, sheet_name='脉率统计', index=False)
+        writer.sheets['脉率统计'].set_column(0, 7, 18)
+    
+    def _export_spectral_tracks(self, writer):
+        """把各通道滑动窗口的主频率、速率和可信度写入“频谱估计”表"""
+        import pandas as pd
+        
+        frames = []
+        for signal_name, tracks in self.spectral_tracks.items():
+            for kind, track in tracks.items():
+                if not len(track['rate']):
+                    continue
+                frame = pd.DataFrame({
+                    '信号': signal_name,
+                    '类型': '心率' if kind == 'HR' else '呼吸率',
+                    '窗口中心(秒)': track['seconds'],
+                    '主频率(Hz)': track['frequency_hz'],
+                    '速率(次/分)': track['rate'],
+                    '可信度': track['quality']
+                })
+                if track['timestamps_ns'] is not None:
+                    # 时间戳未知（<0）处留空
+                    timestamps_ns = np.where(track['timestamps_ns'] >= 0, track['timestamps_ns'], np.nan)
+                    frame.insert(3, '窗口中心时间', pd.to_datetime(timestamps_ns, unit='ns', utc=True)
+                                 .tz_convert(datetime.now().astimezone().tzinfo).tz_localize(None))
+                frames.append(frame)
+        if frames:
+            pd.concat(frames, ignore_index=True).to_excel(writer, sheet_name='频谱估计', index=False)
+            writer.sheets['频谱估计'].set_column(0, 6, 18)
 
 
 def main():
@@ -373,6 +612,15 @@ def main():
     # 解析文件
     analyzer.parse_file()
     
+    # 由ECG波形计算心率
+    analyzer.analyze_heart_rate()
+    
+    # 由PLETH波形计算脉率
+    analyzer.analyze_pulse_rate()
+    
+    # 滑动窗口频谱估计心率/呼吸率
+    analyzer.analyze_spectra()
+    
     # 可视化波形
     analyzer.visualize_waveforms()
     
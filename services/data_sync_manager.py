@@ -1,38 +1,247 @@
 import os
+import re
 import json
+import time
 import datetime
-import watchdog.observers
-import watchdog.events
+import threading
+from collections import deque
 from utils.helpers import get_beijing_time, get_timestamp
+from services.hl7_stream import FileTailer, HL7MessageSplitter, parse_hl7_message
+from services.sync_log import SyncLogWriter, iter_sync_log
+from workers.frame_counter import snapshot_recorders
+
+# 轮询数据文件的间隔（秒）：文件系统事件可用时作为兜底，不可用时为唯一的读取方式
+POLL_INTERVAL = 0.5
+POLL_INTERVAL_FALLBACK = 0.1
+# 消息之间没有空行时，最后一条消息在该时长（秒）内没有新行即视为完整
+MESSAGE_IDLE_SECONDS = 0.5
+# 内存中保留的最近同步记录数，完整记录写入同步日志
+RECENT_RECORDS = 200
+
+
+def device_name_for_path(path):
+    """由数据文件或目录路径生成设备名（用于同步日志文件名）"""
+    name = os.path.splitext(os.path.basename(os.path.normpath(path)))[0]
+    return re.sub(r"[^\w\-]+", "_", name).strip("_") or "device"
+
+
+def device_log_path(log_path, device_name, device_count):
+    """设备的同步日志路径：只有一个设备时即为log_path，多个设备时在文件名后加设备名"""
+    if device_count <= 1:
+        return log_path
+    stem, ext = os.path.splitext(log_path)
+    return f"{stem}_{device_name}{ext or '.jsonl'}"
+
+
+class DeviceStream:
+    """一个设备的数据流：跟随读取该设备的数据文件（或目录），增量解析消息并写入各自的同步日志
+    
+    每个设备有独立的读取线程，文件系统事件只负责唤醒对应设备的线程，一个设备的文件
+    读取或解析较慢时不会耽误其他设备。
+    """
+    
+    def __init__(self, name, data_path, on_message):
+        """初始化设备数据流
+        
+        Args:
+            name: 设备名
+            data_path: 数据文件或目录路径
+            on_message: 消息回调 on_message(device, file_path, message, arrival_ns)，返回同步记录或None
+        """
+        self.name = name
+        self.data_path = data_path
+        self.on_message = on_message
+        self.message_count = 0  # 监控期间解析到的消息数
+        self.record_count = 0  # 写入的同步记录数
+        self.sync_log = None
+        self.log_path = None
+        self._tails = {}  # 正在跟随读取的文件 {路径: (FileTailer, HL7MessageSplitter)}
+        self._lock = threading.Lock()
+        self._wake_event = threading.Event()
+        self._stop_event = threading.Event()
+        self._thread = None
+        
+    def data_files(self):
+        """需要跟随读取的文件：数据文件本身，或数据目录下的所有文件"""
+        if os.path.isfile(self.data_path):
+            return [os.path.normpath(self.data_path)]
+        if os.path.isdir(self.data_path):
+            return [os.path.normpath(entry.path) for entry in os.scandir(self.data_path) if entry.is_file()]
+        return []
+        
+    def watch_directory(self):
+        """文件系统事件需要监控的目录"""
+        if os.path.isfile(self.data_path):
+            return os.path.normpath(os.path.dirname(os.path.abspath(self.data_path)))
+        return os.path.normpath(os.path.abspath(self.data_path))
+        
+    def owns(self, file_path):
+        """文件是否属于该设备"""
+        if os.path.isfile(self.data_path):
+            return file_path == os.path.normpath(os.path.abspath(self.data_path))
+        return os.path.dirname(file_path) == os.path.normpath(os.path.abspath(self.data_path))
+        
+    def start(self, log_path=None, header=None, poll_interval=POLL_INTERVAL):
+        """从各文件当前末尾开始跟随读取，并启动读取线程
+        
+        Args:
+            log_path: 同步日志路径，None表示不写日志
+            header: 同步日志文件头的附加信息
+            poll_interval: 没有文件系统事件时的轮询间隔（秒）
+        """
+        if log_path:
+            self.sync_log = SyncLogWriter(log_path, header=header)
+            self.log_path = log_path
+        with self._lock:
+            self._tails = {path: (FileTailer(path, from_end=True), HL7MessageSplitter())
+                           for path in self.data_files()}
+        self.message_count = 0
+        self.record_count = 0
+        self._stop_event.clear()
+        self._wake_event.clear()
+        self._thread = threading.Thread(target=self._run, args=(poll_interval,), daemon=True,
+                                        name=f"DeviceStream-{self.name}")
+        self._thread.start()
+        
+    def wake(self):
+        """有文件变化时唤醒读取线程（在watchdog线程中调用，不做任何读取）"""
+        self._wake_event.set()
+        
+    def stop(self):
+        """停止读取线程，读取最后追加的内容并关闭同步日志"""
+        if self._thread is not None:
+            self._stop_event.set()
+            self._wake_event.set()
+            self._thread.join()
+            self._thread = None
+            for path in self.data_files():
+                self._read_file(path)
+            self._flush_idle_messages(idle_ns=0)
+        if self.sync_log is not None:
+            self.sync_log.close()
+            self.sync_log = None
+            print(f"同步日志已保存至: {self.log_path}（{self.record_count} 条记录）")
+        
+    def _run(self, poll_interval):
+        """读取线程：被文件事件唤醒或轮询超时后读取追加内容，并结束空闲的最后一条消息"""
+        while not self._stop_event.is_set():
+            self._wake_event.wait(poll_interval)
+            self._wake_event.clear()
+            if self._stop_event.is_set():
+                break
+            for path in self.data_files():
+                self._read_file(path)
+            self._flush_idle_messages(int(MESSAGE_IDLE_SECONDS * 1e9))
+            sync_log = self.sync_log
+            if sync_log is not None:
+                sync_log.flush_if_due()
+        
+    def _read_file(self, file_path):
+        """读取文件新追加的内容，逐条记录其中已完整的消息"""
+        with self._lock:
+            tail = self._tails.get(file_path)
+            if tail is None:
+                # 监控开始后新出现的文件从头读取
+                tail = self._tails[file_path] = (FileTailer(file_path, from_end=False), HL7MessageSplitter())
+            tailer, splitter = tail
+            text, restarted = tailer.read()
+            arrival_ns = time.monotonic_ns()
+            if restarted:
+                print(f"数据文件被截断或替换，从头读取: {file_path}")
+                for message, message_arrival_ns in splitter.flush():
+                    self._record_message(file_path, message, message_arrival_ns)
+                splitter.reset()
+            for message, message_arrival_ns in splitter.feed(text, arrival_ns):
+                self._record_message(file_path, message, message_arrival_ns)
+        
+    def _flush_idle_messages(self, idle_ns):
+        with self._lock:
+            now_ns = time.monotonic_ns()
+            for file_path, (_, splitter) in self._tails.items():
+                for message, arrival_ns in splitter.flush_idle(now_ns, idle_ns):
+                    self._record_message(file_path, message, arrival_ns)
+        
+    def _record_message(self, file_path, message, arrival_ns):
+        self.message_count += 1
+        sync_record = self.on_message(self, file_path, message, arrival_ns)
+        if sync_record is None:
+            return
+        self.record_count += 1
+        if self.sync_log is not None:
+            self.sync_log.append(sync_record)
+
 
 class DataSyncManager:
     """生理数据与视频同步管理器
     
-    负责监控生理数据文件变化并与视频录制同步
+    可同时跟随多个设备（如监护仪和独立的血氧仪）的数据文件或目录，逐条解析HL7消息，
+    并为每条消息记录到达时刻（单调时钟）及各摄像头当时的帧数。所有设备共用一个文件
+    系统事件观察者，事件只唤醒对应设备的读取线程；每个设备有独立的增量解析器和同步
+    日志，后台轮询兜底，在事件不可靠的文件系统（网络盘等）上同样可用。内存中只保留
+    最近的记录。
     """
     
     def __init__(self, data_path=None):
         """初始化同步管理器
         
         Args:
-            data_path: 生理数据文件或目录路径
+            data_path: 生理数据文件或目录路径（单个设备）
         """
-        self.data_path = data_path
+        self.devices = {}  # 设备名 -> 数据文件或目录路径
+        self.streams = {}  # 监控中的设备数据流 {设备名: DeviceStream}
         self.is_monitoring = False
         self.observer = None
-        self.sync_records = []  # 记录同步数据 [{'timestamp': ..., 'video_frames': {...}, 'data_event': ...}]
+        self.sync_records = deque(maxlen=RECENT_RECORDS)  # 最近的同步记录 [{'timestamp': ..., 'video_frames': {...}, 'data_event': ...}]
         self.recorders = {}  # 记录关联的VideoRecorder实例 {camera_id: recorder}
-        self._last_event_time = None
-        self._last_event_path = None
-        self._debounce_interval = datetime.timedelta(milliseconds=100)  # 100毫秒去抖动间隔
+        self.polling_only = False  # 文件系统事件不可用，仅靠轮询读取
+        if data_path:
+            self.set_data_path(data_path)
+        
+    @property
+    def data_path(self):
+        """第一个设备的数据路径（兼容单设备用法）"""
+        return next(iter(self.devices.values()), None)
+        
+    @property
+    def message_count(self):
+        """监控期间各设备解析到的消息总数"""
+        return sum(stream.message_count for stream in self.streams.values())
+        
+    @property
+    def record_count(self):
+        """本次监控各设备写入的同步记录总数"""
+        return sum(stream.record_count for stream in self.streams.values())
+        
+    @property
+    def log_paths(self):
+        """各设备的同步日志路径 {设备名: 路径}"""
+        return {name: stream.log_path for name, stream in self.streams.items() if stream.log_path}
         
     def set_data_path(self, path):
-        """设置需要监控的数据文件路径
+        """设置需要监控的数据文件路径（只监控这一个设备）
         
         Args:
             path: 文件或目录路径
         """
-        self.data_path = path
+        self.set_devices([path] if path else [])
+        
+    def set_devices(self, devices):
+        """设置需要监控的全部设备
+        
+        Args:
+            devices: {设备名: 文件或目录路径}，或路径列表（按文件名生成设备名）
+        """
+        if not isinstance(devices, dict):
+            named = {}
+            for path in devices:
+                name = base = device_name_for_path(path)
+                index = 2
+                while name in named:
+                    name = f"{base}_{index}"
+                    index += 1
+                named[name] = path
+            devices = named
+        self.devices = dict(devices)
         
     def add_recorder(self, camera_id, recorder):
         """添加要同步的录像机
@@ -51,114 +260,181 @@ class DataSyncManager:
         """
         if camera_id in self.recorders:
             del self.recorders[camera_id]
-            
-    def start_monitoring(self):
-        """开始监控数据文件变化"""
-        if self.is_monitoring or not self.data_path:
+        
+    def start_monitoring(self, log_path=None):
+        """开始监控各设备的数据文件变化
+        
+        已有内容不参与同步，从各文件当前末尾开始跟随读取
+        
+        Args:
+            log_path: 同步日志路径（.jsonl），多个设备时每个设备一个日志，文件名后加设备名；
+                None表示只在内存中保留最近的记录
+        
+        Returns:
+            bool: 是否成功开始监控（至少一个设备的数据路径存在）
+        """
+        if self.is_monitoring:
             return False
-            
+        devices = {name: path for name, path in self.devices.items() if os.path.exists(path)}
+        for name in self.devices.keys() - devices.keys():
+            print(f"设备 {name} 的数据路径不存在，已跳过: {self.devices[name]}")
+        if not devices:
+            return False
+        
+        self.streams = {name: DeviceStream(name, path, self._record_message) for name, path in devices.items()}
+        self.polling_only = not self._start_observer()
+        poll_interval = POLL_INTERVAL_FALLBACK if self.polling_only else POLL_INTERVAL
+        
+        started = []
+        try:
+            for name, stream in self.streams.items():
+                stream_log = device_log_path(log_path, name, len(self.streams)) if log_path else None
+                stream.start(stream_log, header={
+                    'device': name,
+                    'data_path': stream.data_path,
+                    'created_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                    'beijing_time': get_beijing_time(),
+                    'monotonic_ns': time.monotonic_ns()
+                }, poll_interval=poll_interval)
+                started.append(stream)
+        except OSError as e:
+            print(f"无法创建同步日志: {str(e)}")
+            for stream in started:
+                stream.stop()
+            self._stop_observer()
+            self.streams = {}
+            return False
+        
+        self.is_monitoring = True
+        for name, stream in self.streams.items():
+            print(f"开始监控设备 {name} 的数据文件: {stream.data_path}" + ("（轮询模式）" if self.polling_only else ""))
+        return True
+        
+    def _start_observer(self):
+        """启动所有设备共用的文件系统事件监控，失败时返回False（改用轮询）"""
         try:
+            # watchdog仅在开始监控时才导入，避免拖慢程序启动
+            import watchdog.observers
+            import watchdog.events
+            
             class FileChangeHandler(watchdog.events.FileSystemEventHandler):
                 def __init__(self, callback):
                     self.callback = callback
-                    
+                
                 def on_modified(self, event):
                     if not event.is_directory:
                         self.callback(event.src_path)
+                
+                def on_created(self, event):
+                    if not event.is_directory:
+                        self.callback(event.src_path)
+                
+                def on_moved(self, event):
+                    if not event.is_directory:
+                        self.callback(event.dest_path)
             
             # 创建观察者和处理器
             self.observer = watchdog.observers.Observer()
+            handler = FileChangeHandler(self._on_data_file_changed)
             
-            # 确定监控目标（文件或目录）
-            target_path = self.data_path
-            if os.path.isfile(self.data_path):
-                # 如果是文件，监控其父目录
-                target_path = os.path.dirname(self.data_path)
-                
-            # 设置监控
-            self.observer.schedule(
-                FileChangeHandler(self._on_data_file_changed),
-                target_path,
-                recursive=False
-            )
+            # 每个被监控的目录只注册一次（多个设备的文件可能在同一目录）
+            for target_path in {stream.watch_directory() for stream in self.streams.values()}:
+                self.observer.schedule(handler, target_path, recursive=False)
             
             # 开始监控
             self.observer.start()
-            self.is_monitoring = True
-            print(f"开始监控数据文件: {self.data_path}")
             return True
-            
+        
         except Exception as e:
-            print(f"启动文件监控失败: {str(e)}")
+            print(f"启动文件监控失败，改用轮询: {str(e)}")
+            self.observer = None
             return False
-    
-    def stop_monitoring(self):
-        """停止监控数据文件变化"""
+        
+    def _stop_observer(self):
         if self.observer:
             self.observer.stop()
             self.observer.join()
             self.observer = None
+        
+    def stop_monitoring(self):
+        """停止监控数据文件变化"""
+        self._stop_observer()
+        for stream in self.streams.values():
+            stream.stop()
+        if self.is_monitoring:
+            print("已停止文件监控")
         self.is_monitoring = False
-        print("已停止文件监控")
-    
+        
     def _on_data_file_changed(self, file_path):
-        """当数据文件变化时的回调
+        """当数据文件变化时的回调（在watchdog线程中调用），唤醒文件所属设备的读取线程
         
         Args:
             file_path: 发生变化的文件路径
         """
-        # 检查是否是我们关心的文件
-        if os.path.isfile(self.data_path) and os.path.normpath(file_path) != os.path.normpath(self.data_path):
-            return
-            
-        # 获取当前时间戳
-        current_time = datetime.datetime.now()
-
-        # 事件去抖动处理
-        if self._last_event_time and self._last_event_path == file_path:
-            if (current_time - self._last_event_time) < self._debounce_interval:
-                # print(f"忽略重复的同步事件: {file_path}")
-                return
+        file_path = os.path.normpath(os.path.abspath(file_path))
+        for stream in self.streams.values():
+            if stream.owns(file_path):
+                stream.wake()
         
-        self._last_event_time = current_time
-        self._last_event_path = file_path
+    def _record_message(self, device, file_path, message, arrival_ns):
+        """为一条消息生成同步记录（在设备的读取线程中调用）
         
-        beijing_time = get_beijing_time()
+        Args:
+            device: 消息所属设备的DeviceStream
+            file_path: 消息所在文件
+            message: 消息文本
+            arrival_ns: 消息最后一行被读取到时的单调时钟，与录制线程的采集时钟相同
+        
+        Returns:
+            dict: 同步记录，没有正在录制的录像机时为None
+        """
+        # 一次读取所有录像机的帧计数快照（各自一致，不与录制线程争锁）
+        snapshots, snapshot_ns, snapshot_latency_ns = snapshot_recorders(self.recorders)
+        current_time = datetime.datetime.now()
         
         # 收集所有活动录像机的当前帧信息
         frames_info = {}
-        for camera_id, recorder in self.recorders.items():
-            if recorder.recording:
+        for camera_id, snapshot in snapshots.items():
+            if snapshot is not None and snapshot['recording']:
+                start_monotonic_ns = snapshot['start_monotonic_ns']
                 frames_info[str(camera_id)] = {
-                    'frame_count': recorder.frame_count,
-                    'elapsed_seconds': (current_time - recorder.start_time).total_seconds()
+                    'frame_count': snapshot['frame_count'],
+                    'capture_monotonic_ns': snapshot['capture_monotonic_ns'],
+                    'elapsed_seconds': (arrival_ns - start_monotonic_ns) / 1e9 if start_monotonic_ns is not None else 0.0
                 }
         
         # 只有在有活动录像机时才记录同步信息
-        if frames_info:
-            # 获取文件最后修改时间
-            try:
-                file_mtime = os.path.getmtime(file_path)
-                file_mtime_str = datetime.datetime.fromtimestamp(file_mtime).strftime("%Y-%m-%d %H:%M:%S.%f")[:-3]
-            except:
-                file_mtime_str = "未知"
-                
-            # 创建同步记录
-            sync_record = {
-                'timestamp': current_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-                'beijing_time': beijing_time,
-                'video_frames': frames_info,
-                'data_event': {
-                    'file': os.path.basename(file_path),
-                    'mtime': file_mtime_str
-                }
+        if not frames_info:
+            return None
+        
+        parsed = parse_hl7_message(message)
+        sync_record = {
+            'timestamp': current_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+            'beijing_time': get_beijing_time(),
+            'arrival_monotonic_ns': arrival_ns,
+            'snapshot_monotonic_ns': snapshot_ns,
+            'snapshot_latency_ns': snapshot_latency_ns,
+            'video_frames': frames_info,
+            'data_event': {
+                'device': device.name,
+                'file': os.path.basename(file_path),
+                'message_index': device.message_count - 1,
+                'received_at': parsed['received_at'],
+                'waveforms': {name: len(samples) for name, samples in parsed['waveforms'].items()},
+                'sampling_rates': parsed['sampling_rates'],
+                'samples': parsed['waveforms'],
+                'numerics': parsed['numerics']
             }
-            
-            self.sync_records.append(sync_record)
-            print(f"同步事件记录: {sync_record}")
-    
+        }
+        
+        self.sync_records.append(sync_record)
+        return sync_record
+        
     def save_sync_data(self, output_path):
-        """保存同步数据到JSON文件
+        """把同步记录导出为单个JSON文件
+        
+        同步过程中记录已逐条写入各设备的同步日志，本方法只用于导出。有同步日志时从日志
+        逐条读取全部记录（按设备依次排列），否则导出内存中最近的记录。
         
         Args:
             output_path: 输出文件路径
@@ -166,27 +442,36 @@ class DataSyncManager:
         Returns:
             bool: 保存是否成功
         """
-        if not self.sync_records:
+        if not self.record_count:
             print("没有同步记录可供保存")
             return False
-            
+        
+        log_paths = [path for path in self.log_paths.values() if os.path.exists(path)]
+        if log_paths:
+            records = (record for path in log_paths for record in iter_sync_log(path))
+        else:
+            records = iter(self.sync_records)
+        
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'sync_records': self.sync_records,
-                    'generated_at': datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                    'data_file': self.data_path
-                }, f, indent=2, ensure_ascii=False)
+                f.write('{"sync_records": [')
+                for index, record in enumerate(records):
+                    f.write((",\n" if index else "\n") + json.dumps(record, ensure_ascii=False))
+                f.write('\n],\n')
+                f.write(f'"generated_at": {json.dumps(datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"))},\n')
+                f.write(f'"data_files": {json.dumps(self.devices, ensure_ascii=False)}}}\n')
             
             print(f"同步数据已保存至: {output_path}")
             return True
         except Exception as e:
             print(f"保存同步数据失败: {str(e)}")
             return False
-    
+        
     def reset(self):
         """重置同步记录"""
-        self.sync_records = []
+        self.sync_records.clear()
+        if not self.is_monitoring:
+            self.streams = {}
         
     def __del__(self):
         """析构函数，确保停止监控"""
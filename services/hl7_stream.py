@@ -0,0 +1,190 @@
+import os
+import re
+import codecs
+import numpy as np
+
+from utils.hl7_patterns import RECEIVED_AT_PATTERN, OBX_PATTERN, default_sampling_rate
+
+# 行分隔符：HL7段以\r分隔，记录文件中也可能是\n或\r\n
+_LINE_SPLIT = re.compile(r"\r\n|\r|\n")
+# 每次读取时核对的已读末尾字节数，内容不一致说明文件被覆盖重写
+ANCHOR_BYTES = 64
+
+
+def parse_hl7_message(text):
+    """解析一条监护仪消息
+
+    Args:
+        text: 一条消息的文本（"Received at"行及其后的HL7段）
+
+    Returns:
+        dict: {'received_at': 接收时间字符串或None, 'waveforms': {信号名: 采样值列表},
+               'sampling_rates': {信号名: 采样率}, 'numerics': {参数名: 数值}, 'segments': OBX段数}
+    """
+    received_at = RECEIVED_AT_PATTERN.search(text)
+    waveforms = {}
+    waveform_ids = {}  # 信号ID -> 信号名，用于把采样率段对应到波形
+    sample_rate_segments = []
+    numerics = {}
+    # 逐段匹配，避免最后一个字段跨行吞掉下一段
+    segments = [match.groups() for match in map(OBX_PATTERN.match, _LINE_SPLIT.split(text)) if match]
+    for segment_type, _, signal_name, signal_id, values in segments:
+        if segment_type == "NA":
+            samples = [int(x) if x.strip().lstrip("-").isdigit() else np.nan for x in values.split("^")]
+            waveforms.setdefault(signal_name, []).extend(samples)
+            waveform_ids[signal_id] = signal_name
+        elif segment_type == "NM":
+            try:
+                value = float(values)
+            except ValueError:
+                continue
+            if signal_name == "MDC_ATTR_SAMP_RATE":
+                sample_rate_segments.append((signal_id, value))
+            else:
+                numerics[signal_name] = value
+
+    # 采样率段的ID是所属波形ID再加一级
+    sampling_rates = {name: default_sampling_rate(name) for name in waveforms}
+    for signal_id, rate in sample_rate_segments:
+        parent = waveform_ids.get(signal_id.rsplit(".", 1)[0])
+        if parent is not None and rate > 0:
+            sampling_rates[parent] = rate
+    return {
+        "received_at": received_at.group(1) if received_at else None,
+        "waveforms": waveforms,
+        "sampling_rates": sampling_rates,
+        "numerics": numerics,
+        "segments": len(segments),
+    }
+
+
+class HL7MessageSplitter:
+    """把逐段追加的文本切分成完整的消息
+
+    "Received at"行（或已有MSH段后出现的新MSH段）开始一条新消息，空行或下一条消息的开始
+    结束当前消息。行尾不完整的文本留到下次追加时再处理。
+    """
+
+    def __init__(self):
+        self._partial = ""  # 尚未以换行结束的文本
+        self._pending_cr = False  # 上次文本以\r结束，紧接着的\n属于同一个换行
+        self._lines = []  # 当前消息已完整的行
+        self._has_msh = False
+        self._last_arrival_ns = None  # 当前消息最后一行的到达时间
+
+    def reset(self):
+        """丢弃缓冲的内容（文件被截断或替换时调用）"""
+        self.__init__()
+
+    def flush(self):
+        """结束当前消息并返回（文件被覆盖前已写入的最后一条消息）"""
+        messages = []
+        self._complete(messages)
+        return messages
+
+    def feed(self, text, arrival_ns):
+        """追加新读取的文本
+
+        Args:
+            text: 新文本
+            arrival_ns: 读取到该文本时的单调时钟
+
+        Returns:
+            list: 已完整的消息 [(消息文本, 最后一行到达的单调时钟ns), ...]
+        """
+        messages = []
+        if not text:
+            return messages
+        if self._pending_cr and text.startswith("\n"):
+            text = text[1:]
+        text = self._partial + text
+        # 末尾的\r可能与下次读到的\n组成一个换行，记下后按行结束处理
+        self._pending_cr = text.endswith("\r")
+        lines = _LINE_SPLIT.split(text[:-1] if self._pending_cr else text)
+        self._partial = "" if self._pending_cr else lines.pop()
+
+        for line in lines:
+            line = line.strip("\x0b\x1c")
+            starts_message = line.startswith("Received at") or (line.startswith("MSH|") and self._has_msh)
+            if starts_message or not line.strip():
+                self._complete(messages)
+            if line.strip():
+                if line.startswith("MSH|"):
+                    self._has_msh = True
+                self._lines.append(line)
+                self._last_arrival_ns = arrival_ns
+        return messages
+
+    def flush_idle(self, now_ns, idle_ns):
+        """当前消息已有一段时间没有新行时视为完整（文件中消息之间没有空行时使用）"""
+        messages = []
+        if self._lines and not self._partial and now_ns - self._last_arrival_ns >= idle_ns:
+            self._complete(messages)
+        return messages
+
+    def _complete(self, messages):
+        if self._lines:
+            messages.append(("\n".join(self._lines), self._last_arrival_ns))
+        self._lines = []
+        self._has_msh = False
+
+
+class FileTailer:
+    """增量读取追加写入的文本文件，处理截断、替换和覆盖重写
+
+    每次读取时连同上次已读的最后几十个字节一起读出并核对，覆盖重写后即使文件变大
+    也能发现，避免从新内容的中间开始解析。
+    """
+
+    def __init__(self, path, from_end=True):
+        """初始化
+
+        Args:
+            path: 文件路径
+            from_end: 是否从当前文件末尾开始读取（忽略已有内容）
+        """
+        self.path = path
+        self.offset = 0
+        self._inode = None
+        self._anchor = b""  # 已读内容的最后ANCHOR_BYTES个字节
+        self._decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+        if from_end and os.path.exists(path):
+            with open(path, "rb") as file:
+                self._inode = os.fstat(file.fileno()).st_ino
+                self.offset = file.seek(0, os.SEEK_END)
+                file.seek(max(0, self.offset - ANCHOR_BYTES))
+                self._anchor = file.read(self.offset - file.tell())
+
+    def read(self):
+        """读取上次读取之后追加的文本
+
+        Returns:
+            tuple: (新文本, 文件是否已被截断或替换)
+        """
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return "", False
+        if stat.st_ino == self._inode and stat.st_size == self.offset:
+            return "", False
+
+        try:
+            with open(self.path, "rb") as file:
+                inode = os.fstat(file.fileno()).st_ino
+                restarted = inode != self._inode and self._inode is not None
+                if not restarted:
+                    file.seek(self.offset - len(self._anchor))
+                    restarted = file.read(len(self._anchor)) != self._anchor
+                if restarted:
+                    # 文件被截断、替换或覆盖重写，从头读取
+                    self.offset = 0
+                    self._anchor = b""
+                    self._decoder.reset()
+                    file.seek(0)
+                data = file.read()
+        except OSError:
+            return "", False
+        self._inode = inode
+        self.offset += len(data)
+        self._anchor = (self._anchor + data)[-ANCHOR_BYTES:]
+        return self._decoder.decode(data), restarted
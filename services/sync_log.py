@@ -0,0 +1,123 @@
+import os
+import json
+import time
+import threading
+
+# 同步日志格式版本
+SYNC_LOG_VERSION = 1
+
+
+class SyncLogWriter:
+    """只追加的JSONL同步日志
+
+    第一行是文件头，之后每行一条同步记录。记录先缓存在内存中（有上限），按时间间隔或
+    缓存满时写入文件并fsync，程序崩溃最多丢失最近一个间隔内的记录，结束时也不需要
+    一次性写出整个会话。
+    """
+
+    def __init__(self, path, header=None, flush_interval=1.0, max_buffered=256):
+        """创建日志文件并写入文件头
+
+        Args:
+            path: 日志文件路径（.jsonl）
+            header: 写入文件头的附加信息
+            flush_interval: 写入并fsync的最长间隔（秒）
+            max_buffered: 内存中最多缓存的记录数，达到后立即写入
+        """
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_buffered = max_buffered
+        self.records_written = 0
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._file = open(path, "a", encoding="utf-8")
+        self._last_flush = time.monotonic()
+        header_record = {"type": "header", "version": SYNC_LOG_VERSION, "clock": "monotonic_ns"}
+        header_record.update(header or {})
+        self._buffer.append(self._encode(header_record))
+        self.flush()
+
+    @staticmethod
+    def _encode(record):
+        return json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+
+    def append(self, record):
+        """追加一条同步记录"""
+        line = self._encode(record)
+        with self._lock:
+            self._buffer.append(line)
+            self.records_written += 1
+            full = len(self._buffer) >= self.max_buffered
+        if full:
+            self.flush()
+
+    def flush_if_due(self):
+        """距上次写入超过间隔时写入缓存的记录（由后台轮询定期调用）"""
+        if self._buffer and time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        """写入缓存的记录并fsync"""
+        with self._lock:
+            if self._file is None:
+                return
+            lines, self._buffer = self._buffer, []
+            if lines:
+                self._file.write("".join(lines))
+                self._file.flush()
+                os.fsync(self._file.fileno())
+            self._last_flush = time.monotonic()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def iter_sync_log(path):
+    """逐条读取同步日志中的记录（不含文件头）
+
+    兼容旧版一次性写出的JSON文件（{'sync_records': [...]}）。程序崩溃时最后一行可能
+    不完整，读到时直接忽略。
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            yield from json.load(f).get("sync_records", [])
+        return
+
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                print(f"同步日志中有不完整的记录，已忽略: {path}")
+                continue
+            if record.get("type") != "header":
+                yield record
+
+
+def read_sync_log(path):
+    """读取同步日志
+
+    Returns:
+        tuple: (文件头字典, 记录列表)，旧版JSON文件的文件头为其顶层的其他字段
+    """
+    if path.endswith(".json"):
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        records = data.pop("sync_records", [])
+        return data, records
+
+    header = {}
+    with open(path, "r", encoding="utf-8") as f:
+        first = f.readline()
+    if first.strip():
+        try:
+            header = json.loads(first)
+        except json.JSONDecodeError:
+            pass
+    return header, list(iter_sync_log(path))
@@ -0,0 +1,57 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+from workers.frame_ring_buffer import FrameRingBuffer
+
+
+def frame(value):
+    return np.array([value], dtype=np.uint8)
+
+
+def test_drop_oldest_does_not_overwrite_held_frame():
+    """编码线程持有槽位时缓冲区溢出，新帧不能写进被持有的槽位"""
+    buffer = FrameRingBuffer(3, (1,), policy=FrameRingBuffer.POLICY_DROP_OLDEST)
+    buffer.push(frame(0), meta=0)
+    held, meta = buffer.get(timeout=0)
+    for value in (1, 2, 3):
+        assert buffer.push(frame(value), meta=value)
+
+    assert held[0] == 0 and meta == 0
+    assert buffer.dropped_frames == 1
+    # 最旧的帧1被丢弃，剩下2、3按顺序取出
+    assert [(int(f[0]), m) for f, m in (buffer.get(timeout=0), buffer.get(timeout=0))] == [(2, 2), (3, 3)]
+    assert buffer.get(timeout=0) is None
+
+
+def test_drop_oldest_keeps_order_across_wraparound():
+    buffer = FrameRingBuffer(2, (1,), policy=FrameRingBuffer.POLICY_DROP_OLDEST)
+    received = []
+    for value in range(10):
+        buffer.push(frame(value), meta=value)
+        if value % 3 == 0:
+            item = buffer.get(timeout=0)
+            received.append((int(item[0][0]), item[1]))
+    while True:
+        item = buffer.get(timeout=0)
+        if item is None:
+            break
+        received.append((int(item[0][0]), item[1]))
+
+    assert all(value == meta for value, meta in received)
+    assert [value for value, _ in received] == sorted(value for value, _ in received)
+    assert buffer.pushed_frames - buffer.dropped_frames == len(received)
+
+
+def test_block_policy_drops_new_frame_when_full():
+    buffer = FrameRingBuffer(1, (1,), policy=FrameRingBuffer.POLICY_BLOCK, block_timeout=0.01)
+    assert buffer.push(frame(0))
+    held, _ = buffer.get(timeout=0)
+    assert not buffer.push(frame(1))
+    assert held[0] == 0 and buffer.dropped_frames == 1
+    buffer.release()
+    assert buffer.push(frame(2))
+    assert buffer.get(timeout=0)[0][0] == 2
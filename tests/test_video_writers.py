@@ -0,0 +1,36 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cv2
+import numpy as np
+import pytest
+
+from workers.video_writers import create_video_writer
+
+WIDTH, HEIGHT = 64, 48
+
+
+@pytest.mark.parametrize("is_color", [False, True])
+def test_mjpg_writes_flat_frames(tmp_path, is_color):
+    """纯黑、纯灰、纯白帧在MJPG质量100下都能写入并读回"""
+    shape = (HEIGHT, WIDTH) if not is_color else (HEIGHT, WIDTH, 3)
+    values = (0, 128, 255)
+    writer = create_video_writer("mjpg", str(tmp_path), "flat", 30, (WIDTH, HEIGHT), is_color=is_color)
+    for value in values:
+        writer.write(np.full(shape, value, dtype=np.uint8))
+    writer.release()
+
+    capture = cv2.VideoCapture(writer.output_path)
+    decoded = []
+    while True:
+        ok, frame = capture.read()
+        if not ok:
+            break
+        decoded.append(frame)
+    capture.release()
+
+    assert len(decoded) == len(values)
+    for frame, value in zip(decoded, values):
+        assert np.abs(frame.astype(np.int16) - value).max() <= 2
@@ -1,18 +1,34 @@
 import os
+import shutil
 import re
 import json
-import cv2
 import numpy as np
 
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGridLayout, QGroupBox,
                            QLabel, QPushButton, QComboBox, QLineEdit, QFileDialog,
                            QMessageBox, QSpinBox, QInputDialog, QCheckBox, QApplication)
-from PyQt5.QtCore import Qt, pyqtSlot
+from PyQt5.QtCore import Qt, QTimer, pyqtSlot
 
 from ui.camera_view import CameraView
+from ui.frame_transform_dialog import FrameTransformDialog
 from workers.video_recorder import VideoRecorder
+from workers.process_recorder import ProcessVideoRecorder
+from workers.camera_discovery import CameraDiscoveryThread, load_camera_inventory, save_camera_inventory
+from workers.sync_capture_group import SyncCaptureGroup
+from workers.recording_trigger import RecordingTrigger
+from workers.live_rppg import LiveRppgMonitor
+from workers.video_writers import (RECORDING_FORMATS, DEFAULT_RECORDING_FORMAT,
+                                   estimate_required_bandwidth, measure_disk_throughput)
 from services.data_sync_manager import DataSyncManager
-from utils.helpers import get_timestamp
+
+# 等待所有摄像头预备录制的最长时间（毫秒）
+ARM_TIMEOUT_MS = 5000
+# 停止时刻之后强制停止仍在录制的摄像头的等待时间（毫秒）
+STOP_TIMEOUT_MS = 3000
+# 所需写入带宽低于该值（MB/s）时不测量磁盘带宽
+MIN_BANDWIDTH_CHECK_MB_S = 5.0
+# 不限时长录制时，预计可录制时间低于该值（分钟）则提示
+MIN_RECORDABLE_MINUTES = 30
 
 class CameraTab(QWidget):
     """多摄像头录制选项卡"""
@@ -25,12 +41,34 @@ class CameraTab(QWidget):
         self.is_recording = False
         self.current_subject = ""
         self.recording_logs = {}
+        self.recording_trigger = None  # 当前录制共享的开始/停止触发器
+        self.arming_states = {}  # 预备中的摄像头 {camera_id: None(等待)/True/False}
+        self.pending_duration = 0
+        # 预备超时和强制停止各用一个单次定时器，预备/停止完成时取消，过期的超时不会作用到下一次录制
+        self.arming_timer = QTimer(self)
+        self.arming_timer.setSingleShot(True)
+        self.arming_timer.timeout.connect(self.handle_arming_timeout)
+        self.stop_timer = QTimer(self)
+        self.stop_timer.setSingleShot(True)
+        self.stop_timer.timeout.connect(self.force_stop_recording)
+        self.disk_throughput_cache = {}  # 各输出目录实测的磁盘写入带宽 {目录: MB/s}
+        self.camera_inventory = {}  # 已知摄像头信息 {camera_id: info}
+        self.discovery_thread = None  # 后台摄像头探测线程
+        self.rppg_monitor = None  # 实时rPPG分析，开启时创建
         
         # 创建数据同步管理器
         self.data_sync_manager = DataSyncManager()
+        
+        # 多摄像头同步采集组
+        self.sync_capture_group = SyncCaptureGroup()
 
         self.setup_ui()
         
+        # 先用上次缓存的摄像头清单填充列表，无需等待扫描
+        for info in load_camera_inventory():
+            self.camera_inventory[info["index"]] = info
+            self.add_camera_item(info)
+        
         # 确保输出目录存在
         output_dir = self.output_dir_edit.text()
         if not os.path.exists(output_dir):
@@ -88,7 +126,7 @@ class CameraTab(QWidget):
         
         # 数据文件选择
         self.data_file_edit = QLineEdit()
-        self.data_file_edit.setPlaceholderText("选择生理数据文件...")
+        self.data_file_edit.setPlaceholderText("选择生理数据文件，多个设备用;分隔...")
         self.data_file_edit.setEnabled(False)
         
         self.browse_data_button = QPushButton("浏览...")
@@ -129,9 +167,76 @@ class CameraTab(QWidget):
         self.fps_combo.addItem("60 FPS", 60)
         self.fps_layout.addWidget(self.fps_combo)
         
+        # 录制格式选择（rPPG等分析需要无损或原始帧）
+        self.format_layout = QHBoxLayout()
+        self.format_layout.addWidget(QLabel("录制格式:"))
+        self.format_combo = QComboBox()
+        for format_key, spec in RECORDING_FORMATS.items():
+            self.format_combo.addItem(spec["label"], format_key)
+        self.format_combo.setCurrentIndex(self.format_combo.findData(DEFAULT_RECORDING_FORMAT))
+        self.format_combo.setToolTip("无损和原始帧格式画质不受压缩影响，但需要更高的磁盘写入带宽")
+        self.format_layout.addWidget(self.format_combo)
+        
+        # 分段录制：按时长或大小切换到新的视频文件，崩溃时只损失当前分段
+        self.segment_layout = QHBoxLayout()
+        self.segment_layout.addWidget(QLabel("分段:"))
+        self.segment_minutes_spinbox = QSpinBox()
+        self.segment_minutes_spinbox.setRange(0, 120)
+        self.segment_minutes_spinbox.setSuffix(" 分钟")
+        self.segment_minutes_spinbox.setSpecialValueText("不按时长")
+        self.segment_minutes_spinbox.setToolTip("每段视频的时长，0表示不按时长分段")
+        self.segment_layout.addWidget(self.segment_minutes_spinbox)
+        self.segment_mb_spinbox = QSpinBox()
+        self.segment_mb_spinbox.setRange(0, 100000)
+        self.segment_mb_spinbox.setSingleStep(500)
+        self.segment_mb_spinbox.setSuffix(" MB")
+        self.segment_mb_spinbox.setSpecialValueText("不按大小")
+        self.segment_mb_spinbox.setToolTip("每段视频的大小上限，0表示不按大小分段")
+        self.segment_layout.addWidget(self.segment_mb_spinbox)
+        
+        # 预览帧率选择（只影响界面显示，不影响录制）
+        self.preview_fps_layout = QHBoxLayout()
+        self.preview_fps_layout.addWidget(QLabel("预览帧率:"))
+        self.preview_fps_combo = QComboBox()
+        self.preview_fps_combo.addItem("10 FPS", 10)
+        self.preview_fps_combo.addItem("15 FPS", 15)
+        self.preview_fps_combo.addItem("30 FPS", 30)
+        self.preview_fps_combo.setCurrentIndex(1)
+        self.preview_fps_combo.currentIndexChanged.connect(self.update_preview_fps)
+        self.preview_fps_layout.addWidget(self.preview_fps_combo)
+        
+        # 时间轴校正：按实际采集时间补帧/丢帧，使视频时长与真实时间一致
+        self.timeline_checkbox = QCheckBox("按实际时间校正帧")
+        self.timeline_checkbox.setToolTip("采集帧率低于设定值时重复写入帧，高于设定值时丢弃多余帧")
+        
+        # 多摄像头同步采集：所有摄像头在同一节拍grab，并记录摄像头间的采集偏差
+        self.sync_capture_checkbox = QCheckBox("多摄像头同步采集")
+        self.sync_capture_checkbox.setToolTip("所有摄像头在同一节拍锁存帧，并记录每个节拍的摄像头间偏差")
+        self.sync_capture_checkbox.stateChanged.connect(self.toggle_sync_capture)
+        
+        # 多进程录制：之后添加的摄像头在独立进程中采集和编码，预览帧经共享内存传回
+        self.process_backend_checkbox = QCheckBox("多进程录制")
+        self.process_backend_checkbox.setToolTip("对之后添加的摄像头生效，每个摄像头使用独立进程，不参与同步采集")
+        
+        # 实时rPPG预览：在独立进程中分析各摄像头的最新帧，显示区域颜色曲线和主频
+        self.live_rppg_checkbox = QCheckBox("实时rPPG预览")
+        self.live_rppg_checkbox.setToolTip("分析录制区域（未设置时为画面中央）的颜色变化，用于在录制前判断信号是否可用")
+        self.live_rppg_checkbox.stateChanged.connect(self.toggle_live_rppg)
+        
         self.record_params_layout.addLayout(self.duration_layout)
         self.record_params_layout.addSpacing(20)
         self.record_params_layout.addLayout(self.fps_layout)
+        self.record_params_layout.addSpacing(20)
+        self.record_params_layout.addLayout(self.format_layout)
+        self.record_params_layout.addSpacing(20)
+        self.record_params_layout.addLayout(self.segment_layout)
+        self.record_params_layout.addSpacing(20)
+        self.record_params_layout.addLayout(self.preview_fps_layout)
+        self.record_params_layout.addSpacing(20)
+        self.record_params_layout.addWidget(self.timeline_checkbox)
+        self.record_params_layout.addWidget(self.sync_capture_checkbox)
+        self.record_params_layout.addWidget(self.process_backend_checkbox)
+        self.record_params_layout.addWidget(self.live_rppg_checkbox)
         self.record_params_layout.addStretch(1)
         
         # 录制控制
@@ -182,38 +287,74 @@ class CameraTab(QWidget):
         camera_layout.addWidget(self.preview_container, 1)
 
     def refresh_cameras(self):
-        """刷新可用摄像头列表"""
+        """在后台并行扫描摄像头设备，发现的设备逐个加入列表"""
+        if self.discovery_thread is not None and self.discovery_thread.isRunning():
+            return
+        
+        # 已添加的摄像头正被录制线程占用，不再探测
         self.camera_combo.clear()
         self.camera_combo.addItem("选择摄像头...")
+        for camera_id in sorted(self.camera_views):
+            if camera_id in self.camera_inventory:
+                self.add_camera_item(self.camera_inventory[camera_id])
         
         self.scan_button.setText("正在扫描...")
         self.scan_button.setEnabled(False)
-        QApplication.processEvents()
-        
-        found_cameras = 0
-        for i in range(10):
-            cap = cv2.VideoCapture(i)
-            if cap.isOpened():
-                found_cameras += 1
-                cap.release()
-                self.camera_combo.addItem(f"摄像头 #{i}")
         
+        indices = [i for i in range(10) if i not in self.camera_views]
+        self.discovery_thread = CameraDiscoveryThread(indices)
+        self.discovery_thread.camera_found.connect(self.handle_camera_found)
+        self.discovery_thread.discovery_finished.connect(self.handle_discovery_finished)
+        self.discovery_thread.start()
+    
+    def add_camera_item(self, info):
+        """按编号顺序把摄像头加入下拉列表"""
+        camera_id = info["index"]
+        if self.camera_combo.findData(camera_id) >= 0:
+            return
+        label = f"摄像头 #{camera_id}"
+        if info.get("width") and info.get("height"):
+            label += f" ({info['width']}x{info['height']})"
+        position = 1
+        while position < self.camera_combo.count() and self.camera_combo.itemData(position) < camera_id:
+            position += 1
+        self.camera_combo.insertItem(position, label, camera_id)
+    
+    @pyqtSlot(int, dict)
+    def handle_camera_found(self, camera_id, info):
+        """扫描过程中发现摄像头"""
+        self.camera_inventory[camera_id] = info
+        self.add_camera_item(info)
+    
+    @pyqtSlot(list, list)
+    def handle_discovery_finished(self, cameras, timed_out):
+        """扫描完成后更新并缓存摄像头清单"""
         self.scan_button.setText("扫描摄像头设备")
         self.scan_button.setEnabled(True)
         
+        found_ids = {info["index"] for info in cameras}
+        self.camera_inventory = {
+            camera_id: info for camera_id, info in self.camera_inventory.items()
+            if camera_id in found_ids or camera_id in self.camera_views
+        }
+        save_camera_inventory(list(self.camera_inventory.values()))
+        
+        found_cameras = len(cameras)
         if found_cameras == 0:
             QMessageBox.information(self, "提示", "未找到可用的摄像头设备")
         else:
-            QMessageBox.information(self, "提示", f"找到 {found_cameras} 个摄像头设备")
+            message = f"找到 {found_cameras} 个摄像头设备"
+            if timed_out:
+                message += f"\n以下设备探测超时: {', '.join(f'#{i}' for i in timed_out)}"
+            QMessageBox.information(self, "提示", message)
 
     def add_camera(self):
         """添加选定的摄像头到界面"""
-        camera_text = self.camera_combo.currentText()
-        if camera_text == "选择摄像头...":
+        camera_id = self.camera_combo.currentData()
+        if camera_id is None:
             QMessageBox.warning(self, "警告", "请先选择一个摄像头")
             return
         
-        camera_id = int(camera_text.split("#")[1])
         if camera_id in self.camera_views:
             QMessageBox.information(self, "提示", f"摄像头 #{camera_id} 已添加")
             return
@@ -235,10 +376,20 @@ class CameraTab(QWidget):
         fps = self.fps_combo.currentData()
         output_dir = self.output_dir_edit.text()
         
-        recorder = VideoRecorder(camera_id, output_dir, fps=fps)
+        recorder_class = ProcessVideoRecorder if self.process_backend_checkbox.isChecked() else VideoRecorder
+        recorder = recorder_class(camera_id, output_dir, fps=fps, preview_fps=self.preview_fps_combo.currentData())
+        recorder.set_preview_size(*camera_view.preview_size())
+        if self.sync_capture_checkbox.isChecked():
+            recorder.sync_group = self.sync_capture_group
         recorder.update_frame.connect(self.update_camera_frame)
         recorder.error.connect(self.handle_camera_error)
         recorder.recording_finished.connect(self.handle_recording_finished)
+        recorder.armed_changed.connect(self.handle_recorder_armed)
+        recorder.telemetry_updated.connect(self.update_camera_telemetry)
+        recorder.live_slot_changed.connect(self.handle_live_slot_changed)
+        camera_view.transform_requested.connect(self.edit_frame_transform)
+        if self.rppg_monitor is not None:
+            recorder.set_live_analysis(True, self.live_roi(recorder))
         
         self.camera_recorders[camera_id] = recorder
         recorder.start()
@@ -247,7 +398,90 @@ class CameraTab(QWidget):
     def update_camera_frame(self, frame, camera_id):
         """更新摄像头视图的帧"""
         if camera_id in self.camera_views:
-            self.camera_views[camera_id].update_frame(frame)
+            camera_view = self.camera_views[camera_id]
+            camera_view.update_frame(frame)
+            
+            # 通知录制线程本帧已显示，并同步当前显示区域大小
+            recorder = self.camera_recorders.get(camera_id)
+            if recorder is not None:
+                recorder.set_preview_size(*camera_view.preview_size())
+                recorder.preview_consumed()
+    
+    @pyqtSlot(int, dict)
+    def update_camera_telemetry(self, camera_id, stats):
+        """更新摄像头视图的遥测统计"""
+        if camera_id in self.camera_views:
+            self.camera_views[camera_id].set_telemetry(stats)
+    
+    def toggle_live_rppg(self, state):
+        """开启或关闭所有摄像头的实时rPPG预览"""
+        enabled = state == Qt.Checked
+        if enabled and self.rppg_monitor is None:
+            self.rppg_monitor = LiveRppgMonitor()
+            self.rppg_monitor.rppg_updated.connect(self.update_camera_rppg)
+            self.rppg_monitor.start()
+        
+        for recorder in self.camera_recorders.values():
+            recorder.set_live_analysis(enabled, self.live_roi(recorder))
+        
+        if not enabled and self.rppg_monitor is not None:
+            self.rppg_monitor.stop()
+            self.rppg_monitor = None
+            for camera_view in self.camera_views.values():
+                camera_view.clear_rppg()
+    
+    def live_roi(self, recorder):
+        """实时分析区域：使用录制区域的ROI，未设置时由录制线程取画面中央"""
+        transform = recorder.frame_transform
+        return transform.roi if transform is not None else None
+    
+    @pyqtSlot(int, str)
+    def handle_live_slot_changed(self, camera_id, slot_name):
+        """录制端创建或关闭交接槽后通知分析进程"""
+        if self.rppg_monitor is not None:
+            self.rppg_monitor.set_slot(camera_id, slot_name)
+    
+    @pyqtSlot(int, dict)
+    def update_camera_rppg(self, camera_id, stats):
+        """更新摄像头视图的实时rPPG结果"""
+        if camera_id in self.camera_views and self.rppg_monitor is not None:
+            self.camera_views[camera_id].set_rppg(stats)
+    
+    def edit_frame_transform(self, camera_id):
+        """设置摄像头写入前的ROI裁剪、缩放和颜色转换，下次开始录制时生效"""
+        recorder = self.camera_recorders.get(camera_id)
+        if recorder is None:
+            return
+        dialog = FrameTransformDialog(camera_id, recorder.frame_size(), recorder.frame_transform, self)
+        if dialog.exec_() != FrameTransformDialog.Accepted:
+            return
+        
+        recorder.frame_transform = dialog.transform()
+        size = recorder.recording_frame_size()
+        if recorder.frame_transform is None:
+            summary = "完整画面"
+        elif size is not None:
+            summary = f"{size[0]}x{size[1]}" + (" 灰度" if size[2] == 1 else "")
+        else:
+            summary = "已设置"
+        self.camera_views[camera_id].set_transform_summary(summary)
+        if self.rppg_monitor is not None:
+            recorder.set_live_analysis(True, self.live_roi(recorder))
+        if recorder.recording or recorder.armed:
+            QMessageBox.information(self, "提示", "录制区域将在下次开始录制时生效")
+    
+    def toggle_sync_capture(self, state):
+        """切换多摄像头同步采集"""
+        group = self.sync_capture_group if state == Qt.Checked else None
+        self.sync_capture_group.set_fps(self.fps_combo.currentData())
+        for recorder in self.camera_recorders.values():
+            recorder.sync_group = group
+    
+    def update_preview_fps(self):
+        """更新所有摄像头的预览帧率"""
+        preview_fps = self.preview_fps_combo.currentData()
+        for recorder in self.camera_recorders.values():
+            recorder.preview_fps = preview_fps
     
     @pyqtSlot(str, int)
     def handle_camera_error(self, error_msg, camera_id):
@@ -261,6 +495,7 @@ class CameraTab(QWidget):
         # 更新单个摄像头的UI状态，关闭"录制中"指示灯
         if camera_id in self.camera_views:
             self.camera_views[camera_id].set_recording(False)
+        self.data_sync_manager.remove_recorder(camera_id)
 
         if camera_id not in self.recording_logs:
             self.recording_logs[camera_id] = []
@@ -269,19 +504,16 @@ class CameraTab(QWidget):
         all_stopped = all(not r.recording for r in self.camera_recorders.values())
                 
         if all_stopped and self.is_recording:
+            self.stop_timer.stop()
             self.write_recording_logs()
             
             self.is_recording = False
             self.record_button.setEnabled(True)
             self.stop_button.setEnabled(False)
             
+            # 同步记录已逐条写入同步日志，停止监控时写入剩余记录
             if self.data_sync_manager.is_monitoring:
                 self.data_sync_manager.stop_monitoring()
-                output_dir = self.output_dir_edit.text()
-                subject_dir = os.path.join(output_dir, self.current_subject)
-                sync_file = os.path.join(subject_dir, "sync_data.json")
-                if self.data_sync_manager.sync_records and self.data_sync_manager.save_sync_data(sync_file):
-                    print(f"同步数据已保存至: {sync_file}")
             
             QMessageBox.information(self, "录制完成", f"所有摄像头录制已完成，视频和日志已保存至: {os.path.join(self.output_dir_edit.text(), self.current_subject)}")
 
@@ -304,7 +536,11 @@ class CameraTab(QWidget):
         return subject_name.strip()
     
     def start_recording(self):
-        """开始所有摄像头的录制"""
+        """开始所有摄像头的录制
+        
+        先让各录制线程预先打开写入器，全部就绪后设定统一的开始时刻，
+        所有摄像头在同一时刻之后的第一帧切换为录制状态。
+        """
         if not self.camera_recorders:
             QMessageBox.warning(self, "警告", "请先添加至少一个摄像头")
             return
@@ -326,27 +562,180 @@ class CameraTab(QWidget):
         self.recording_logs = {}
         duration = self.duration_spinbox.value()
         fps = self.fps_combo.currentData()
+        recording_format = self.format_combo.currentData()
+        
+        if not self.check_disk_space(output_dir, recording_format, fps, duration):
+            return
+        if not self.check_disk_bandwidth(output_dir, recording_format, fps):
+            return
         
         self.data_sync_manager.reset()
+        self.sync_capture_group.set_fps(fps)
+        self.sync_capture_group.reset_stats()
+        
+        # 预备阶段：写入器在各录制线程中打开，完成后通过armed_changed信号通知
+        self.stop_timer.stop()
+        self.recording_trigger = RecordingTrigger()
+        self.arming_states = {}
+        self.pending_duration = duration
         for camera_id, recorder in self.camera_recorders.items():
             recorder.custom_fps = fps
-            if recorder.start_recording(duration=duration, subject_name=subject_name):
-                self.camera_views[camera_id].set_recording(True)
-                self.data_sync_manager.add_recorder(camera_id, recorder)
+            recorder.timeline_correction = self.timeline_checkbox.isChecked()
+            recorder.recording_format = recording_format
+            recorder.segment_seconds = self.segment_minutes_spinbox.value() * 60
+            recorder.segment_mb = self.segment_mb_spinbox.value()
+            if recorder.arm(duration=duration, subject_name=subject_name, trigger=self.recording_trigger):
+                self.arming_states[camera_id] = None
+        
+        if not self.arming_states:
+            QMessageBox.warning(self, "警告", "没有可以开始录制的摄像头")
+            return
         
-        self.is_recording = True
         self.record_button.setEnabled(False)
+        self.record_button.setText("正在准备...")
+        self.arming_timer.start(ARM_TIMEOUT_MS)
+    
+    def check_disk_space(self, output_dir, recording_format, fps, duration):
+        """按所选格式估算录制所需的磁盘空间，与输出目录所在磁盘的剩余空间比较
+        
+        Returns:
+            bool: 是否继续录制
+        """
+        frame_sizes = [size for size in (recorder.recording_frame_size() for recorder in self.camera_recorders.values()) if size]
+        required_mb_s = estimate_required_bandwidth(recording_format, frame_sizes, fps)
+        if required_mb_s <= 0:
+            return True
+        try:
+            free_mb = shutil.disk_usage(output_dir).free / 1e6
+        except OSError as e:
+            print(f"无法获取磁盘剩余空间: {str(e)}")
+            return True
+        
+        recordable_minutes = free_mb / required_mb_s / 60
+        print(f"磁盘剩余空间: {free_mb / 1e3:.1f} GB，预计可录制 {recordable_minutes:.0f} 分钟")
+        if duration > 0:
+            if recordable_minutes >= duration:
+                return True
+            message = (f"录制 {duration} 分钟预计需要约 {required_mb_s * duration * 60 / 1e3:.1f} GB，"
+                       f"但磁盘剩余空间仅 {free_mb / 1e3:.1f} GB（约可录制 {recordable_minutes:.0f} 分钟）。")
+        else:
+            if recordable_minutes >= MIN_RECORDABLE_MINUTES:
+                return True
+            message = f"磁盘剩余空间仅 {free_mb / 1e3:.1f} GB，按当前格式约可录制 {recordable_minutes:.0f} 分钟。"
+        reply = QMessageBox.question(self, "磁盘空间不足", message + "\n是否仍然开始录制？",
+                                     QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        return reply == QMessageBox.Yes
+    
+    def check_disk_bandwidth(self, output_dir, recording_format, fps):
+        """检查磁盘写入带宽是否足以支撑所有摄像头以所选格式录制
+        
+        Returns:
+            bool: 是否继续录制
+        """
+        frame_sizes = [size for size in (recorder.recording_frame_size() for recorder in self.camera_recorders.values()) if size]
+        required = estimate_required_bandwidth(recording_format, frame_sizes, fps)
+        if required < MIN_BANDWIDTH_CHECK_MB_S:
+            return True
+        
+        if output_dir not in self.disk_throughput_cache:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                self.disk_throughput_cache[output_dir] = measure_disk_throughput(output_dir)
+            finally:
+                QApplication.restoreOverrideCursor()
+        available = self.disk_throughput_cache[output_dir]
+        if available is None:
+            return True
+        
+        print(f"录制所需写入带宽: {required:.1f} MB/s，磁盘实测写入带宽: {available:.1f} MB/s")
+        if required <= available:
+            return True
+        reply = QMessageBox.question(
+            self, "磁盘带宽不足",
+            f"以当前格式录制 {len(frame_sizes)} 个摄像头需要约 {required:.1f} MB/s 的写入带宽，"
+            f"但输出目录所在磁盘实测仅 {available:.1f} MB/s，录制可能丢帧。\n是否仍然开始录制？",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        return reply == QMessageBox.Yes
+    
+    @pyqtSlot(int, bool)
+    def handle_recorder_armed(self, camera_id, ok):
+        """处理单个摄像头预备完成的信号"""
+        if camera_id not in self.arming_states:
+            # 预备超时后才完成的摄像头不参与本次录制
+            if ok:
+                self.camera_recorders[camera_id].disarm()
+            return
+        
+        self.arming_states[camera_id] = ok
+        if all(state is not None for state in self.arming_states.values()):
+            self.fire_recording_start()
+    
+    def handle_arming_timeout(self):
+        """预备超时：未就绪的摄像头放弃本次录制"""
+        if not self.arming_states:
+            return
+        for camera_id, state in self.arming_states.items():
+            if state is None:
+                self.camera_recorders[camera_id].disarm()
+                self.arming_states[camera_id] = False
+        self.fire_recording_start()
+    
+    def fire_recording_start(self):
+        """所有摄像头预备完成后设定统一的开始时刻"""
+        self.arming_timer.stop()
+        armed_ids = [camera_id for camera_id, ok in self.arming_states.items() if ok]
+        self.arming_states = {}
+        self.record_button.setText("开始录制")
+        
+        if not armed_ids:
+            self.record_button.setEnabled(True)
+            QMessageBox.warning(self, "警告", "所有摄像头都未能准备好录制")
+            return
+        
+        self.recording_trigger.fire_start(duration_minutes=self.pending_duration)
+        for camera_id in armed_ids:
+            self.camera_views[camera_id].set_recording(True)
+            self.data_sync_manager.add_recorder(camera_id, self.camera_recorders[camera_id])
+        
+        self.is_recording = True
         self.stop_button.setEnabled(True)
         
-        if self.sync_checkbox.isChecked() and self.data_file_edit.text():
-            if not self.data_sync_manager.start_monitoring():
+        data_paths = [path.strip() for path in self.data_file_edit.text().split(";") if path.strip()]
+        if self.sync_checkbox.isChecked() and data_paths:
+            # 每个数据文件（或目录）作为一个设备，各自跟随读取并写入自己的同步日志
+            self.data_sync_manager.set_devices(data_paths)
+            subject_dir = os.path.join(self.output_dir_edit.text(), self.current_subject)
+            os.makedirs(subject_dir, exist_ok=True)
+            sync_log = os.path.join(subject_dir, "sync_data.jsonl")
+            if not self.data_sync_manager.start_monitoring(log_path=sync_log):
                 QMessageBox.warning(self, "同步警告", "无法启动数据文件监控。录制将继续，但不会记录同步信息。")
         
-        if duration > 0:
-            QMessageBox.information(self, "录制已开始", f"录制开始，对象：{subject_name}，录制时长：{duration}分钟。")
+        if self.pending_duration > 0:
+            QMessageBox.information(self, "录制已开始", f"录制开始，对象：{self.current_subject}，录制时长：{self.pending_duration}分钟。")
     
     def stop_recording(self):
-        """停止所有摄像头的录制"""
+        """停止所有摄像头的录制
+        
+        设定统一的停止时刻，各录制线程在该时刻之后的第一帧停止；
+        超时仍未停止的录制（如摄像头已断开）会被强制停止。
+        """
+        self.stop_button.setEnabled(False)
+        if self.recording_trigger is not None:
+            self.recording_trigger.fire_stop()
+        
+        # 录制线程已退出的摄像头无法响应停止时刻，直接停止
+        for recorder in self.camera_recorders.values():
+            if recorder.recording and not recorder.isRunning():
+                recorder.stop_recording()
+        
+        self.stop_timer.start(STOP_TIMEOUT_MS)
+    
+    def force_stop_recording(self):
+        """强制停止仍在录制的摄像头
+        
+        可能与录制线程按停止时刻执行的停止同时发生，VideoRecorder.stop_recording
+        加锁保证写入器只关闭一次、recording_finished只发出一次。
+        """
         for recorder in self.camera_recorders.values():
             if recorder.recording:
                 recorder.stop_recording()
@@ -355,13 +744,6 @@ class CameraTab(QWidget):
         
         if self.data_sync_manager.is_monitoring:
             self.data_sync_manager.stop_monitoring()
-            if self.data_sync_manager.sync_records and self.is_recording:
-                reply = QMessageBox.question(self, "保存同步数据", "有未保存的同步记录数据。是否保存？", QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
-                if reply == QMessageBox.Yes:
-                    subject_dir = os.path.join(self.output_dir_edit.text(), self.current_subject or f"未命名_{get_timestamp()}")
-                    os.makedirs(subject_dir, exist_ok=True)
-                    sync_file = os.path.join(subject_dir, "sync_data.json")
-                    self.data_sync_manager.save_sync_data(sync_file)
     
     def write_recording_logs(self):
         """将录制信息写入日志文件"""
@@ -383,12 +765,16 @@ class CameraTab(QWidget):
                 # 准备文本日志内容
                 log_content = f"录制对象: {self.current_subject}\n"
                 log_content += f"摄像头ID: {camera_id}\n"
-                log_content += f"视频文件: {log_info.get('output_filename', 'N/A')}\n"
+                log_content += f"视频文件: {log_info.get('filename', 'N/A')}\n"
                 log_content += f"开始时间: {log_info.get('start_time', 'N/A')}\n"
+                log_content += f"相对统一开始时刻偏移: {log_info.get('start_offset_ms', 0):.3f} 毫秒\n"
                 log_content += f"结束时间: {log_info.get('end_time', 'N/A')}\n"
                 log_content += f"总录制时长: {log_info.get('duration_seconds', 0):.2f} 秒\n"
                 log_content += f"总帧数: {log_info.get('frame_count', 0)}\n"
                 log_content += f"平均帧率: {log_info.get('average_fps', 0):.2f} FPS\n"
+                log_content += f"丢帧数: {log_info.get('dropped_frames', 0)}\n"
+                log_content += f"编码耗时 p50/p99: {log_info.get('encode_p50_ms', 0):.2f}/{log_info.get('encode_p99_ms', 0):.2f} 毫秒\n"
+                log_content += f"遥测时间序列: {log_info.get('telemetry_file', 'N/A')}\n"
                 
                 # 创建包含摄像头ID的、独一无二的文件名
                 log_filename = f"camera_{camera_id}_log.txt"
@@ -401,6 +787,11 @@ class CameraTab(QWidget):
                 # 收集摘要信息用于写入总的JSON日志
                 all_logs_summary[f"camera_{camera_id}"] = log_info
 
+            # 同步采集时记录摄像头间的采集偏差
+            if all_logs_summary and self.sync_capture_checkbox.isChecked():
+                all_logs_summary["sync_capture"] = self.sync_capture_group.skew_summary()
+                self.sync_capture_group.save_skew_log(os.path.join(subject_dir, "capture_skew.npy"))
+            
             # 写入包含所有摄像头信息的JSON日志文件
             if all_logs_summary:
                 json_log_file = os.path.join(subject_dir, "recording_info.json")
@@ -419,24 +810,26 @@ class CameraTab(QWidget):
             self.data_sync_manager.stop_monitoring()
     
     def browse_data_file(self):
-        """选择生理数据文件"""
-        file_path, _ = QFileDialog.getOpenFileName(self, "选择生理数据文件", "", "文本文件 (*.txt);;所有文件 (*)")
-        if file_path:
-            self.data_file_edit.setText(file_path)
-            self.data_sync_manager.set_data_path(file_path)
+        """选择生理数据文件（可多选，每个文件对应一个设备）"""
+        file_paths, _ = QFileDialog.getOpenFileNames(self, "选择生理数据文件", "", "文本文件 (*.txt);;所有文件 (*)")
+        if file_paths:
+            self.data_file_edit.setText(";".join(file_paths))
     
     def cleanup(self):
         """关闭窗口时清理资源"""
+        self.arming_timer.stop()
+        self.stop_timer.stop()
+        
+        if self.discovery_thread is not None:
+            self.discovery_thread.wait()
+        
         for recorder in self.camera_recorders.values():
             recorder.stop_recording()
             recorder.stop()
         
+        if self.rppg_monitor is not None:
+            self.rppg_monitor.stop()
+            self.rppg_monitor = None
+        
         if self.data_sync_manager.is_monitoring:
             self.data_sync_manager.stop_monitoring()
-            if self.data_sync_manager.sync_records and self.is_recording:
-                reply = QMessageBox.question(self, "保存同步数据", "有未保存的同步记录数据。是否保存？", QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
-                if reply == QMessageBox.Yes:
-                    subject_dir = os.path.join(self.output_dir_edit.text(), self.current_subject or f"未命名_{get_timestamp()}")
-                    os.makedirs(subject_dir, exist_ok=True)
-                    sync_file = os.path.join(subject_dir, "sync_data.json")
-                    self.data_sync_manager.save_sync_data(sync_file)
@@ -1,15 +1,81 @@
 import cv2
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QImage, QPixmap
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QPushButton
+from PyQt5.QtCore import Qt, QRect, QPointF, pyqtSignal
+from PyQt5.QtGui import QImage, QPainter, QPen, QColor, QPolygonF
+
+# Qt 5.14起支持直接显示BGR数据，可省去颜色转换
+HAS_BGR888 = hasattr(QImage, "Format_BGR888")
+
+class PreviewLabel(QLabel):
+    """直接绘制QImage的预览标签，避免每帧创建和缩放QPixmap"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._image = None
+    
+    def set_image(self, image):
+        """设置要显示的图像并请求重绘"""
+        self._image = image
+        self.update()
+    
+    def clear(self):
+        self._image = None
+        super().clear()
+    
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self._image is None or self._image.isNull():
+            return
+        
+        # 等比缩放并居中绘制
+        iw, ih = self._image.width(), self._image.height()
+        scale = min(self.width() / iw, self.height() / ih, 1.0)
+        dw, dh = int(iw * scale), int(ih * scale)
+        target = QRect((self.width() - dw) // 2, (self.height() - dh) // 2, dw, dh)
+        
+        painter = QPainter(self)
+        painter.drawImage(target, self._image)
+        painter.end()
+
+class TracePlot(QWidget):
+    """绘制实时rPPG曲线的小型折线图"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._values = None
+        self.setFixedHeight(40)
+    
+    def set_values(self, values):
+        self._values = np.asarray(values, dtype=np.float64) if values else None
+        self.update()
+    
+    def paintEvent(self, event):
+        if self._values is None or len(self._values) < 2:
+            return
+        values = self._values
+        low, high = values.min(), values.max()
+        span = high - low if high > low else 1.0
+        xs = np.linspace(0, self.width() - 1, len(values))
+        ys = (self.height() - 2) * (1.0 - (values - low) / span) + 1
+        
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.Antialiasing)
+        painter.setPen(QPen(QColor("#2E7D32"), 1.5))
+        painter.drawPolyline(QPolygonF([QPointF(x, y) for x, y in zip(xs, ys)]))
+        painter.end()
 
 class CameraView(QWidget):
     """单个摄像头视图组件"""
+    transform_requested = pyqtSignal(int)  # 请求设置录制区域，包含摄像头ID
     
     def __init__(self, camera_id, parent=None):
         super().__init__(parent)
         self.camera_id = camera_id
         self.recording = False
+        self._connected = False
+        # 按缓冲区地址缓存的QImage（及颜色转换缓冲区），预览缓冲区复用时无需重新创建
+        self._image_cache = {}
         
         self.layout = QVBoxLayout(self)
         
@@ -19,7 +85,7 @@ class CameraView(QWidget):
         self.title_label.setStyleSheet("font-weight: bold; font-size: 14px;")
         
         # 视频显示区域
-        self.video_label = QLabel()
+        self.video_label = PreviewLabel()
         self.video_label.setAlignment(Qt.AlignCenter)
         self.video_label.setMinimumSize(320, 240)
         self.video_label.setStyleSheet("background-color: black; border: 1px solid #CCCCCC;")
@@ -29,38 +95,69 @@ class CameraView(QWidget):
         self.status_label.setAlignment(Qt.AlignCenter)
         self.status_label.setStyleSheet("color: red; font-weight: bold;")
         
+        # 遥测标签：采集帧率、编码耗时、丢帧和磁盘写入速度
+        self.telemetry_label = QLabel("")
+        self.telemetry_label.setAlignment(Qt.AlignCenter)
+        self.telemetry_label.setStyleSheet("color: #555555; font-size: 11px;")
+        
         self.layout.addWidget(self.title_label)
         self.layout.addWidget(self.video_label)
         self.layout.addWidget(self.status_label)
+        self.layout.addWidget(self.telemetry_label)
+        
+        # 实时rPPG预览：主频和区域绿色通道曲线，开启实时分析后显示
+        self.rppg_label = QLabel("")
+        self.rppg_label.setAlignment(Qt.AlignCenter)
+        self.rppg_label.setStyleSheet("color: #2E7D32; font-size: 11px;")
+        self.rppg_plot = TracePlot()
+        self.layout.addWidget(self.rppg_label)
+        self.layout.addWidget(self.rppg_plot)
+        self.clear_rppg()
+        
+        # 录制区域设置（ROI裁剪、缩放、颜色转换）
+        self.transform_button = QPushButton("录制区域: 完整画面")
+        self.transform_button.clicked.connect(lambda: self.transform_requested.emit(self.camera_id))
+        self.layout.addWidget(self.transform_button)
         
         # 设置边框
         self.setStyleSheet("border: 2px solid #AAAAAA; border-radius: 5px; padding: 5px; background-color: #F0F0F0;")
     
     def update_frame(self, frame):
-        h, w, c = frame.shape
-        bytes_per_line = 3 * w
-        
-        # 将OpenCV的BGR转换为RGB
-        rgb_frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        h, w = frame.shape[:2]
         
-        # 转换为QImage和QPixmap
-        q_img = QImage(rgb_frame.data, w, h, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_img)
+        # 预览帧来自录制线程的复用缓冲池，同一缓冲区的QImage只创建一次
+        key = (frame.ctypes.data, w, h, frame.strides[0])
+        cached = self._image_cache.get(key)
+        if cached is None:
+            if len(self._image_cache) >= 8:
+                # 预览尺寸变化后旧缓冲区不再使用
+                self._image_cache.clear()
+            if HAS_BGR888:
+                rgb_buffer = None
+                q_img = QImage(frame.data, w, h, frame.strides[0], QImage.Format_BGR888)
+            else:
+                rgb_buffer = np.empty_like(frame)
+                q_img = QImage(rgb_buffer.data, w, h, rgb_buffer.strides[0], QImage.Format_RGB888)
+            # 同时持有帧数组，保证QImage引用的内存有效
+            cached = (q_img, frame, rgb_buffer)
+            self._image_cache[key] = cached
         
-        # 调整图像大小以适应标签
-        pixmap = pixmap.scaled(self.video_label.width(), self.video_label.height(), 
-                             Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        q_img, _, rgb_buffer = cached
+        if rgb_buffer is not None:
+            # 旧版Qt不支持BGR888，转换到复用的RGB缓冲区
+            cv2.cvtColor(frame, cv2.COLOR_BGR2RGB, dst=rgb_buffer)
         
         # 显示图像
-        self.video_label.setPixmap(pixmap)
+        self.video_label.set_image(q_img)
         
-        # 更新状态标签
-        if self.recording:
-            self.status_label.setText("正在录制")
-            self.status_label.setStyleSheet("color: red; font-weight: bold;")
-        else:
-            self.status_label.setText("已连接")
-            self.status_label.setStyleSheet("color: green; font-weight: bold;")
+        # 首帧到达时更新状态标签，之后只在状态变化时更新
+        if not self._connected:
+            self._connected = True
+            self.set_recording(self.recording)
+    
+    def preview_size(self):
+        """返回预览显示区域的大小 (宽, 高)"""
+        return self.video_label.width(), self.video_label.height()
     
     def set_recording(self, recording):
         self.recording = recording
@@ -71,7 +168,44 @@ class CameraView(QWidget):
             self.status_label.setText("已连接")
             self.status_label.setStyleSheet("color: green; font-weight: bold;")
     
+    def set_transform_summary(self, text):
+        """显示当前录制区域设置"""
+        self.transform_button.setText(f"录制区域: {text}")
+    
+    def set_telemetry(self, stats):
+        """显示录制线程发来的遥测统计"""
+        text = f"采集 {stats.get('capture_fps', 0):.1f} FPS"
+        if stats.get("recording"):
+            text += (f" | 编码 p50/p99 {stats.get('encode_p50_ms', 0):.1f}/{stats.get('encode_p99_ms', 0):.1f} ms"
+                     f" | 排队 {stats.get('queued_frames', 0)} | 丢帧 {stats.get('dropped_frames', 0)}"
+                     f" | {stats.get('disk_mb_per_s', 0):.1f} MB/s")
+        self.telemetry_label.setText(text)
+        # 出现丢帧时突出显示
+        color = "#CC0000" if stats.get("dropped_frames", 0) else "#555555"
+        self.telemetry_label.setStyleSheet(f"color: {color}; font-size: 11px;")
+    
+    def set_rppg(self, stats):
+        """显示实时rPPG分析结果"""
+        self.rppg_label.show()
+        self.rppg_plot.show()
+        if "bpm" not in stats:
+            self.rppg_label.setText(f"rPPG 采集中 {stats.get('duration_seconds', 0):.0f}s"
+                                    f" ({stats.get('sample_rate', 0):.0f} Hz)")
+            self.rppg_plot.set_values(None)
+            return
+        self.rppg_label.setText(f"rPPG 主频 {stats['frequency_hz']:.2f} Hz ({stats['bpm']:.0f} 次/分)"
+                                f" | 峰值占比 {stats.get('peak_ratio', 0):.0%} | {stats.get('sample_rate', 0):.0f} Hz")
+        self.rppg_plot.set_values(stats.get("trace"))
+    
+    def clear_rppg(self):
+        """关闭实时rPPG分析后隐藏结果"""
+        self.rppg_label.setText("")
+        self.rppg_label.hide()
+        self.rppg_plot.set_values(None)
+        self.rppg_plot.hide()
+    
     def set_error(self, error_msg):
+        self._connected = False
         self.status_label.setText(error_msg)
         self.status_label.setStyleSheet("color: red; font-weight: bold;")
         # 清除视频显示
@@ -0,0 +1,79 @@
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QFormLayout, QHBoxLayout, QSpinBox, QComboBox,
+                             QDialogButtonBox, QLabel)
+
+from workers.frame_transform import FrameTransform, COLOR_MODES
+
+
+class FrameTransformDialog(QDialog):
+    """设置单个摄像头写入前的ROI裁剪、缩放和颜色转换"""
+
+    def __init__(self, camera_id, frame_size=None, transform=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle(f"摄像头 #{camera_id} 录制区域")
+        frame_width, frame_height = frame_size or (7680, 4320)
+
+        layout = QVBoxLayout(self)
+        if frame_size:
+            layout.addWidget(QLabel(f"原始帧尺寸: {frame_width} x {frame_height}"))
+        form = QFormLayout()
+
+        # ROI：宽或高为0表示不裁剪
+        self.roi_spinboxes = []
+        roi = transform.roi if transform is not None and transform.roi else (0, 0, 0, 0)
+        roi_layout = QHBoxLayout()
+        for label, value, maximum in zip(("X", "Y", "宽", "高"), roi,
+                                         (frame_width, frame_height, frame_width, frame_height)):
+            spinbox = QSpinBox()
+            spinbox.setRange(0, maximum)
+            spinbox.setValue(value)
+            roi_layout.addWidget(QLabel(label))
+            roi_layout.addWidget(spinbox)
+            self.roi_spinboxes.append(spinbox)
+        form.addRow("裁剪区域:", roi_layout)
+
+        # 输出尺寸：0表示保持裁剪后的尺寸
+        output_size = transform.output_size if transform is not None and transform.output_size else (0, 0)
+        size_layout = QHBoxLayout()
+        self.output_width_spinbox = QSpinBox()
+        self.output_width_spinbox.setRange(0, 7680)
+        self.output_width_spinbox.setValue(output_size[0])
+        self.output_width_spinbox.setSpecialValueText("不缩放")
+        self.output_height_spinbox = QSpinBox()
+        self.output_height_spinbox.setRange(0, 4320)
+        self.output_height_spinbox.setValue(output_size[1])
+        self.output_height_spinbox.setSpecialValueText("不缩放")
+        size_layout.addWidget(self.output_width_spinbox)
+        size_layout.addWidget(QLabel("x"))
+        size_layout.addWidget(self.output_height_spinbox)
+        form.addRow("输出尺寸:", size_layout)
+
+        self.color_combo = QComboBox()
+        for color, label in COLOR_MODES.items():
+            self.color_combo.addItem(label, color)
+        if transform is not None:
+            self.color_combo.setCurrentIndex(self.color_combo.findData(transform.color))
+        form.addRow("颜色:", self.color_combo)
+
+        layout.addLayout(form)
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel | QDialogButtonBox.Reset)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        buttons.button(QDialogButtonBox.Reset).clicked.connect(self.reset)
+        layout.addWidget(buttons)
+
+    def reset(self):
+        """恢复为写入完整的原始帧"""
+        for spinbox in self.roi_spinboxes:
+            spinbox.setValue(0)
+        self.output_width_spinbox.setValue(0)
+        self.output_height_spinbox.setValue(0)
+        self.color_combo.setCurrentIndex(self.color_combo.findData("bgr"))
+
+    def transform(self):
+        """按当前设置返回FrameTransform，不做任何变换时返回None"""
+        x, y, w, h = (spinbox.value() for spinbox in self.roi_spinboxes)
+        roi = (x, y, w, h) if w > 0 and h > 0 else None
+        out_w, out_h = self.output_width_spinbox.value(), self.output_height_spinbox.value()
+        output_size = (out_w, out_h) if out_w > 0 and out_h > 0 else None
+        transform = FrameTransform(roi=roi, output_size=output_size, color=self.color_combo.currentData())
+        return None if transform.is_identity else transform
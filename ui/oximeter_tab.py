@@ -1,6 +1,6 @@
 import os
 import numpy as np
-import matplotlib.pyplot as plt
+import matplotlib
 from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QGroupBox, QLabel,
                            QPushButton, QComboBox, QFileDialog, QMessageBox,
                            QTabWidget, QTableWidget, QTableWidgetItem, QHeaderView)
@@ -10,6 +10,10 @@ from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as Navigatio
 from matplotlib.figure import Figure
 
 from workers.analysis_thread import AnalysisThread
+from utils.helpers import setup_chinese_fonts
+
+# 本模块只在血氧仪选项卡首次激活时导入，此时再注册中文字体
+setup_chinese_fonts()
 
 class MatplotlibCanvas(FigureCanvas):
     """Matplotlib画布类，用于在Qt界面中显示图形"""
@@ -213,7 +217,7 @@ class OximeterTab(QWidget):
         current_selection = self.signal_selector.currentText()
         
         # 获取中文字体
-        chinese_font = plt.rcParams['font.sans-serif'][0] if plt.rcParams['font.sans-serif'] else 'SimHei'
+        chinese_font = matplotlib.rcParams['font.sans-serif'][0] if matplotlib.rcParams['font.sans-serif'] else 'SimHei'
         
         if current_selection == "全部ECG信号":
             # 绘制所有ECG信号
@@ -388,6 +392,50 @@ class OximeterTab(QWidget):
                 # 参数值
                 value_item = QTableWidgetItem(f"{rate} Hz")
                 self.params_table.setItem(current_row + i, 1, value_item)
+        
+        # 添加由ECG波形计算的心率和心率变异性
+        for signal_name, result in self.analyzer.heart_rate.items():
+            rows = [
+                (f"{signal_name} R波数", str(result['beats'])),
+                (f"{signal_name} 平均心率", f"{result['mean_rate']:.1f} 次/分"),
+                (f"{signal_name} SDNN", f"{result['sdnn_ms']:.1f} ms"),
+                (f"{signal_name} RMSSD", f"{result['rmssd_ms']:.1f} ms"),
+                (f"{signal_name} pNN50", f"{result['pnn50']:.1f} %"),
+            ]
+            current_row = self.params_table.rowCount()
+            self.params_table.setRowCount(current_row + len(rows))
+            for i, (name, value) in enumerate(rows):
+                self.params_table.setItem(current_row + i, 0, QTableWidgetItem(name))
+                self.params_table.setItem(current_row + i, 1, QTableWidgetItem(value))
+        
+        # 添加由PLETH波形计算的脉率，以及与监护仪脉率的比较
+        for signal_name, result in self.analyzer.pulse_rate.items():
+            rows = [
+                (f"{signal_name} 脉搏数", str(result['beats'])),
+                (f"{signal_name} 平均脉率", f"{result['mean_rate']:.1f} 次/分"),
+                (f"{signal_name} 脉搏幅度", f"{result['mean_amplitude']:.0f}"),
+            ]
+            if result['reference']:
+                rows.append((f"{signal_name} 与监护仪脉率偏差",
+                             f"{result['reference']['bias']:+.1f} 次/分（平均绝对误差 {result['reference']['mae']:.1f}）"))
+            current_row = self.params_table.rowCount()
+            self.params_table.setRowCount(current_row + len(rows))
+            for i, (name, value) in enumerate(rows):
+                self.params_table.setItem(current_row + i, 0, QTableWidgetItem(name))
+                self.params_table.setItem(current_row + i, 1, QTableWidgetItem(value))
+        
+        # 添加滑动窗口频谱估计的心率/呼吸率中位数
+        rows = []
+        for signal_name, tracks in self.analyzer.spectral_tracks.items():
+            for kind, track in tracks.items():
+                rate = track['rate'][np.isfinite(track['rate'])]
+                label = "频谱心率" if kind == 'HR' else "频谱呼吸率"
+                rows.append((f"{signal_name} {label}", f"{np.median(rate):.1f} 次/分" if len(rate) else "-"))
+        current_row = self.params_table.rowCount()
+        self.params_table.setRowCount(current_row + len(rows))
+        for i, (name, value) in enumerate(rows):
+            self.params_table.setItem(current_row + i, 0, QTableWidgetItem(name))
+            self.params_table.setItem(current_row + i, 1, QTableWidgetItem(value))
     
     def export_to_excel(self):
         """导出数据到Excel"""
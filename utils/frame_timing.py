@@ -0,0 +1,151 @@
+import time
+import struct
+import numpy as np
+
+# 时间戳附属文件格式：文件头 + 定长记录（小端）
+TIMESTAMP_MAGIC = b"DTTS"
+TIMESTAMP_VERSION = 1
+TIMESTAMP_HEADER = struct.Struct("<4sHHd")  # 魔数, 版本, 记录长度, 标称帧率
+TIMESTAMP_RECORD = struct.Struct("<qqq")  # 视频帧序号, 采集单调时钟(ns), 墙上时钟(ns)
+TIMESTAMP_DTYPE = np.dtype([
+    ("frame_index", "<i8"),
+    ("capture_monotonic_ns", "<i8"),
+    ("wall_clock_ns", "<i8"),
+])
+
+
+class DeadlinePacer:
+    """基于单调时钟截止时间的帧节拍器
+
+    第k帧的截止时间固定为 起点 + k * 帧间隔，睡眠误差不会累积。
+    落后超过一个帧间隔时重新以当前时间为起点，并记录错过的节拍数。
+    """
+
+    def __init__(self, fps):
+        self.fps = None
+        self.interval_ns = 0
+        self.next_deadline_ns = None
+        self.missed_deadlines = 0
+        self.set_fps(fps)
+
+    def set_fps(self, fps):
+        """修改目标帧率，从下一帧开始生效"""
+        if fps <= 0:
+            raise ValueError(f"帧率必须大于0: {fps}")
+        self.fps = fps
+        self.interval_ns = int(round(1e9 / fps))
+        self.next_deadline_ns = None
+
+    def wait(self):
+        """等待到下一帧的截止时间
+
+        Returns:
+            int: 当前的单调时钟时间（纳秒）
+        """
+        now = time.monotonic_ns()
+        if self.next_deadline_ns is None:
+            self.next_deadline_ns = now + self.interval_ns
+            return now
+
+        remaining = self.next_deadline_ns - now
+        if remaining > 0:
+            time.sleep(remaining / 1e9)
+            now = time.monotonic_ns()
+        elif -remaining >= self.interval_ns:
+            # 已错过整个节拍，重新对齐，避免连续不睡眠地追赶
+            self.missed_deadlines += -remaining // self.interval_ns
+            self.next_deadline_ns = now
+
+        self.next_deadline_ns += self.interval_ns
+        return now
+
+
+class TimelineCorrector:
+    """按实际采集时间计算每帧应写入的次数
+
+    视频按标称帧率播放，第n帧对应 n / fps 秒。采集偏慢时重复写入当前帧，
+    偏快时丢弃多余帧，使写入文件的时间轴与真实时间一致。
+    """
+
+    def __init__(self, fps):
+        self.fps = fps
+        self.start_ns = None
+        self.frames_out = 0  # 已输出的视频帧数
+        self.duplicated_frames = 0
+        self.skipped_frames = 0
+
+    def repeats_for(self, capture_ns):
+        """返回采集于capture_ns的帧需要写入的次数（0表示丢弃）"""
+        if self.start_ns is None:
+            self.start_ns = capture_ns
+        expected = int((capture_ns - self.start_ns) * self.fps / 1e9 + 0.5) + 1
+        repeats = max(0, expected - self.frames_out)
+        if repeats == 0:
+            self.skipped_frames += 1
+        else:
+            self.duplicated_frames += repeats - 1
+        self.frames_out += repeats
+        return repeats
+
+
+class TimestampSidecar:
+    """逐帧时间戳附属文件写入器
+
+    视频文件中的每一帧对应一条记录（视频帧序号, 采集单调时钟ns, 墙上时钟ns），
+    补帧产生的重复帧共享同一采集时间。记录先在内存中累积，按批写入磁盘。
+    """
+
+    def __init__(self, path, fps, flush_every=256):
+        self.path = path
+        self.flush_every = flush_every
+        self.records = 0
+        self._pending = bytearray()
+        self._pending_count = 0
+        self._file = open(path, "wb")
+        self._file.write(TIMESTAMP_HEADER.pack(TIMESTAMP_MAGIC, TIMESTAMP_VERSION, TIMESTAMP_RECORD.size, float(fps)))
+
+    def write(self, frame_index, capture_monotonic_ns, wall_clock_ns):
+        """追加一条时间戳记录"""
+        self._pending += TIMESTAMP_RECORD.pack(frame_index, capture_monotonic_ns, wall_clock_ns)
+        self._pending_count += 1
+        self.records += 1
+        if self._pending_count >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if self._pending:
+            self._file.write(self._pending)
+            self._file.flush()
+            self._pending = bytearray()
+            self._pending_count = 0
+
+    def close(self):
+        if self._file is not None:
+            self.flush()
+            self._file.close()
+            self._file = None
+
+
+def read_timestamps(path):
+    """读取时间戳附属文件
+
+    Args:
+        path: 附属文件路径
+
+    Returns:
+        tuple: (标称帧率, 结构化数组，字段为frame_index/capture_monotonic_ns/wall_clock_ns)
+    """
+    with open(path, "rb") as f:
+        header = f.read(TIMESTAMP_HEADER.size)
+        if len(header) < TIMESTAMP_HEADER.size:
+            raise ValueError(f"时间戳文件头不完整: {path}")
+        magic, version, record_size, fps = TIMESTAMP_HEADER.unpack(header)
+        if magic != TIMESTAMP_MAGIC or record_size != TIMESTAMP_RECORD.size:
+            raise ValueError(f"不是有效的时间戳文件: {path}")
+        if version != TIMESTAMP_VERSION:
+            raise ValueError(f"不支持的时间戳文件版本: {version}")
+        data = f.read()
+
+    # 崩溃时最后一条记录可能不完整，丢弃残余字节
+    usable = len(data) - len(data) % TIMESTAMP_RECORD.size
+    return fps, np.frombuffer(data[:usable], dtype=TIMESTAMP_DTYPE)
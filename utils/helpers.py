@@ -1,10 +1,11 @@
 import sys
 import os
 import datetime
-import matplotlib
-from matplotlib.font_manager import fontManager
 from PyQt5.QtWidgets import QMessageBox
 
+# 字体配置结果缓存，None表示尚未配置
+_chinese_fonts_result = None
+
 # 添加北京时间转换功能
 def get_beijing_time():
     """获取格式化的北京时间"""
@@ -32,22 +33,40 @@ def resource_path(relative_path):
 
 # 重写：配置中文字体
 def setup_chinese_fonts():
-    """配置matplotlib以使用打包的中文字体"""
+    """配置matplotlib以使用打包的中文字体
+    
+    字体只注册一次，重复调用直接返回首次配置的结果
+    """
+    global _chinese_fonts_result
+    if _chinese_fonts_result is not None:
+        return _chinese_fonts_result
+    
+    # matplotlib导入较慢，仅在需要绘图时才加载
+    import matplotlib
+    from matplotlib.font_manager import fontManager
+    
     font_path = resource_path(os.path.join('resources', 'simhei.ttf'))
     
     if not os.path.exists(font_path):
         print(f"错误: 字体文件未找到 at {font_path}")
         # 在GUI应用中，使用QMessageBox提示错误可能更友好
         # 但由于这个helper可能在非GUI线程中使用，暂时只打印
-        return False
-        
-    try:
-        fontManager.addfont(font_path)
-        matplotlib.rcParams['font.sans-serif'] = ['SimHei'] + matplotlib.rcParams['font.sans-serif']
+        _chinese_fonts_result = False
+    else:
+        try:
+            fontManager.addfont(font_path)
+            matplotlib.rcParams['font.sans-serif'] = ['SimHei'] + matplotlib.rcParams['font.sans-serif']
+            matplotlib.rcParams['axes.unicode_minus'] = False
+            matplotlib.rcParams['font.family'] = 'sans-serif'
+            print("中文字体 'SimHei' 配置成功。")
+            _chinese_fonts_result = True
+        except Exception as e:
+            print(f"配置中文字体时发生错误: {e}")
+            _chinese_fonts_result = False
+    
+    if not _chinese_fonts_result:
+        # 如果设置失败，使用系统字体作为备选方案
+        matplotlib.rcParams['font.sans-serif'] = ['SimHei', 'Microsoft YaHei', 'SimSun', 'Arial Unicode MS']
         matplotlib.rcParams['axes.unicode_minus'] = False
         matplotlib.rcParams['font.family'] = 'sans-serif'
-        print("中文字体 'SimHei' 配置成功。")
-        return True
-    except Exception as e:
-        print(f"配置中文字体时发生错误: {e}")
-        return False
+    return _chinese_fonts_result
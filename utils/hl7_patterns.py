@@ -0,0 +1,20 @@
+import re
+
+# 监护仪数据文件中每条消息的接收时间行，以及OBX段：(类型, 信号编码, 信号名, 信号ID, 数值)
+RECEIVED_AT_PATTERN = re.compile(r'Received at\s+(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2})')
+OBX_PATTERN = re.compile(r'OBX\|\d+\|([A-Z]{2})\|([\d\^]+)\^([^\^]+)\^[^\|]+\|([^\|]+)\|([^\|]+)')
+
+# 文件中没有采样率时按信号类型使用的默认采样率（Hz），其他信号为100Hz
+DEFAULT_SAMPLING_RATES = {
+    'ECG': 500,
+    'PLETH': 60,
+    'IMPED': 256
+}
+
+
+def default_sampling_rate(signal_name):
+    """根据信号名称返回默认采样率"""
+    for signal_type, rate in DEFAULT_SAMPLING_RATES.items():
+        if signal_type in signal_name:
+            return rate
+    return 100
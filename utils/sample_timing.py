@@ -0,0 +1,93 @@
+import numpy as np
+
+# 相邻数据块的时间差比按采样点数推算的时长多出该值（秒）时视为数据中断
+GAP_SECONDS = 1.5
+# 连续段时长不少于该值（秒）才估计实际采样率，时间戳只有秒级精度时短段的斜率误差太大
+MIN_DRIFT_SPAN_SECONDS = 30.0
+# 实际采样率与标称值的最大相对偏差，超出时认为估计不可靠，使用标称采样率
+MAX_RATE_DEVIATION = 0.02
+
+
+def datetime_to_ns(value):
+    """datetime（无时区时按本地时间）转换为Unix纪元纳秒"""
+    return int(round(value.timestamp() * 1e6)) * 1000
+
+
+def reconstruct_sample_times(block_ns, counts, nominal_rate, resolution_ns=0):
+    """由数据块的时间和采样点数重建每个采样点的时间戳
+
+    监护仪每条消息带一段波形（一个数据块），只知道消息的接收时间（文件中只精确到秒，
+    同步日志中是带抖动的到达时间）。把每个数据块的时间视为其最后一个采样点的时间，
+    在每个连续段内对 (采样点序号, 数据块时间) 做最小二乘直线拟合：斜率是实际采样
+    间隔（估计设备时钟漂移），截距把接收时间的量化和抖动平均掉。相邻数据块的时间差
+    明显超过其采样点时长时视为数据中断，前后分段分别拟合。全部计算向量化。
+
+    Args:
+        block_ns: 每个数据块的时间（纳秒，按数据块顺序），int64数组
+        counts: 每个数据块的采样点数
+        nominal_rate: 标称采样率（Hz）
+        resolution_ns: 数据块时间的分辨率（纳秒），时间被截断到该分辨率时
+            （如"Received at"只到秒）补偿半个分辨率
+
+    Returns:
+        tuple: (每个采样点的时间戳int64数组, 连续段列表)，连续段为字典：
+            start_sample/end_sample（采样点序号范围，不含end）、start_ns、
+            rate_hz（实际采样率）、drift_ppm（相对标称采样率的偏差）、residual_ms（拟合残差均方根）
+    """
+    block_ns = np.asarray(block_ns, dtype=np.int64)
+    counts = np.asarray(counts, dtype=np.int64)
+    keep = counts > 0
+    block_ns, counts = block_ns[keep], counts[keep]
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64), []
+
+    nominal_period = 1e9 / nominal_rate
+    ends = np.cumsum(counts) - 1  # 每个数据块最后一个采样点的序号
+    origin = block_ns[0]
+    y = (block_ns - origin).astype(np.float64) + resolution_ns / 2
+    x = ends.astype(np.float64)
+
+    # 数据中断：时间差超出按采样点数推算的时长，或时间倒退
+    gap_ns = max(GAP_SECONDS * 1e9, 2 * resolution_ns)
+    excess = np.diff(y) - np.diff(x) * nominal_period
+    starts = np.concatenate([[0], np.flatnonzero((excess > gap_ns) | (excess < -gap_ns)) + 1])
+    blocks_per_segment = np.diff(np.append(starts, len(y)))
+
+    # 各段同时做最小二乘：先减去段内均值再求和
+    mean_x = np.add.reduceat(x, starts) / blocks_per_segment
+    mean_y = np.add.reduceat(y, starts) / blocks_per_segment
+    dx = x - np.repeat(mean_x, blocks_per_segment)
+    dy = y - np.repeat(mean_y, blocks_per_segment)
+    sxx = np.add.reduceat(dx * dx, starts)
+    sxy = np.add.reduceat(dx * dy, starts)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        period = sxy / sxx
+    span_ns = np.maximum.reduceat(y, starts) - np.minimum.reduceat(y, starts)
+    reliable = ((span_ns >= MIN_DRIFT_SPAN_SECONDS * 1e9)
+                & (np.abs(period / nominal_period - 1) <= MAX_RATE_DEVIATION))
+    period = np.where(reliable, period, nominal_period)
+    intercept = mean_y - period * mean_x
+
+    residual = dy - np.repeat(period, blocks_per_segment) * dx
+    residual_ms = np.sqrt(np.add.reduceat(residual * residual, starts) / blocks_per_segment) / 1e6
+
+    # 每个采样点按所在段的直线计算时间
+    first_sample = np.concatenate([[0], ends[:-1] + 1])[starts]
+    samples_per_segment = np.diff(np.append(first_sample, total))
+    index = np.arange(total, dtype=np.float64)
+    times = (np.repeat(intercept, samples_per_segment)
+             + np.repeat(period, samples_per_segment) * index)
+    times = np.round(times).astype(np.int64) + origin
+    # 分段边界处前后直线可能略有重叠，保持单调不减
+    times = np.maximum.accumulate(times)
+
+    segments = [{
+        "start_sample": int(first_sample[i]),
+        "end_sample": int(first_sample[i] + samples_per_segment[i]),
+        "start_ns": int(times[first_sample[i]]),
+        "rate_hz": 1e9 / period[i],
+        "drift_ppm": (nominal_period / period[i] - 1) * 1e6,
+        "residual_ms": float(residual_ms[i]),
+    } for i in range(len(starts))]
+    return times, segments
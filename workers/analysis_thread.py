@@ -37,6 +37,15 @@ class AnalysisThread(QThread):
                 self.error_occurred.emit("未能从文件中解析出有效数据，请检查文件格式是否正确")
                 return
             
+            self.progress_update.emit("正在检测R波...")
+            analyzer.analyze_heart_rate()
+            
+            self.progress_update.emit("正在检测脉搏...")
+            analyzer.analyze_pulse_rate()
+            
+            self.progress_update.emit("正在计算频谱...")
+            analyzer.analyze_spectra()
+            
             self.progress_update.emit("正在导出Excel数据...")
             try:
                 analyzer.export_to_excel()
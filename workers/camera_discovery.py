@@ -0,0 +1,118 @@
+import os
+import json
+import time
+import queue
+import datetime
+import threading
+import cv2
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# 摄像头清单缓存文件，下次启动时直接用于填充摄像头列表
+CAMERA_INVENTORY_PATH = os.path.join(os.path.expanduser("~"), ".multi_camera_recorder", "camera_inventory.json")
+
+# 探测支持情况的常用分辨率 (宽, 高)
+COMMON_RESOLUTIONS = [(640, 480), (1280, 720), (1920, 1080)]
+
+
+def probe_camera(index, probe_modes=True):
+    """打开摄像头并读取其默认分辨率、帧率以及支持的常用分辨率
+
+    Returns:
+        dict: 摄像头信息，无法打开时返回None
+    """
+    cap = cv2.VideoCapture(index)
+    try:
+        if not cap.isOpened():
+            return None
+        info = {
+            "index": index,
+            "width": int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)),
+            "height": int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            "fps": round(cap.get(cv2.CAP_PROP_FPS), 2),
+            "modes": [],
+        }
+        if probe_modes:
+            # 设置后读回实际值，驱动不支持时会退回到最接近的分辨率
+            for width, height in COMMON_RESOLUTIONS:
+                cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+                cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+                actual = [int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))]
+                if actual == [width, height]:
+                    info["modes"].append({"width": width, "height": height,
+                                          "fps": round(cap.get(cv2.CAP_PROP_FPS), 2)})
+        return info
+    finally:
+        cap.release()
+
+
+def load_camera_inventory(path=CAMERA_INVENTORY_PATH):
+    """读取缓存的摄像头清单，不存在或无法解析时返回空列表"""
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f).get("cameras", [])
+    except (OSError, ValueError):
+        return []
+
+
+def save_camera_inventory(cameras, path=CAMERA_INVENTORY_PATH):
+    """保存摄像头清单"""
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "updated": datetime.datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "cameras": sorted(cameras, key=lambda camera: camera["index"]),
+            }, f, indent=2, ensure_ascii=False)
+        return True
+    except OSError as e:
+        print(f"保存摄像头清单失败: {str(e)}")
+        return False
+
+
+class CameraDiscoveryThread(QThread):
+    """后台并行探测摄像头设备
+
+    每个设备索引在独立的守护线程中探测，整体超时后仍未返回的设备视为不可用，
+    不会阻塞界面或程序退出。每发现一个摄像头发出一次camera_found信号。
+    """
+    camera_found = pyqtSignal(int, dict)
+    discovery_finished = pyqtSignal(list, list)  # 发现的摄像头信息列表，超时的设备索引列表
+
+    def __init__(self, indices=range(10), probe_timeout=5.0, probe_modes=True, parent=None):
+        super().__init__(parent)
+        self.indices = list(indices)
+        self.probe_timeout = probe_timeout  # 单个设备的探测超时（秒），各设备并行探测
+        self.probe_modes = probe_modes
+
+    def run(self):
+        results = queue.Queue()
+
+        def probe(index):
+            try:
+                results.put((index, probe_camera(index, self.probe_modes)))
+            except Exception as e:
+                print(f"探测摄像头 {index} 出错: {str(e)}")
+                results.put((index, None))
+
+        for index in self.indices:
+            threading.Thread(target=probe, args=(index,), daemon=True).start()
+
+        cameras = []
+        pending = set(self.indices)
+        deadline = time.monotonic() + self.probe_timeout
+        while pending:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                index, info = results.get(timeout=remaining)
+            except queue.Empty:
+                break
+            pending.discard(index)
+            if info is not None:
+                cameras.append(info)
+                self.camera_found.emit(index, info)
+
+        if pending:
+            print(f"摄像头探测超时: {sorted(pending)}")
+        self.discovery_finished.emit(sorted(cameras, key=lambda camera: camera["index"]), sorted(pending))
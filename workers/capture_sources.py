@@ -0,0 +1,191 @@
+import sys
+import time
+import cv2
+import numpy as np
+
+# 各平台默认的摄像头采集后端
+if sys.platform.startswith("win"):
+    DEFAULT_CAMERA_BACKEND = cv2.CAP_DSHOW
+elif sys.platform.startswith("linux"):
+    DEFAULT_CAMERA_BACKEND = cv2.CAP_V4L2
+elif sys.platform == "darwin":
+    DEFAULT_CAMERA_BACKEND = cv2.CAP_AVFOUNDATION
+else:
+    DEFAULT_CAMERA_BACKEND = cv2.CAP_ANY
+
+# 采集源描述中的后端名称
+CAMERA_BACKENDS = {
+    "default": DEFAULT_CAMERA_BACKEND,
+    "any": cv2.CAP_ANY,
+    "dshow": cv2.CAP_DSHOW,
+    "msmf": cv2.CAP_MSMF,
+    "v4l2": cv2.CAP_V4L2,
+}
+
+
+class _PacedCapture:
+    """虚拟采集源的公共部分：接口与cv2.VideoCapture一致，可按帧率阻塞模拟真实摄像头"""
+
+    def __init__(self, fps, realtime):
+        self.fps = fps
+        self.realtime = realtime and fps > 0
+        self._next_ns = None
+        self._opened = True
+        self._grabbed = False
+
+    def _wait_next_frame(self):
+        if not self.realtime:
+            return
+        interval_ns = int(1e9 / self.fps)
+        now = time.monotonic_ns()
+        if self._next_ns is None or now - self._next_ns > interval_ns:
+            self._next_ns = now
+        delay = self._next_ns - now
+        if delay > 0:
+            time.sleep(delay / 1e9)
+        self._next_ns += interval_ns
+
+    def isOpened(self):
+        return self._opened
+
+    def grab(self):
+        if not self._opened:
+            return False
+        self._wait_next_frame()
+        self._grabbed = self._advance()
+        return self._grabbed
+
+    def retrieve(self, image=None, flag=0):
+        if not self._grabbed:
+            return False, image
+        self._grabbed = False
+        return True, self._render(image)
+
+    def read(self, image=None):
+        if not self.grab():
+            return False, image
+        return self.retrieve(image)
+
+    def set(self, prop_id, value):
+        return False
+
+    def release(self):
+        self._opened = False
+
+
+class SyntheticCapture(_PacedCapture):
+    """合成测试图案采集源
+
+    生成水平滚动的彩条图案，并在左上角8个像素中以灰度编码帧序号（每像素一位字节，
+    小端），可用于检查录制是否丢帧或重复。
+    """
+
+    def __init__(self, width=640, height=480, fps=30, realtime=True):
+        super().__init__(fps, realtime)
+        self.width = width
+        self.height = height
+        self.frame_index = -1
+        # 预先生成两倍宽度的图案，每帧只需复制一个滚动窗口
+        x = np.arange(width * 2)
+        hue = (x * 180 // width) % 180
+        row = cv2.cvtColor(np.stack([hue, np.full_like(hue, 200), np.full_like(hue, 220)], axis=-1)
+                           .astype(np.uint8)[np.newaxis], cv2.COLOR_HSV2BGR)
+        gradient = np.linspace(0.6, 1.0, height, dtype=np.float32)[:, np.newaxis, np.newaxis]
+        self._pattern = (row * gradient).astype(np.uint8)
+
+    def _advance(self):
+        self.frame_index += 1
+        return True
+
+    def _render(self, image):
+        if image is None or image.shape != (self.height, self.width, 3):
+            image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        offset = (self.frame_index * 4) % self.width
+        np.copyto(image, self._pattern[:, offset:offset + self.width])
+        image[0, :8] = (np.frombuffer(np.int64(self.frame_index).tobytes(), dtype=np.uint8))[:, np.newaxis]
+        return image
+
+    def get(self, prop_id):
+        return {
+            cv2.CAP_PROP_FRAME_WIDTH: self.width,
+            cv2.CAP_PROP_FRAME_HEIGHT: self.height,
+            cv2.CAP_PROP_FPS: self.fps,
+            cv2.CAP_PROP_POS_FRAMES: self.frame_index + 1,
+        }.get(prop_id, 0.0)
+
+
+def read_synthetic_frame_index(frame):
+    """读取SyntheticCapture编码在帧左上角的帧序号"""
+    return int(np.frombuffer(np.ascontiguousarray(frame[0, :8, 0]).tobytes(), dtype=np.int64)[0])
+
+
+class FileReplayCapture(_PacedCapture):
+    """视频文件回放采集源，可循环播放并按文件帧率（或指定帧率）输出"""
+
+    def __init__(self, path, fps=None, loop=True, realtime=True):
+        self._cap = cv2.VideoCapture(path)
+        file_fps = self._cap.get(cv2.CAP_PROP_FPS) if self._cap.isOpened() else 0
+        super().__init__(fps or file_fps or 30, realtime)
+        self.path = path
+        self.loop = loop
+        self._opened = self._cap.isOpened()
+
+    def _advance(self):
+        if self._cap.grab():
+            return True
+        if not self.loop:
+            return False
+        # 到达文件末尾时从头开始
+        self._cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+        return self._cap.grab()
+
+    def _render(self, image):
+        _, image = self._cap.retrieve(image)
+        return image
+
+    def get(self, prop_id):
+        if prop_id == cv2.CAP_PROP_FPS:
+            return self.fps
+        return self._cap.get(prop_id)
+
+    def release(self):
+        super().release()
+        self._cap.release()
+
+
+def parse_capture_source(source):
+    """解析采集源描述
+
+    支持的形式：
+        0 / "0"                  默认后端的摄像头（Windows为DirectShow，Linux为V4L2）
+        "v4l2:0" / "dshow:1"     指定后端的摄像头
+        "synthetic:640x480@30"   合成测试图案，帧率为0表示不限速
+        "file:/path/video.avi"   视频文件循环回放
+
+    Returns:
+        tuple: (类型, 参数字典)
+    """
+    if isinstance(source, int) or (isinstance(source, str) and source.isdigit()):
+        return "camera", {"index": int(source), "backend": DEFAULT_CAMERA_BACKEND}
+
+    kind, _, value = source.partition(":")
+    if kind in CAMERA_BACKENDS:
+        return "camera", {"index": int(value), "backend": CAMERA_BACKENDS[kind]}
+    if kind == "synthetic":
+        size, _, fps = (value or "640x480@30").partition("@")
+        width, _, height = size.partition("x")
+        return "synthetic", {"width": int(width), "height": int(height), "fps": float(fps or 30)}
+    if kind == "file":
+        return "file", {"path": value}
+    raise ValueError(f"无法识别的采集源: {source}")
+
+
+def open_capture_source(source):
+    """按采集源描述打开采集对象，返回与cv2.VideoCapture接口一致的对象"""
+    kind, params = parse_capture_source(source)
+    if kind == "camera":
+        return cv2.VideoCapture(params["index"], params["backend"])
+    if kind == "synthetic":
+        fps = params["fps"]
+        return SyntheticCapture(params["width"], params["height"], fps if fps > 0 else 30, realtime=fps > 0)
+    return FileReplayCapture(params["path"])
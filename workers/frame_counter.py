@@ -0,0 +1,81 @@
+import time
+import numpy as np
+
+# 计数快照字段：[序号, 是否录制中, 已录制帧数, 最后一帧采集单调时钟ns, 开始录制单调时钟ns]，序号为奇数表示正在写入
+COUNTER_FIELDS = 5
+# 计数的初始值：未录制，时间未知
+COUNTER_INITIAL = (0, 0, 0, -1, -1)
+# 读到写入中途的数据时的最大重试次数
+SNAPSHOT_RETRIES = 100
+
+
+class FrameCounter:
+    """录制线程发布的帧计数快照（单写多读的序号锁，不加锁）
+
+    录制线程每录制一帧更新一次，读取方在复制前后比较序号，写入中途读到的数据直接重读，
+    得到的录制状态、帧数和该帧的采集时间总是同一时刻的。存储可以是进程内的数组，也可以是
+    multiprocessing.Array('q')，由主进程读取录制子进程的计数。
+    """
+
+    def __init__(self, values=None):
+        """初始化计数
+
+        Args:
+            values: 以COUNTER_INITIAL初始化的共享int64数组，None表示进程内使用
+        """
+        if values is None:
+            self._values = np.array(COUNTER_INITIAL, dtype=np.int64)
+        else:
+            self._values = np.frombuffer(values, dtype=np.int64, count=COUNTER_FIELDS)
+
+    def publish(self, recording, frame_count, capture_ns=None, start_ns=None):
+        """写入当前计数（只在录制线程中调用）
+
+        Args:
+            recording: 是否正在录制
+            frame_count: 已录制帧数
+            capture_ns: 最后录制的一帧的采集单调时钟，None表示还没有录制的帧
+            start_ns: 开始录制的单调时钟
+        """
+        values = self._values
+        values[0] += 1
+        values[1] = 1 if recording else 0
+        values[2] = frame_count
+        values[3] = -1 if capture_ns is None else capture_ns
+        values[4] = -1 if start_ns is None else start_ns
+        values[0] += 1
+
+    def snapshot(self):
+        """读取一份一致的计数
+
+        Returns:
+            dict: {'recording', 'frame_count', 'capture_monotonic_ns', 'start_monotonic_ns'}，
+                  时间未知时为None；一直读到写入中途的数据时返回None
+        """
+        values = self._values
+        for _ in range(SNAPSHOT_RETRIES):
+            seq = int(values[0])
+            if seq % 2 == 0:
+                copied = values.copy()
+                if int(values[0]) == seq:
+                    return {
+                        "recording": bool(copied[1]),
+                        "frame_count": int(copied[2]),
+                        "capture_monotonic_ns": int(copied[3]) if copied[3] >= 0 else None,
+                        "start_monotonic_ns": int(copied[4]) if copied[4] >= 0 else None,
+                    }
+        return None
+
+
+def snapshot_recorders(recorders):
+    """连续读取所有录像机的计数快照
+
+    Args:
+        recorders: {摄像头ID: 录像机}，录像机需提供snapshot()
+
+    Returns:
+        tuple: ({摄像头ID: 快照}, 开始读取时的单调时钟ns, 读完全部快照的耗时ns)
+    """
+    start_ns = time.monotonic_ns()
+    snapshots = {camera_id: recorder.snapshot() for camera_id, recorder in list(recorders.items())}
+    return snapshots, start_ns, time.monotonic_ns() - start_ns
@@ -0,0 +1,44 @@
+import numpy as np
+
+class FramePool:
+    """预分配的可复用帧缓冲池
+
+    缓冲区按轮转顺序复用，只有帧形状变化时才重新分配。
+    预览协议保证同一时刻最多一帧在途、一帧正在显示，因此3个缓冲区即可避免覆盖。
+    """
+
+    def __init__(self, size=3, dtype=np.uint8):
+        """初始化缓冲池
+
+        Args:
+            size: 缓冲区数量
+            dtype: 帧数据类型
+        """
+        if size < 1:
+            raise ValueError(f"缓冲池大小必须大于0: {size}")
+        self.size = size
+        self.dtype = dtype
+        self.shape = None
+        self.allocations = 0  # 累计分配的缓冲区数量
+        self._buffers = []
+        self._next = 0
+
+    def acquire(self, shape):
+        """取出下一个可写入的缓冲区
+
+        Args:
+            shape: 需要的帧形状
+
+        Returns:
+            np.ndarray: 预分配的缓冲区
+        """
+        shape = tuple(shape)
+        if shape != self.shape:
+            self._buffers = [np.empty(shape, dtype=self.dtype) for _ in range(self.size)]
+            self.shape = shape
+            self.allocations += self.size
+            self._next = 0
+
+        buffer = self._buffers[self._next]
+        self._next = (self._next + 1) % self.size
+        return buffer
@@ -0,0 +1,164 @@
+import threading
+from collections import deque
+import numpy as np
+
+class FrameRingBuffer:
+    """预分配的有界帧环形缓冲区（单生产者/单消费者）
+
+    采集线程通过push将帧复制到预分配的槽位中，编码线程通过get取出帧，
+    写入完成后调用release归还槽位。缓冲区满时按背压策略处理：
+    阻塞等待（block）或丢弃最旧的帧（drop_oldest）。
+    """
+    POLICY_BLOCK = "block"
+    POLICY_DROP_OLDEST = "drop_oldest"
+    POLICIES = (POLICY_BLOCK, POLICY_DROP_OLDEST)
+
+    def __init__(self, depth, frame_shape=None, dtype=np.uint8, policy=POLICY_BLOCK, block_timeout=1.0):
+        """初始化环形缓冲区
+
+        Args:
+            depth: 槽位数量
+            frame_shape: 帧形状 (高, 宽, 通道)，为None时在第一次push时按帧形状分配
+            dtype: 帧数据类型
+            policy: 缓冲区满时的背压策略
+            block_timeout: 阻塞策略下的最长等待时间（秒），超时后丢弃当前帧
+        """
+        if depth < 1:
+            raise ValueError(f"缓冲区深度必须大于0: {depth}")
+        if policy not in self.POLICIES:
+            raise ValueError(f"未知的背压策略: {policy}")
+
+        self.depth = depth
+        self.dtype = dtype
+        self.policy = policy
+        self.block_timeout = block_timeout
+        self.frame_shape = None
+        self._slots = None
+        self._meta = [None] * depth
+
+        self._cond = threading.Condition()
+        self._queue = deque()  # 已写入、待读取的槽位（按写入顺序）
+        self._free = list(range(depth))  # 空闲槽位，只有这里的槽位会被写入
+        self._held = None  # 消费者正在使用的槽位
+        self._closed = False
+
+        # 统计计数
+        self.pushed_frames = 0  # 成功进入缓冲区的帧数
+        self.dropped_frames = 0  # 因缓冲区满而丢弃的帧数
+        self.max_queued = 0  # 最大排队帧数
+
+        if frame_shape is not None:
+            self._allocate(frame_shape)
+
+    def _allocate(self, frame_shape):
+        """分配全部槽位"""
+        self.frame_shape = tuple(frame_shape)
+        self._slots = np.empty((self.depth,) + self.frame_shape, dtype=self.dtype)
+
+    @property
+    def closed(self):
+        return self._closed
+
+    @property
+    def queued(self):
+        """当前排队等待编码的帧数"""
+        return len(self._queue)
+
+    def push(self, frame, meta=None):
+        """写入一帧
+
+        Args:
+            frame: 帧数据，形状须与缓冲区一致
+            meta: 随帧保存的附加信息
+
+        Returns:
+            bool: 帧是否进入缓冲区
+        """
+        with self._cond:
+            if self._closed:
+                return False
+            if self._slots is None:
+                self._allocate(frame.shape)
+            elif frame.shape != self.frame_shape:
+                raise ValueError(f"帧形状 {frame.shape} 与缓冲区形状 {self.frame_shape} 不一致")
+
+            if not self._free:
+                if self.policy == self.POLICY_BLOCK:
+                    self._cond.wait_for(lambda: self._closed or self._free, self.block_timeout)
+                    if self._closed or not self._free:
+                        self.dropped_frames += 1
+                        return False
+                elif self._queue:
+                    # 丢弃最旧的帧，为新帧腾出槽位（消费者持有的槽位不在队列中，不会被覆盖）
+                    oldest = self._queue.popleft()
+                    self._meta[oldest] = None
+                    self._free.append(oldest)
+                    self.dropped_frames += 1
+                else:
+                    # 唯一的槽位正被消费者使用，只能丢弃新帧
+                    self.dropped_frames += 1
+                    return False
+
+            slot = self._free.pop()
+
+        # 单生产者：取出的空闲槽位在提交前不会被消费者读取，可在锁外复制
+        np.copyto(self._slots[slot], frame)
+
+        with self._cond:
+            self._meta[slot] = meta
+            self._queue.append(slot)
+            self.pushed_frames += 1
+            self.max_queued = max(self.max_queued, len(self._queue))
+            self._cond.notify_all()
+        return True
+
+    def get(self, timeout=None):
+        """取出最旧的一帧，会自动归还上一次取出的槽位
+
+        Args:
+            timeout: 最长等待时间（秒），None表示一直等待
+
+        Returns:
+            tuple: (帧数据视图, 附加信息)，超时或缓冲区已关闭且为空时返回None
+        """
+        with self._cond:
+            self._release_held()
+            if not self._cond.wait_for(lambda: self._queue or self._closed, timeout):
+                return None
+            if not self._queue:
+                return None
+
+            index = self._queue.popleft()
+            self._held = index
+            meta = self._meta[index]
+            self._meta[index] = None
+            return self._slots[index], meta
+
+    def release(self):
+        """归还消费者正在使用的槽位"""
+        with self._cond:
+            self._release_held()
+
+    def _release_held(self):
+        """把消费者持有的槽位放回空闲列表（调用方持有锁）"""
+        if self._held is not None:
+            self._free.append(self._held)
+            self._held = None
+            self._cond.notify_all()
+
+    def close(self):
+        """关闭缓冲区，已排队的帧仍可被取出"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def stats(self):
+        """返回缓冲区统计信息"""
+        return {
+            "buffer_depth": self.depth,
+            "backpressure_policy": self.policy,
+            "queued_frames": len(self._queue),
+            "max_queued_frames": self.max_queued,
+            "dropped_frames": self.dropped_frames,
+            "pushed_frames": self.pushed_frames
+        }
@@ -0,0 +1,111 @@
+import cv2
+import numpy as np
+
+# 可选的颜色转换
+COLOR_MODES = {
+    "bgr": "保持彩色",
+    "gray": "灰度",
+}
+
+
+class FrameTransform:
+    """写入前的帧变换：固定ROI裁剪、缩放和颜色转换
+
+    在采集线程中把帧放入环形缓冲区之前执行，之后的复制、编码和写入都只处理变换后的
+    较小帧。裁剪只产生视图，缩放和颜色转换写入复用的缓冲区，不会每帧分配内存。
+    """
+
+    def __init__(self, roi=None, output_size=None, color="bgr"):
+        """初始化帧变换
+
+        Args:
+            roi: 裁剪区域 (x, y, 宽, 高)，按原始帧像素，None表示不裁剪
+            output_size: 输出尺寸 (宽, 高)，None表示保持裁剪后的尺寸
+            color: 颜色转换，见COLOR_MODES
+        """
+        if color not in COLOR_MODES:
+            raise ValueError(f"未知的颜色转换: {color}")
+        self.roi = tuple(int(v) for v in roi) if roi else None
+        self.output_size = tuple(int(v) for v in output_size) if output_size else None
+        self.color = color
+        self._resize_buffer = None
+        self._color_buffer = None
+
+    def __getstate__(self):
+        # 发送到录制子进程时不携带缓冲区
+        state = self.__dict__.copy()
+        state["_resize_buffer"] = None
+        state["_color_buffer"] = None
+        return state
+
+    @property
+    def is_identity(self):
+        return self.roi is None and self.output_size is None and self.color == "bgr"
+
+    def _clipped_roi(self, width, height):
+        """把ROI限制在帧范围内，返回 (x, y, 宽, 高)"""
+        if self.roi is None:
+            return 0, 0, width, height
+        x, y, w, h = self.roi
+        x = min(max(x, 0), width - 1)
+        y = min(max(y, 0), height - 1)
+        return x, y, max(1, min(w, width - x)), max(1, min(h, height - y))
+
+    def output_frame_size(self, width, height):
+        """给定原始帧尺寸，返回变换后的帧尺寸 (宽, 高)"""
+        if self.output_size is not None:
+            return self.output_size
+        _, _, w, h = self._clipped_roi(width, height)
+        return w, h
+
+    @property
+    def channels(self):
+        return 1 if self.color == "gray" else 3
+
+    def apply(self, frame):
+        """对一帧执行变换，返回的数组可能引用原帧或内部缓冲区，调用方需在下一帧前使用完毕"""
+        height, width = frame.shape[:2]
+        x, y, w, h = self._clipped_roi(width, height)
+        result = frame[y:y + h, x:x + w]
+
+        if self.output_size is not None and self.output_size != (w, h):
+            out_w, out_h = self.output_size
+            shape = (out_h, out_w) + frame.shape[2:]
+            if self._resize_buffer is None or self._resize_buffer.shape != shape:
+                self._resize_buffer = np.empty(shape, dtype=frame.dtype)
+            interpolation = cv2.INTER_AREA if out_w < w else cv2.INTER_LINEAR
+            cv2.resize(result, (out_w, out_h), dst=self._resize_buffer, interpolation=interpolation)
+            result = self._resize_buffer
+
+        if self.color == "gray" and result.ndim == 3:
+            shape = result.shape[:2]
+            if self._color_buffer is None or self._color_buffer.shape != shape:
+                self._color_buffer = np.empty(shape, dtype=frame.dtype)
+            cv2.cvtColor(result, cv2.COLOR_BGR2GRAY, dst=self._color_buffer)
+            result = self._color_buffer
+        return result
+
+    def describe(self, width=None, height=None):
+        """返回写入录制信息的变换描述"""
+        description = {
+            "roi": list(self.roi) if self.roi else None,
+            "output_size": list(self.output_size) if self.output_size else None,
+            "color": self.color,
+        }
+        if width and height:
+            description["source_size"] = [width, height]
+            description["applied_roi"] = list(self._clipped_roi(width, height))
+            description["output_frame_size"] = list(self.output_frame_size(width, height))
+        return description
+
+    @staticmethod
+    def recording_size(transform, size):
+        """给定原始帧尺寸 (宽, 高)，返回写入文件的 (宽, 高, 通道)，transform可为None"""
+        if transform is None or transform.is_identity:
+            return tuple(size) + (3,)
+        return transform.output_frame_size(*size) + (transform.channels,)
+
+    @classmethod
+    def from_dict(cls, data):
+        """从describe()的结果重建变换"""
+        return cls(roi=data.get("roi"), output_size=data.get("output_size"), color=data.get("color", "bgr"))
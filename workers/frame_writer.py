@@ -0,0 +1,86 @@
+import os
+import time
+import traceback
+from PyQt5.QtCore import QThread, pyqtSignal
+
+class FrameWriter(QThread):
+    """编码线程：从环形缓冲区取帧并写入视频文件
+
+    与采集线程解耦，编码或磁盘写入变慢时只会让缓冲区排队，不会阻塞采集。
+    缓冲区关闭后会先写完剩余的帧再退出。缓冲区中每帧附带
+    (采集序号, 采集单调时钟ns, 墙上时钟ns)，用于写入时间戳附属文件和时间轴校正。
+    """
+    error = pyqtSignal(str, int)
+
+    def __init__(self, camera_id, frame_buffer, video_writer, timestamp_sidecar=None,
+                 timeline_corrector=None, telemetry=None, parent=None):
+        super().__init__(parent)
+        self.camera_id = camera_id
+        self.frame_buffer = frame_buffer
+        self.video_writer = video_writer
+        self.timestamp_sidecar = timestamp_sidecar  # 逐帧时间戳附属文件，可为None
+        self.timeline_corrector = timeline_corrector  # 按实际时间补帧/丢帧，可为None
+        self.telemetry = telemetry  # 记录每帧编码耗时的RecordingTelemetry，可为None
+        self.frames_written = 0  # 已写入文件的帧数
+        self.frames_received = 0  # 从缓冲区取出的帧数
+        self.first_capture_ns = None  # 第一帧的采集时间
+        self.last_capture_ns = None  # 最后一帧的采集时间
+
+    def run(self):
+        try:
+            while True:
+                item = self.frame_buffer.get(timeout=0.5)
+                if item is None:
+                    if self.frame_buffer.closed and self.frame_buffer.queued == 0:
+                        break
+                    continue
+
+                frame, meta = item
+                self.write_frame(frame, meta)
+                self.frame_buffer.release()
+        except Exception as e:
+            print(f"摄像头 {self.camera_id} 写入视频失败: {str(e)}\n{traceback.format_exc()}")
+            self.error.emit(f"写入视频失败: {str(e)}", self.camera_id)
+            # 关闭缓冲区，避免采集线程在阻塞策略下一直等待
+            self.frame_buffer.close()
+        finally:
+            self.frame_buffer.release()
+            if self.timestamp_sidecar is not None:
+                self.timestamp_sidecar.close()
+
+    def write_frame(self, frame, meta):
+        """写入一帧及其时间戳，启用时间轴校正时可能重复写入或丢弃"""
+        self.frames_received += 1
+        capture_ns = wall_ns = None
+        if meta is not None:
+            _, capture_ns, wall_ns = meta
+            if self.first_capture_ns is None:
+                self.first_capture_ns = capture_ns
+            self.last_capture_ns = capture_ns
+
+        repeats = 1
+        if self.timeline_corrector is not None and capture_ns is not None:
+            repeats = self.timeline_corrector.repeats_for(capture_ns)
+
+        for _ in range(repeats):
+            write_start_ns = time.perf_counter_ns()
+            self.video_writer.write(frame)
+            if self.telemetry is not None:
+                self.telemetry.record_encode(time.perf_counter_ns() - write_start_ns)
+            if self.timestamp_sidecar is not None and capture_ns is not None:
+                self.timestamp_sidecar.write(self.frames_written, capture_ns, wall_ns)
+            self.frames_written += 1
+
+    def stats(self):
+        """返回编码线程的统计信息"""
+        stats = {"frames_written": self.frames_written}
+        if self.first_capture_ns is not None and self.last_capture_ns > self.first_capture_ns:
+            # 由采集时间戳计算的实际帧率（不含补帧）
+            span = (self.last_capture_ns - self.first_capture_ns) / 1e9
+            stats["measured_fps"] = round((self.frames_received - 1) / span, 3)
+        if self.timeline_corrector is not None:
+            stats["duplicated_frames"] = self.timeline_corrector.duplicated_frames
+            stats["skipped_frames"] = self.timeline_corrector.skipped_frames
+        if self.timestamp_sidecar is not None:
+            stats["timestamps_file"] = os.path.basename(self.timestamp_sidecar.path)
+        return stats
@@ -0,0 +1,286 @@
+import time
+import queue
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+import cv2
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+
+# 交接槽头部：[序号, 采集单调时钟ns, 高, 宽, 通道]，序号为奇数表示正在写入
+SLOT_HEADER_FIELDS = 5
+SLOT_HEADER_BYTES = 64
+# 交接区域降采样后的最大尺寸 (高, 宽)，只用于求区域均值，不需要完整分辨率
+SLOT_MAX_SIZE = (120, 160)
+
+# 心率频段（Hz），对应 42-240 次/分
+HEART_RATE_BAND = (0.7, 4.0)
+# 频谱分析前把曲线重采样到的均匀采样率（Hz）
+RESAMPLE_RATE = 30.0
+# 至少积累该时长（秒）的曲线才计算主频
+MIN_ANALYSIS_SECONDS = 5.0
+# 发送给界面的曲线点数上限
+TRACE_POINTS = 150
+
+
+def default_live_roi(width, height):
+    """未指定ROI时使用画面中央一半宽高的区域"""
+    return width // 4, height // 4, width // 2, height // 2
+
+
+class LatestFrameSlot:
+    """单生产者的最新帧交接槽（共享内存 + 序号锁）
+
+    采集线程每帧把降采样后的分析区域覆盖写入槽中，不等待、不排队；读取方在复制前后
+    比较序号，读到写入中途的数据直接丢弃，下次再读最新一帧。槽大小固定，可跨进程使用。
+    """
+
+    def __init__(self, name=None):
+        """创建或打开交接槽
+
+        Args:
+            name: 共享内存名称，None表示新建（创建方负责删除）
+        """
+        self.owner = name is None
+        size = SLOT_HEADER_BYTES + SLOT_MAX_SIZE[0] * SLOT_MAX_SIZE[1] * 3
+        self.shm = shared_memory.SharedMemory(name=name, create=self.owner, size=size if self.owner else 0)
+        self._header = np.ndarray((SLOT_HEADER_FIELDS,), dtype=np.int64, buffer=self.shm.buf)
+        if self.owner:
+            self._header[:] = 0
+        self._last_seq = 0
+        self._read_buffer = None
+
+    @property
+    def name(self):
+        return self.shm.name
+
+    def publish(self, frame, capture_ns, roi=None):
+        """写入一帧的分析区域（在采集线程中调用，只做一次跨步复制）
+
+        Args:
+            frame: 原始帧
+            capture_ns: 采集单调时钟
+            roi: 分析区域 (x, y, 宽, 高)，None表示画面中央区域
+        """
+        height, width = frame.shape[:2]
+        x, y, w, h = roi or default_live_roi(width, height)
+        region = frame[max(y, 0):min(y + h, height), max(x, 0):min(x + w, width)]
+        if region.size == 0:
+            return
+        step = max(1, -(-region.shape[0] // SLOT_MAX_SIZE[0]), -(-region.shape[1] // SLOT_MAX_SIZE[1]))
+        region = region[::step, ::step]
+
+        header = self._header
+        header[0] += 1
+        target = np.ndarray(region.shape, dtype=np.uint8, buffer=self.shm.buf, offset=SLOT_HEADER_BYTES)
+        np.copyto(target, region)
+        header[1] = capture_ns
+        header[2] = region.shape[0]
+        header[3] = region.shape[1]
+        header[4] = region.shape[2] if region.ndim == 3 else 1
+        header[0] += 1
+
+    def read(self):
+        """读取上次读取之后发布的最新区域
+
+        Returns:
+            tuple: (采集单调时钟ns, 区域数组)，没有新帧或读到写入中途的数据时返回None。
+            区域数组是复用的缓冲区，下次读取前有效。
+        """
+        header = self._header
+        seq = int(header[0])
+        if seq == self._last_seq or seq % 2:
+            return None
+        capture_ns = int(header[1])
+        h, w, channels = (int(v) for v in header[2:5])
+        shape = (h, w, channels) if channels > 1 else (h, w)
+        if self._read_buffer is None or self._read_buffer.shape != shape:
+            self._read_buffer = np.empty(shape, dtype=np.uint8)
+        np.copyto(self._read_buffer, np.ndarray(shape, dtype=np.uint8, buffer=self.shm.buf, offset=SLOT_HEADER_BYTES))
+        if int(header[0]) != seq:
+            return None
+        self._last_seq = seq
+        return capture_ns, self._read_buffer
+
+    def close(self):
+        """关闭交接槽，创建方同时删除共享内存"""
+        self._header = None
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class RollingColorTrace:
+    """滚动窗口内的区域颜色均值曲线及其主频"""
+
+    def __init__(self, window_seconds=20.0, max_rate=120):
+        """初始化曲线
+
+        Args:
+            window_seconds: 分析窗口长度（秒）
+            max_rate: 预计的最大采样率，用于预分配环形数组
+        """
+        self.window_ns = int(window_seconds * 1e9)
+        capacity = int(window_seconds * max_rate)
+        self._times = np.zeros(capacity, dtype=np.int64)
+        self._values = np.zeros((capacity, 3), dtype=np.float64)
+        self._next = 0
+        self._count = 0
+
+    def append(self, capture_ns, region):
+        """加入一个采样点：区域的B/G/R均值"""
+        means = cv2.mean(region)
+        index = self._next
+        self._times[index] = capture_ns
+        self._values[index] = means[:3] if region.ndim == 3 else (means[0],) * 3
+        self._next = (index + 1) % len(self._times)
+        self._count = min(self._count + 1, len(self._times))
+
+    def _window(self):
+        """按时间顺序返回窗口内的采样点"""
+        order = (np.arange(self._count) + self._next - self._count) % len(self._times)
+        times, values = self._times[order], self._values[order]
+        keep = times >= times[-1] - self.window_ns if self._count else slice(0)
+        return times[keep], values[keep]
+
+    def analyze(self):
+        """计算窗口内绿色通道曲线的主频
+
+        曲线先按时间戳重采样到均匀网格（交接槽只保留最新帧，分析进程跟不上时会漏采样），
+        归一化并去除线性趋势后加汉宁窗做rFFT，在心率频段内取功率最大的频率。
+
+        Returns:
+            dict: 统计信息，数据不足时只包含采样点数和时长
+        """
+        times, values = self._window()
+        duration = float(times[-1] - times[0]) / 1e9 if len(times) > 1 else 0.0
+        result = {"samples": len(times), "duration_seconds": duration,
+                  "sample_rate": (len(times) - 1) / duration if duration > 0 else 0.0}
+        if duration < MIN_ANALYSIS_SECONDS:
+            return result
+
+        seconds = (times - times[0]) / 1e9
+        grid = np.arange(0.0, seconds[-1], 1.0 / RESAMPLE_RATE)
+        green = np.interp(grid, seconds, values[:, 1])
+        mean = green.mean()
+        if mean <= 0:
+            return result
+        signal = green / mean - 1.0
+        signal -= np.polyval(np.polyfit(grid, signal, 1), grid)
+
+        # 补零到至少2048点，频率分辨率约0.9次/分
+        n_fft = max(2048, 1 << (len(signal) - 1).bit_length())
+        power = np.abs(np.fft.rfft(signal * np.hanning(len(signal)), n=n_fft)) ** 2
+        freqs = np.fft.rfftfreq(n_fft, 1.0 / RESAMPLE_RATE)
+        band = (freqs >= HEART_RATE_BAND[0]) & (freqs <= HEART_RATE_BAND[1])
+        band_power = power[band]
+        peak = int(np.argmax(band_power))
+        frequency = float(freqs[band][peak])
+        # 主峰附近±0.1Hz的功率占频段总功率的比例，作为信号质量
+        near_peak = np.abs(freqs[band] - frequency) <= 0.1
+        total = band_power.sum()
+
+        step = max(1, len(signal) // TRACE_POINTS)
+        result.update({
+            "frequency_hz": frequency,
+            "bpm": frequency * 60.0,
+            "peak_ratio": float(band_power[near_peak].sum() / total) if total > 0 else 0.0,
+            "trace": signal[::step][-TRACE_POINTS:].tolist(),
+        })
+        return result
+
+
+def run_rppg_worker(command_queue, result_queue, window_seconds=20.0, update_interval=1.0):
+    """rPPG分析进程入口：轮询各摄像头的交接槽，定期发送每个摄像头的主频统计"""
+    slots = {}
+    traces = {}
+    next_update = time.monotonic() + update_interval
+    try:
+        while True:
+            try:
+                while True:
+                    command, *args = command_queue.get_nowait()
+                    if command == "add":
+                        camera_id, slot_name = args
+                        if camera_id in slots:
+                            slots.pop(camera_id).close()
+                        try:
+                            slots[camera_id] = LatestFrameSlot(slot_name)
+                        except FileNotFoundError:
+                            # 采集线程已关闭该交接槽
+                            continue
+                        traces[camera_id] = RollingColorTrace(window_seconds)
+                    elif command == "remove":
+                        if args[0] in slots:
+                            slots.pop(args[0]).close()
+                            traces.pop(args[0], None)
+                    elif command == "stop":
+                        return
+            except queue.Empty:
+                pass
+
+            for camera_id, slot in slots.items():
+                sample = slot.read()
+                if sample is not None:
+                    traces[camera_id].append(*sample)
+
+            now = time.monotonic()
+            if now >= next_update:
+                next_update = now + update_interval
+                for camera_id, trace in traces.items():
+                    result_queue.put((camera_id, trace.analyze()))
+            time.sleep(0.005)
+    except Exception as e:
+        print(f"rPPG分析进程异常: {str(e)}\n{traceback.format_exc()}")
+    finally:
+        for slot in slots.values():
+            slot.close()
+
+
+class LiveRppgMonitor(QThread):
+    """实时rPPG预览：在独立进程中分析所有摄像头的最新帧，结果以信号发送给界面
+
+    录制线程（或录制子进程）创建各自的交接槽并每帧覆盖写入，分析进程只读取最新一帧，
+    分析再慢也不会阻塞采集循环。
+    """
+    rppg_updated = pyqtSignal(int, dict)  # 摄像头ID和主频统计
+
+    def __init__(self, window_seconds=20.0, update_interval=1.0, parent=None):
+        super().__init__(parent)
+        self.window_seconds = window_seconds
+        self.update_interval = update_interval
+        self.running = False
+        self._context = multiprocessing.get_context("spawn")
+        self._commands = self._context.Queue()
+        self._results = self._context.Queue()
+        self.process = None
+
+    def run(self):
+        self.running = True
+        self.process = self._context.Process(
+            target=run_rppg_worker,
+            args=(self._commands, self._results, self.window_seconds, self.update_interval),
+            daemon=True)
+        self.process.start()
+        try:
+            while self.running and self.process.is_alive():
+                try:
+                    camera_id, result = self._results.get(timeout=0.1)
+                except queue.Empty:
+                    continue
+                self.rppg_updated.emit(camera_id, result)
+        finally:
+            self.running = False
+            self.process.join(timeout=5)
+
+    def set_slot(self, camera_id, slot_name):
+        """录制端的交接槽变化时调用，名称为空表示该摄像头已停止实时分析"""
+        if slot_name:
+            self._commands.put(("add", camera_id, slot_name))
+        else:
+            self._commands.put(("remove", camera_id))
+
+    def stop(self):
+        self._commands.put(("stop",))
+        self.running = False
+        self.wait()
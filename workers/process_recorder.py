@@ -0,0 +1,358 @@
+import time
+import queue
+import traceback
+import multiprocessing
+from multiprocessing import shared_memory
+import numpy as np
+from PyQt5.QtCore import QThread, QCoreApplication, QTimer, pyqtSignal
+from workers.video_recorder import VideoRecorder
+from workers.frame_pool import FramePool
+from workers.recording_trigger import SharedRecordingTrigger
+from workers.frame_transform import FrameTransform
+from workers.frame_counter import FrameCounter, COUNTER_INITIAL
+
+# 预览共享内存的头部：[序号, 已录制帧数, 高, 宽, 通道]，序号为奇数表示正在写入
+PREVIEW_HEADER_FIELDS = 5
+PREVIEW_HEADER_BYTES = 64
+
+# 录制设置中随预备/开始命令发送给子进程的属性
+RECORDER_SETTINGS = ("output_path", "custom_fps", "pacing", "timeline_correction", "recording_format",
+                     "buffer_depth", "backpressure_policy", "segment_seconds", "segment_mb", "frame_transform")
+
+
+class _SharedMemoryRecorder(VideoRecorder):
+    """子进程中运行的录制线程：预览帧写入共享内存，状态变化通过事件队列通知主进程"""
+
+    def __init__(self, camera_id, output_path, event_queue, **kwargs):
+        super().__init__(camera_id, output_path, **kwargs)
+        self.event_queue = event_queue
+        self.preview_shm = None
+        self._preview_header = None
+
+    def _emit_preview(self, frame):
+        """发布已录制帧数，并按预览帧率覆盖共享内存中的最新预览帧
+
+        主进程只读取最新一帧，不需要等待界面确认。
+        """
+        if self.preview_shm is None:
+            self._create_preview_shm(frame)
+        header = self._preview_header
+        header[1] = self.frame_count
+
+        now = time.monotonic()
+        if self.preview_fps <= 0 or now - self._last_preview_time < 1.0 / self.preview_fps:
+            return
+        self._last_preview_time = now
+
+        preview = self._make_preview(frame)
+        h, w = preview.shape[:2]
+        channels = preview.shape[2] if preview.ndim == 3 else 1
+        header[0] += 1
+        target = np.ndarray(preview.shape, dtype=np.uint8, buffer=self.preview_shm.buf, offset=PREVIEW_HEADER_BYTES)
+        np.copyto(target, preview)
+        header[2:5] = (h, w, channels)
+        header[0] += 1
+
+    def _create_preview_shm(self, frame):
+        """按完整帧大小创建预览共享内存（预览尺寸不会超过原始帧）"""
+        self.preview_shm = shared_memory.SharedMemory(create=True, size=PREVIEW_HEADER_BYTES + frame.nbytes)
+        self._preview_header = np.ndarray((PREVIEW_HEADER_FIELDS,), dtype=np.int64, buffer=self.preview_shm.buf)
+        self._preview_header[:] = 0
+        self.event_queue.put(("preview_shm", self.preview_shm.name, (frame.shape[1], frame.shape[0])))
+
+    def _begin_recording(self, start_ns):
+        super()._begin_recording(start_ns)
+        self.event_queue.put(("recording", self.start_time))
+
+    def close_preview(self):
+        """释放并删除预览共享内存"""
+        if self.preview_shm is not None:
+            self._preview_header = None
+            self.preview_shm.close()
+            self.preview_shm.unlink()
+            self.preview_shm = None
+
+
+def _apply_settings(recorder, settings):
+    for name, value in settings.items():
+        setattr(recorder, name, value)
+
+
+def _process_commands(recorder, command_queue, trigger):
+    """在子进程主线程中处理主进程发来的命令"""
+    while True:
+        try:
+            command, *args = command_queue.get_nowait()
+        except queue.Empty:
+            return
+
+        if command == "arm":
+            settings, duration, subject_name = args
+            _apply_settings(recorder, settings)
+            if not recorder.arm(duration=duration, subject_name=subject_name, trigger=trigger):
+                recorder.event_queue.put(("armed", False))
+        elif command == "disarm":
+            recorder.disarm()
+        elif command == "start_recording":
+            settings, duration, subject_name = args
+            _apply_settings(recorder, settings)
+            if not recorder.start_recording(duration=duration, subject_name=subject_name):
+                recorder.event_queue.put(("error", "无法开始录制"))
+        elif command == "stop_recording":
+            recorder.stop_recording()
+        elif command == "preview":
+            recorder.preview_fps, recorder.preview_size = args
+        elif command == "live_analysis":
+            recorder.set_live_analysis(*args)
+        elif command == "stop":
+            recorder.running = False
+            recorder.recording = False
+            recorder.armed = False
+
+
+def run_camera_process(camera_id, output_path, fps, preview_fps, command_queue, event_queue, trigger_times,
+                       counter_values, source=None):
+    """录制子进程入口：在独立进程中运行采集、编码和写入"""
+    try:
+        app = QCoreApplication([])
+        trigger = SharedRecordingTrigger(trigger_times)
+        recorder = _SharedMemoryRecorder(camera_id, output_path, event_queue, fps=fps, preview_fps=preview_fps,
+                                         source=source)
+        recorder.counter = FrameCounter(counter_values)
+        recorder.error.connect(lambda error_msg, _: event_queue.put(("error", error_msg)))
+        recorder.armed_changed.connect(lambda _, ok: event_queue.put(("armed", ok)))
+        recorder.recording_finished.connect(lambda _, info: event_queue.put(("finished", info)))
+        recorder.telemetry_updated.connect(lambda _, stats: event_queue.put(("telemetry", stats)))
+        recorder.live_slot_changed.connect(lambda _, name: event_queue.put(("live_slot", name)))
+        recorder.finished.connect(app.quit)
+
+        timer = QTimer()
+        timer.timeout.connect(lambda: _process_commands(recorder, command_queue, trigger))
+        timer.start(10)
+
+        recorder.start()
+        app.exec_()
+        recorder.wait()
+        recorder.close_preview()
+    except Exception as e:
+        print(f"摄像头 {camera_id} 录制进程异常: {str(e)}\n{traceback.format_exc()}")
+        event_queue.put(("error", f"录制进程异常: {str(e)}"))
+
+
+class ProcessVideoRecorder(QThread):
+    """多进程录制后端：每个摄像头的采集和编码在独立进程中运行
+
+    对界面提供与VideoRecorder相同的信号和方法。本线程只负责转发命令、接收子进程事件，
+    并从共享内存读取最新的预览帧，多个摄像头不再争用主进程的GIL。
+    多摄像头同步采集组基于线程屏障，不适用于本后端。
+    """
+    update_frame = pyqtSignal(np.ndarray, int)
+    error = pyqtSignal(str, int)
+    recording_finished = pyqtSignal(int, dict)
+    armed_changed = pyqtSignal(int, bool)
+    telemetry_updated = pyqtSignal(int, dict)
+    live_slot_changed = pyqtSignal(int, str)
+
+    def __init__(self, camera_id, output_path, fps=30, subject_name="", parent=None, preview_fps=15, **kwargs):
+        super().__init__(parent)
+        self.camera_id = camera_id
+        self.output_path = output_path
+        self.subject_name = subject_name
+        self.custom_fps = fps
+        self.pacing = True
+        self.timeline_correction = kwargs.get("timeline_correction", False)
+        self.recording_format = kwargs.get("recording_format", "xvid")
+        self.buffer_depth = kwargs.get("buffer_depth", 32)
+        self.backpressure_policy = kwargs.get("backpressure_policy", "block")
+        self.segment_seconds = 0
+        self.source = kwargs.get("source")  # 采集源描述，在子进程中打开
+        self.frame_transform = None
+        self.segment_mb = 0
+        self.sync_group = None  # 仅为与VideoRecorder接口一致，不参与同步采集
+        self.running = False
+        self.recording = False
+        self.armed = False
+        self.start_time = None
+        self.trigger = None  # 界面共享的RecordingTrigger，由本线程同步到子进程
+        self._preview_fps = preview_fps
+        self.preview_size = (320, 240)
+        self._preview_pending = False
+        self._preview_pool = FramePool()
+        self._preview_shm = None
+        self._preview_header = None
+        self._last_preview_seq = 0
+        self._frame_size = None
+
+        self._context = multiprocessing.get_context("spawn")
+        self._commands = self._context.Queue()
+        self._events = self._context.Queue()
+        self._trigger_times = self._context.Array("q", [-1, -1], lock=False)
+        self._shared_trigger = SharedRecordingTrigger(self._trigger_times)
+        # 子进程录制线程发布的帧计数快照，主进程直接读取
+        self._counter_values = self._context.Array("q", COUNTER_INITIAL, lock=False)
+        self.counter = FrameCounter(self._counter_values)
+        self.process = None
+
+    @property
+    def preview_fps(self):
+        return self._preview_fps
+
+    @preview_fps.setter
+    def preview_fps(self, value):
+        self._preview_fps = value
+        self._commands.put(("preview", self._preview_fps, self.preview_size))
+
+    @property
+    def frame_count(self):
+        """子进程已录制的帧数（从共享内存读取）"""
+        header = self._preview_header
+        return int(header[1]) if header is not None else 0
+
+    def snapshot(self):
+        """读取子进程录制线程的帧计数快照"""
+        return self.counter.snapshot()
+
+    def run(self):
+        self.running = True
+        self.process = self._context.Process(
+            target=run_camera_process,
+            args=(self.camera_id, self.output_path, self.custom_fps, self._preview_fps,
+                  self._commands, self._events, self._trigger_times, self._counter_values, self.source),
+            daemon=True)
+        self.process.start()
+
+        try:
+            while True:
+                self._sync_trigger()
+                try:
+                    self._handle_event(self._events.get(timeout=0.005))
+                except queue.Empty:
+                    if not self.process.is_alive():
+                        break
+                self._poll_preview()
+        finally:
+            self.running = False
+            self.process.join(timeout=5)
+            self._close_preview()
+
+    def _sync_trigger(self):
+        """把界面设定的开始/停止时刻同步到子进程可读的共享数组"""
+        trigger = self.trigger
+        if trigger is not None:
+            self._shared_trigger.start_ns = trigger.start_ns
+            self._shared_trigger.stop_ns = trigger.stop_ns
+
+    def _handle_event(self, event):
+        kind, *args = event
+        if kind == "preview_shm":
+            name, self._frame_size = args
+            self._preview_shm = shared_memory.SharedMemory(name=name)
+            self._preview_header = np.ndarray((PREVIEW_HEADER_FIELDS,), dtype=np.int64, buffer=self._preview_shm.buf)
+        elif kind == "armed":
+            self.armed = args[0]
+            self.armed_changed.emit(self.camera_id, args[0])
+        elif kind == "recording":
+            self.start_time = args[0]
+            self.armed = False
+            self.recording = True
+        elif kind == "finished":
+            self.recording = False
+            self.trigger = None
+            self.recording_finished.emit(self.camera_id, args[0])
+        elif kind == "telemetry":
+            self.telemetry_updated.emit(self.camera_id, args[0])
+        elif kind == "live_slot":
+            self.live_slot_changed.emit(self.camera_id, args[0])
+        elif kind == "error":
+            self.error.emit(args[0], self.camera_id)
+
+    def _poll_preview(self):
+        """读取共享内存中的最新预览帧，界面处理完上一帧后才发送"""
+        header = self._preview_header
+        if header is None or self._preview_pending:
+            return
+        seq = int(header[0])
+        if seq == self._last_preview_seq or seq % 2:
+            return
+        h, w, channels = (int(v) for v in header[2:5])
+        shape = (h, w, channels) if channels > 1 else (h, w)
+        source = np.ndarray(shape, dtype=np.uint8, buffer=self._preview_shm.buf, offset=PREVIEW_HEADER_BYTES)
+        frame = self._preview_pool.acquire(shape)
+        np.copyto(frame, source)
+        # 复制期间子进程写入了新帧则丢弃本次读取
+        if int(header[0]) != seq:
+            return
+        self._last_preview_seq = seq
+        self._preview_pending = True
+        self.update_frame.emit(frame, self.camera_id)
+
+    def _close_preview(self):
+        if self._preview_shm is not None:
+            self._preview_header = None
+            self._preview_shm.close()
+            self._preview_shm = None
+
+    def _settings(self):
+        return {name: getattr(self, name) for name in RECORDER_SETTINGS}
+
+    def frame_size(self):
+        """返回摄像头帧尺寸 (宽, 高)，子进程尚未采集到帧时返回None"""
+        return self._frame_size
+
+    def recording_frame_size(self):
+        """返回写入文件的帧尺寸 (宽, 高, 通道)，子进程尚未采集到帧时返回None"""
+        size = self._frame_size
+        return FrameTransform.recording_size(self.frame_transform, size) if size else None
+
+    def set_preview_size(self, width, height):
+        if width > 0 and height > 0 and (width, height) != self.preview_size:
+            self.preview_size = (width, height)
+            self._commands.put(("preview", self._preview_fps, self.preview_size))
+
+    def preview_consumed(self):
+        self._preview_pending = False
+
+    def set_live_analysis(self, enabled, roi=None):
+        """开启或关闭子进程中的实时rPPG最新帧发布"""
+        self._commands.put(("live_analysis", enabled, roi))
+
+    def arm(self, duration=0, subject_name="", trigger=None):
+        """请求子进程预先打开写入器，完成后发出armed_changed信号"""
+        if not self.running or self._frame_size is None or self.recording or self.armed:
+            return False
+        # 先同步新的触发时刻，避免子进程按上一次录制的时刻立即开始
+        self.trigger = trigger
+        self._shared_trigger.start_ns = trigger.start_ns if trigger is not None else None
+        self._shared_trigger.stop_ns = trigger.stop_ns if trigger is not None else None
+        self.subject_name = subject_name
+        self._commands.put(("arm", self._settings(), duration, subject_name))
+        return True
+
+    def disarm(self):
+        self._commands.put(("disarm",))
+        self.armed = False
+        self.trigger = None
+
+    def start_recording(self, duration=0, subject_name=""):
+        """请求子进程立即开始录制"""
+        if not self.running or self._frame_size is None:
+            return False
+        self.trigger = None
+        self._shared_trigger.start_ns = None
+        self._shared_trigger.stop_ns = None
+        self.subject_name = subject_name
+        self._commands.put(("start_recording", self._settings(), duration, subject_name))
+        return True
+
+    def stop_recording(self):
+        """请求子进程停止录制，录制信息通过recording_finished信号返回"""
+        if not self.recording:
+            return
+        self.recording = False
+        self._commands.put(("stop_recording",))
+
+    def stop(self):
+        self._commands.put(("stop",))
+        self.recording = False
+        self.armed = False
+        self.wait()
@@ -0,0 +1,152 @@
+import csv
+import time
+import threading
+from array import array
+from collections import deque
+import numpy as np
+
+# 遥测时间序列文件的列
+TELEMETRY_FIELDS = ("elapsed_s", "wall_time", "capture_fps", "encode_p50_ms", "encode_p99_ms",
+                    "queued_frames", "dropped_frames", "frames_written", "disk_mb_per_s")
+
+
+class RecordingTelemetry:
+    """单个摄像头的录制遥测
+
+    采集线程记录每帧的采集时间，编码线程记录每帧的编码耗时；采集线程按固定间隔
+    调用sample()汇总滑动窗口内的统计。录制期间每次汇总追加一行到CSV时间序列文件。
+    """
+
+    def __init__(self, interval=1.0, window=2.0):
+        """初始化遥测收集器
+
+        Args:
+            interval: 汇总间隔（秒）
+            window: 计算采集帧率的滑动窗口（秒）
+        """
+        self.interval_ns = int(interval * 1e9)
+        self.window_ns = int(window * 1e9)
+        self._lock = threading.Lock()
+        self._capture_times = deque()  # 窗口内各帧的采集单调时钟
+        self._encode_ms = array("d")  # 上次汇总以来各帧的编码耗时
+        self._last_sample_ns = None
+        self._last_bytes = 0
+        self._log_file = None
+        self._log_writer = None
+        self._log_start_ns = None
+        self._log_encode_ms = array("d")  # 录制期间全部编码耗时，用于最终摘要
+        self.log_path = None
+        self.latest = {}
+
+    def record_capture(self, capture_ns):
+        """记录一帧的采集时间（采集线程调用）"""
+        times = self._capture_times
+        times.append(capture_ns)
+        while times and capture_ns - times[0] > self.window_ns:
+            times.popleft()
+
+    def record_encode(self, duration_ns):
+        """记录一帧的编码写入耗时（编码线程调用）"""
+        duration_ms = duration_ns / 1e6
+        with self._lock:
+            self._encode_ms.append(duration_ms)
+            if self._log_writer is not None:
+                self._log_encode_ms.append(duration_ms)
+
+    def due(self, now_ns):
+        """是否到了下一次汇总的时间"""
+        return self._last_sample_ns is None or now_ns - self._last_sample_ns >= self.interval_ns
+
+    def sample(self, now_ns, frame_buffer=None, frame_writer=None, video_writer=None):
+        """汇总当前统计，录制期间同时追加到时间序列文件
+
+        Args:
+            now_ns: 当前单调时钟
+            frame_buffer: 录制中的环形缓冲区，可为None
+            frame_writer: 录制中的编码线程，可为None
+            video_writer: 录制中的视频写入器，可为None
+
+        Returns:
+            dict: 本次汇总的统计
+        """
+        times = self._capture_times
+        capture_fps = 0.0
+        if len(times) > 1 and times[-1] > times[0]:
+            capture_fps = (len(times) - 1) * 1e9 / (times[-1] - times[0])
+
+        with self._lock:
+            encode_ms, self._encode_ms = np.frombuffer(self._encode_ms, dtype=np.float64), array("d")
+
+        bytes_written = video_writer.bytes_written if video_writer is not None else 0
+        disk_mb_per_s = 0.0
+        if self._last_sample_ns is not None and now_ns > self._last_sample_ns and bytes_written >= self._last_bytes:
+            disk_mb_per_s = (bytes_written - self._last_bytes) / 1e6 / ((now_ns - self._last_sample_ns) / 1e9)
+        self._last_sample_ns = now_ns
+        self._last_bytes = bytes_written
+
+        stats = {
+            "capture_fps": round(capture_fps, 2),
+            "encode_p50_ms": round(float(np.percentile(encode_ms, 50)), 3) if len(encode_ms) else 0.0,
+            "encode_p99_ms": round(float(np.percentile(encode_ms, 99)), 3) if len(encode_ms) else 0.0,
+            "queued_frames": frame_buffer.queued if frame_buffer is not None else 0,
+            "dropped_frames": frame_buffer.dropped_frames if frame_buffer is not None else 0,
+            "frames_written": frame_writer.frames_written if frame_writer is not None else 0,
+            "disk_mb_per_s": round(disk_mb_per_s, 3),
+        }
+        self.latest = stats
+
+        # 录制可能在其他线程中结束，写入与关闭文件需互斥
+        with self._lock:
+            if self._log_writer is not None:
+                self._log_writer.writerow({
+                    "elapsed_s": round((now_ns - self._log_start_ns) / 1e9, 3),
+                    "wall_time": time.strftime("%Y-%m-%d %H:%M:%S"),
+                    **stats,
+                })
+                self._log_file.flush()
+        return stats
+
+    @property
+    def is_logging(self):
+        """是否正在写入时间序列文件"""
+        return self._log_file is not None
+
+    def start_log(self, path, start_ns=None):
+        """开始把汇总写入CSV时间序列文件
+
+        Args:
+            path: CSV文件路径
+            start_ns: elapsed_s列的时间起点（单调时钟ns），默认为当前时间
+        """
+        self.stop_log()
+        log_file = open(path, "w", newline="", encoding="utf-8")
+        log_writer = csv.DictWriter(log_file, fieldnames=TELEMETRY_FIELDS)
+        log_writer.writeheader()
+        with self._lock:
+            self._log_file = log_file
+            self._log_writer = log_writer
+            self._log_start_ns = start_ns if start_ns is not None else time.monotonic_ns()
+            self._log_encode_ms = array("d")
+        self._last_bytes = 0
+        self.log_path = path
+
+    def stop_log(self):
+        """关闭时间序列文件
+
+        Returns:
+            dict: 录制期间编码耗时的摘要
+        """
+        with self._lock:
+            log_file, self._log_file = self._log_file, None
+            self._log_writer = None
+            encode_ms = np.frombuffer(self._log_encode_ms, dtype=np.float64)
+            self._log_encode_ms = array("d")
+        if log_file is None:
+            return {}
+        log_file.close()
+        summary = {}
+        if len(encode_ms):
+            summary["encode_p50_ms"] = round(float(np.percentile(encode_ms, 50)), 3)
+            summary["encode_p99_ms"] = round(float(np.percentile(encode_ms, 99)), 3)
+            summary["encode_max_ms"] = round(float(encode_ms.max()), 3)
+        return summary
@@ -0,0 +1,75 @@
+import time
+
+class RecordingTrigger:
+    """多摄像头共享的开始/停止触发器
+
+    各录制线程预先打开写入器（预备状态）后，由界面一次性设定开始时刻；
+    每个录制线程在采集时间不早于该时刻的第一帧上切换为录制状态，
+    停止同理。时刻均为单调时钟纳秒，赋值为原子操作，采集线程无需加锁读取。
+    """
+
+    def __init__(self):
+        self.start_ns = None  # 开始录制的单调时钟时刻
+        self.stop_ns = None  # 停止录制的单调时钟时刻
+
+    def fire_start(self, duration_minutes=0, lead_ms=0):
+        """设定开始时刻
+
+        Args:
+            duration_minutes: 录制时长(分钟)，大于0时同时设定统一的停止时刻
+            lead_ms: 开始时刻相对当前时间的提前量（毫秒）
+
+        Returns:
+            int: 开始时刻（单调时钟纳秒）
+        """
+        start_ns = time.monotonic_ns() + int(lead_ms * 1e6)
+        self.stop_ns = start_ns + int(duration_minutes * 60e9) if duration_minutes > 0 else None
+        self.start_ns = start_ns
+        return start_ns
+
+    def fire_stop(self):
+        """设定停止时刻为当前时间"""
+        now = time.monotonic_ns()
+        if self.stop_ns is None or self.stop_ns > now:
+            self.stop_ns = now
+        return self.stop_ns
+
+    def start_due(self, capture_ns):
+        """采集于capture_ns的帧是否应开始录制"""
+        start_ns = self.start_ns
+        return start_ns is not None and capture_ns >= start_ns
+
+    def stop_due(self, capture_ns):
+        """采集于capture_ns的帧是否应停止录制（该帧不再写入）"""
+        stop_ns = self.stop_ns
+        return stop_ns is not None and capture_ns >= stop_ns
+
+
+class SharedRecordingTrigger(RecordingTrigger):
+    """以共享内存数组保存开始/停止时刻的触发器，供录制子进程读取
+
+    times为长度2的multiprocessing.Array('q')，-1表示未设定。单调时钟在同一台
+    机器的各进程间一致，因此子进程可直接用本进程的采集时间与之比较。
+    """
+
+    def __init__(self, times):
+        self._times = times
+        super().__init__()
+
+    @property
+    def start_ns(self):
+        value = self._times[0]
+        return None if value < 0 else value
+
+    @start_ns.setter
+    def start_ns(self, value):
+        self._times[0] = -1 if value is None else value
+
+    @property
+    def stop_ns(self):
+        value = self._times[1]
+        return None if value < 0 else value
+
+    @stop_ns.setter
+    def stop_ns(self, value):
+        self._times[1] = -1 if value is None else value
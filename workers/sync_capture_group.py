@@ -0,0 +1,176 @@
+import threading
+from array import array
+import numpy as np
+from utils.frame_timing import DeadlinePacer
+
+# 采集偏差日志的记录格式
+SKEW_LOG_DTYPE = np.dtype([
+    ("tick", "<i8"),
+    ("tick_monotonic_ns", "<i8"),
+    ("skew_ns", "<i8"),
+])
+
+class SyncCaptureGroup:
+    """多摄像头同步采集组
+
+    组内每个VideoRecorder线程在每个节拍先在屏障处等待，屏障由最后到达的线程
+    按单调时钟截止时间统一放行，随后各线程同时调用grab()锁存帧，再各自并行
+    retrieve()解码。每个节拍记录各摄像头grab完成时间的最大差值（偏差）。
+    """
+
+    def __init__(self, fps=30, barrier_timeout=1.0):
+        """初始化同步采集组
+
+        Args:
+            fps: 同步节拍帧率
+            barrier_timeout: 屏障等待超时（秒），超时后本节拍各摄像头单独采集
+        """
+        self.pacer = DeadlinePacer(fps)
+        self.barrier_timeout = barrier_timeout
+        self._lock = threading.Lock()
+        self._members = set()
+        self._barrier = None
+        self._grab_times = {}  # 当前节拍各摄像头grab完成的单调时钟 {camera_id: ns}
+        self._reset_stats()
+
+    def set_fps(self, fps):
+        """修改同步节拍帧率"""
+        with self._lock:
+            self.pacer.set_fps(fps)
+
+    def join(self, camera_id):
+        """摄像头加入同步组（由录制线程调用）"""
+        with self._lock:
+            self._members.add(camera_id)
+            old_barrier = self._rebuild_barrier()
+        self._abort(old_barrier)
+
+    def leave(self, camera_id):
+        """摄像头离开同步组（由录制线程调用）"""
+        with self._lock:
+            self._members.discard(camera_id)
+            self._grab_times.pop(camera_id, None)
+            old_barrier = self._rebuild_barrier()
+        self._abort(old_barrier)
+
+    @property
+    def members(self):
+        return set(self._members)
+
+    def _rebuild_barrier(self):
+        """成员变化后重建屏障（需持有self._lock）
+
+        Returns:
+            旧屏障，调用方须在释放锁后调用_abort唤醒在旧屏障上等待的线程
+        """
+        old_barrier = self._barrier
+        self._barrier = threading.Barrier(len(self._members), action=self._on_tick) if self._members else None
+        self._grab_times.clear()
+        return old_barrier
+
+    @staticmethod
+    def _abort(barrier):
+        # 屏障动作在屏障内部锁中执行且会获取self._lock，因此不能在持有self._lock时中止屏障
+        if barrier is not None:
+            barrier.abort()
+
+    def wait_tick(self):
+        """等待组内所有摄像头到达本节拍
+
+        Returns:
+            bool: True表示已同步放行；False表示成员变化或超时，调用方本节拍应单独采集
+        """
+        barrier = self._barrier
+        if barrier is None:
+            return False
+        try:
+            barrier.wait(self.barrier_timeout)
+            return True
+        except threading.BrokenBarrierError:
+            old_barrier = None
+            with self._lock:
+                # 超时导致屏障损坏时重建，成员变化导致的中止已在join/leave中重建
+                if self._barrier is barrier:
+                    old_barrier = self._rebuild_barrier()
+            self._abort(old_barrier)
+            return False
+
+    def report_grab(self, camera_id, grab_ns):
+        """记录摄像头在本节拍grab完成的时间"""
+        with self._lock:
+            self._grab_times[camera_id] = grab_ns
+
+    def _on_tick(self):
+        """屏障动作：统计上一节拍的偏差，并等待到本节拍的截止时间"""
+        with self._lock:
+            grab_times = self._grab_times
+            self._grab_times = {}
+            if len(self._members) > 1 and len(grab_times) == len(self._members):
+                earliest = min(grab_times.values())
+                skew_ns = max(grab_times.values()) - earliest
+                self._ticks.append(self.tick_count)
+                self._tick_times.append(earliest)
+                self._skews.append(skew_ns)
+                self.max_skew_ns = max(self.max_skew_ns, skew_ns)
+                for camera_id, grab_ns in grab_times.items():
+                    total, count = self._offsets.get(camera_id, (0, 0))
+                    self._offsets[camera_id] = (total + grab_ns - earliest, count + 1)
+            self.tick_count += 1
+
+        self.pacer.wait()
+
+    def reset_stats(self):
+        """清空偏差统计（开始新的录制时调用）"""
+        with self._lock:
+            self._reset_stats()
+
+    def _reset_stats(self):
+        self.tick_count = 0
+        self.max_skew_ns = 0
+        self._ticks = array("q")
+        self._tick_times = array("q")
+        self._skews = array("q")
+        self._offsets = {}  # {camera_id: (相对最早grab的偏移总和ns, 节拍数)}
+
+    def skew_summary(self):
+        """返回偏差统计摘要（毫秒）"""
+        with self._lock:
+            skews = np.array(self._skews, dtype=np.int64)
+            offsets = dict(self._offsets)
+        summary = {
+            "sync_capture": True,
+            "measured_ticks": len(skews),
+        }
+        if len(skews):
+            skews_ms = skews / 1e6
+            summary.update({
+                "skew_mean_ms": round(float(skews_ms.mean()), 3),
+                "skew_p50_ms": round(float(np.percentile(skews_ms, 50)), 3),
+                "skew_p99_ms": round(float(np.percentile(skews_ms, 99)), 3),
+                "skew_max_ms": round(self.max_skew_ns / 1e6, 3),
+                "camera_mean_offset_ms": {
+                    f"camera_{camera_id}": round(total / count / 1e6, 3)
+                    for camera_id, (total, count) in sorted(offsets.items())
+                },
+            })
+        return summary
+
+    def save_skew_log(self, output_path):
+        """将逐节拍偏差保存为NumPy结构化数组文件(.npy)
+
+        Returns:
+            bool: 保存是否成功
+        """
+        with self._lock:
+            log = np.empty(len(self._skews), dtype=SKEW_LOG_DTYPE)
+            log["tick"] = self._ticks
+            log["tick_monotonic_ns"] = self._tick_times
+            log["skew_ns"] = self._skews
+        if not len(log):
+            return False
+        try:
+            np.save(output_path, log)
+            return True
+        except Exception as e:
+            print(f"保存采集偏差日志失败: {str(e)}")
+            return False
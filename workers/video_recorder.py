@@ -1,20 +1,37 @@
 import os
 import datetime
 import time
+import threading
 import cv2
 import numpy as np
 from PyQt5.QtCore import QThread, pyqtSignal
-from utils.helpers import get_timestamp
+from workers.frame_ring_buffer import FrameRingBuffer
+from workers.frame_writer import FrameWriter
+from workers.frame_pool import FramePool
+from workers.video_writers import create_video_writer, SegmentedVideoWriter, DEFAULT_RECORDING_FORMAT
+from workers.recording_telemetry import RecordingTelemetry
+from workers.capture_sources import open_capture_source
+from workers.frame_transform import FrameTransform
+from workers.live_rppg import LatestFrameSlot
+from workers.frame_counter import FrameCounter
+from utils.frame_timing import DeadlinePacer, TimelineCorrector, TimestampSidecar
 
 class VideoRecorder(QThread):
     """用于在后台录制视频的线程类"""
     update_frame = pyqtSignal(np.ndarray, int)
     error = pyqtSignal(str, int)
     recording_finished = pyqtSignal(int, dict)  # 发出录制完成信号，包含摄像头ID和录制信息
+    armed_changed = pyqtSignal(int, bool)  # 预备录制完成信号，包含摄像头ID和是否成功
+    telemetry_updated = pyqtSignal(int, dict)  # 每秒一次的遥测统计，包含摄像头ID和统计信息
+    live_slot_changed = pyqtSignal(int, str)  # 实时分析交接槽创建/关闭，包含摄像头ID和共享内存名称（关闭时为空）
     
-    def __init__(self, camera_id, output_path, fps=30, subject_name="", parent=None):
+    def __init__(self, camera_id, output_path, fps=30, subject_name="", parent=None,
+                 buffer_depth=32, backpressure_policy=FrameRingBuffer.POLICY_BLOCK, preview_fps=15,
+                 timeline_correction=False, sync_group=None, recording_format=DEFAULT_RECORDING_FORMAT,
+                 source=None):
         super().__init__(parent)
         self.camera_id = camera_id
+        self.source = source  # 采集源描述（见capture_sources），None表示默认后端的camera_id号摄像头
         self.output_path = output_path
         self.subject_folder = ""  # 被测对象文件夹
         self.subject_name = subject_name  # 被测对象名称
@@ -25,13 +42,51 @@ class VideoRecorder(QThread):
         self.out = None
         self.record_duration = 0  # 录制时长(分钟)，0表示无限制
         self.start_time = None  # 开始录制的时间
+        self.start_monotonic_ns = None  # 开始录制时的单调时钟
         self.end_time = None  # 结束录制的时间
         self.frame_count = 0  # 录制的帧数
         self.output_filename = ""  # 输出文件名
+        self.buffer_depth = buffer_depth  # 采集与编码之间的帧缓冲深度
+        self.backpressure_policy = backpressure_policy  # 缓冲区满时的处理策略
+        self.frame_buffer = None  # 采集线程与编码线程之间的环形缓冲区
+        self.frame_writer = None  # 编码线程
+        self._writer_lock = threading.Lock()
+        self._stop_lock = threading.Lock()  # 串行化停止录制和取消预备，避免重复关闭写入器
+        self.preview_fps = preview_fps  # 预览帧率，与录制帧率无关
+        self.preview_size = (320, 240)  # 预览目标尺寸 (宽, 高)，由界面按显示区域大小更新
+        self._preview_pending = False  # 界面是否尚未处理上一帧预览
+        self._last_preview_time = 0.0
+        self._preview_pool = FramePool()  # 预览帧复用的缓冲区
+        self.timeline_correction = timeline_correction  # 是否按实际采集时间补帧/丢帧
+        self.pacer = None  # 帧节拍器
+        self.pacing = True  # 是否按custom_fps控制采集节拍，关闭时由采集源决定速度（写入的标称帧率不变）
+        self.sync_group = sync_group  # 多摄像头同步采集组，None表示独立采集
+        self._joined_group = None  # 录制线程当前已加入的同步组
+        self.armed = False  # 写入器已预先打开，等待开始时刻
+        self.trigger = None  # 共享的开始/停止触发器
+        self._arm_request = None  # 待录制线程处理的预备请求
+        self.arm_setup_ms = 0.0  # 预备阶段打开写入器的耗时
+        self.start_offset_ns = 0  # 第一帧相对统一开始时刻的偏移
+        self.recording_format = recording_format  # 录制格式，见RECORDING_FORMATS
+        self.segment_seconds = 0  # 按时长分段（秒），0表示不分段
+        self.segment_mb = 0  # 按大小分段（MB），0表示不分段
+        self.frame_transform = None  # 写入前的帧变换（FrameTransform），None表示写入原始帧
+        self._active_transform = None  # 本次录制使用的帧变换
+        self.source_size = None  # 本次录制的原始帧尺寸 (宽, 高)
+        self.telemetry = RecordingTelemetry()  # 采集帧率、编码耗时、丢帧和磁盘写入速度
+        self.live_analysis = False  # 是否向实时rPPG分析发布最新帧
+        self.live_roi = None  # 实时分析区域 (x, y, 宽, 高)，None表示画面中央
+        self.live_slot = None  # 实时分析的最新帧交接槽，由录制线程创建和关闭
+        self.counter = FrameCounter()  # 帧计数快照，只由录制线程写入，同步管理器随时读取
     
     def run(self):
         self.running = True
-        self.cap = cv2.VideoCapture(self.camera_id, cv2.CAP_DSHOW)
+        try:
+            self.cap = open_capture_source(self.source if self.source is not None else self.camera_id)
+        except Exception as e:
+            self.error.emit(f"无法打开采集源: {str(e)}", self.camera_id)
+            self.running = False
+            return
         
         if not self.cap.isOpened():
             self.error.emit(f"无法打开摄像头 ID: {self.camera_id} 的视频帧", self.camera_id)
@@ -41,51 +96,264 @@ class VideoRecorder(QThread):
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
         
-        # 帧间隔时间（秒）
-        frame_interval = 1.0 / self.custom_fps
+        # 按单调时钟截止时间控制帧率，睡眠误差不会累积
+        self.pacer = DeadlinePacer(self.custom_fps)
         
+        frame = None
+        counter_recording = False  # 计数快照中最近发布的录制状态
         while self.running:
-            loop_start_time = time.time()
+            if self._arm_request is not None:
+                self._process_arm_request()
             
-            ret, frame = self.cap.read()
+            ret, frame, capture_ns, wall_ns, paced = self._capture(frame)
             if not ret:
                 self.error.emit(f"无法读取摄像头 ID: {self.camera_id} 的视频帧", self.camera_id)
                 break
             
-            self.update_frame.emit(frame, self.camera_id)
+            # 按统一的开始/停止时刻切换录制状态
+            trigger = self.trigger
+            if trigger is not None:
+                if self.recording and trigger.stop_due(capture_ns):
+                    self.stop_recording()
+                elif self.armed and trigger.start_due(capture_ns):
+                    self._begin_recording(capture_ns)
+            
+            self.telemetry.record_capture(capture_ns)
+            
+            # 录制帧交给编码线程，采集循环不等待磁盘写入
+            frame_buffer = self.frame_buffer
+            recorded = False
+            if self.recording and frame_buffer is not None:
+                transform = self._active_transform
+                record_frame = transform.apply(frame) if transform is not None else frame
+                # 缓冲区拒收（阻塞超时或已关闭）的帧不计数，帧数与视频中的帧序号保持一致
+                if frame_buffer.push(record_frame, (self.frame_count, capture_ns, wall_ns)):
+                    self.frame_count += 1
+                    recorded = True
+            
+            # 计数快照只在本线程发布（录制也可能由界面线程开始或停止）
+            if recorded or self.recording != counter_recording:
+                counter_recording = self.recording
+                self.counter.publish(counter_recording, self.frame_count, capture_ns if recorded else None,
+                                     self.start_monotonic_ns)
             
-            if self.recording and self.out is not None:
-                self.out.write(frame)
-                self.frame_count += 1
-                
-                if self.record_duration > 0 and self.start_time is not None:
-                    elapsed = (datetime.datetime.now() - self.start_time).total_seconds()
+            self._emit_preview(frame)
+            self._publish_live(frame, capture_ns)
+            
+            if self.telemetry.due(capture_ns):
+                self._emit_telemetry(capture_ns)
+            
+            if self.recording and trigger is None:
+                if self.record_duration > 0 and self.start_monotonic_ns is not None:
+                    elapsed = (capture_ns - self.start_monotonic_ns) / 1e9
                     if elapsed >= self.record_duration * 60:
                         self.stop_recording()
 
-            # 控制帧率
-            elapsed_time = time.time() - loop_start_time
-            sleep_time = frame_interval - elapsed_time
-            if sleep_time > 0:
-                time.sleep(sleep_time)
+            # 控制帧率（同步采集时由同步组统一控制）
+            if not paced and self.pacing:
+                if self.pacer.fps != self.custom_fps:
+                    self.pacer.set_fps(self.custom_fps)
+                self.pacer.wait()
         
+        self._update_sync_membership(None)
+        self._close_live_slot()
+        if counter_recording:
+            self.counter.publish(False, self.frame_count, start_ns=self.start_monotonic_ns)
         if self.cap:
             self.cap.release()
-        if self.out:
-            self.out.release()
+        self._finish_writer()
+    
+    def _capture(self, frame):
+        """采集一帧
+        
+        加入同步组时先在屏障处等待所有摄像头，再同时grab()锁存帧并并行retrieve()解码；
+        否则直接read()。复用上一帧的缓冲区，录制和预览都会复制帧数据，不会引用该缓冲区。
+        
+        Returns:
+            tuple: (是否成功, 帧, 采集单调时钟ns, 墙上时钟ns, 是否已由同步组控制节拍)
+        """
+        self._update_sync_membership(self.sync_group)
+        group = self._joined_group
+        if group is not None and group.wait_tick():
+            ret = self.cap.grab()
+            capture_ns = time.monotonic_ns()
+            wall_ns = time.time_ns()
+            group.report_grab(self.camera_id, capture_ns)
+            if ret:
+                ret, frame = self.cap.retrieve(frame)
+            return ret, frame, capture_ns, wall_ns, True
+        
+        ret, frame = self.cap.read(frame)
+        return ret, frame, time.monotonic_ns(), time.time_ns(), False
+    
+    def _emit_telemetry(self, now_ns):
+        """汇总并发送遥测统计，录制期间同时写入时间序列文件"""
+        with self._writer_lock:
+            frame_buffer, frame_writer, out = self.frame_buffer, self.frame_writer, self.out
+        stats = self.telemetry.sample(now_ns, frame_buffer, frame_writer, out)
+        stats["recording"] = self.recording
+        self.telemetry_updated.emit(self.camera_id, stats)
+    
+    def _update_sync_membership(self, group):
+        """在录制线程中加入或离开同步组"""
+        if group is self._joined_group:
+            return
+        if self._joined_group is not None:
+            self._joined_group.leave(self.camera_id)
+        if group is not None:
+            group.join(self.camera_id)
+        self._joined_group = group
+    
+    def _emit_preview(self, frame):
+        """按预览帧率发送缩小后的预览帧
+        
+        界面尚未处理上一帧时直接跳过，避免信号在GUI线程堆积
+        """
+        now = time.monotonic()
+        if self.preview_fps <= 0 or now - self._last_preview_time < 1.0 / self.preview_fps:
+            return
+        # 界面长时间未确认（如视图已被移除）时不再等待
+        if self._preview_pending and now - self._last_preview_time < 1.0:
+            return
+        
+        self._last_preview_time = now
+        self._preview_pending = True
+        self.update_frame.emit(self._make_preview(frame), self.camera_id)
+    
+    def _publish_live(self, frame, capture_ns):
+        """把最新帧的分析区域覆盖写入交接槽，不等待分析进程"""
+        if not self.live_analysis:
+            if self.live_slot is not None:
+                self._close_live_slot()
+            return
+        if self.live_slot is None:
+            self.live_slot = LatestFrameSlot()
+            self.live_slot_changed.emit(self.camera_id, self.live_slot.name)
+        self.live_slot.publish(frame, capture_ns, self.live_roi)
+    
+    def _close_live_slot(self):
+        if self.live_slot is not None:
+            self.live_slot.close()
+            self.live_slot = None
+            self.live_slot_changed.emit(self.camera_id, "")
+    
+    def set_live_analysis(self, enabled, roi=None):
+        """开启或关闭实时rPPG分析，交接槽在录制线程中创建后通过live_slot_changed通知"""
+        self.live_roi = roi
+        self.live_analysis = enabled
+    
+    def _make_preview(self, frame):
+        """在工作线程中将帧等比缩小到预览尺寸，结果写入复用的预览缓冲区"""
+        target_w, target_h = self.preview_size
+        h, w = frame.shape[:2]
+        scale = min(target_w / w, target_h / h)
+        if scale >= 1.0:
+            buffer = self._preview_pool.acquire(frame.shape)
+            np.copyto(buffer, frame)
+            return buffer
+        size = (max(1, int(w * scale)), max(1, int(h * scale)))
+        buffer = self._preview_pool.acquire((size[1], size[0]) + frame.shape[2:])
+        cv2.resize(frame, size, dst=buffer, interpolation=cv2.INTER_AREA)
+        return buffer
+    
+    def set_preview_size(self, width, height):
+        """设置预览目标尺寸"""
+        if width > 0 and height > 0:
+            self.preview_size = (width, height)
+    
+    def preview_consumed(self):
+        """界面处理完一帧预览后调用，允许发送下一帧"""
+        self._preview_pending = False
+    
+    def frame_size(self):
+        """返回摄像头当前帧尺寸 (宽, 高)，未打开时返回None"""
+        if not self.cap or not self.cap.isOpened():
+            return None
+        return (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+    
+    def recording_frame_size(self):
+        """返回写入文件的帧尺寸 (宽, 高, 通道)，考虑帧变换，未打开时返回None"""
+        size = self.frame_size()
+        return FrameTransform.recording_size(self.frame_transform, size) if size else None
     
     def set_subject(self, subject_name):
         """设置被测对象名称及其文件夹"""
         self.subject_name = subject_name
         # 创建主输出目录下的被测对象子目录
         self.subject_folder = os.path.join(self.output_path, subject_name)
-        if not os.path.exists(self.subject_folder):
-            os.makedirs(self.subject_folder)
+        os.makedirs(self.subject_folder, exist_ok=True)
+    
+    def arm(self, duration=0, subject_name="", trigger=None):
+        """请求录制线程预先打开写入器（预备录制）
+        
+        写入器、被测对象文件夹和编码线程在录制线程中创建，完成后发出armed信号；
+        之后在trigger设定的开始时刻对应的帧上切换为录制状态。
+        
+        Args:
+            duration: 录制时长(分钟)，0表示无限制
+            subject_name: 被测对象名称
+            trigger: 共享的RecordingTrigger
+        
+        Returns:
+            bool: 是否已提交预备请求
+        """
+        if not self.cap or not self.cap.isOpened() or not self.isRunning():
+            return False
+        if self.recording or self.armed:
+            return False
+        self._arm_request = (duration, subject_name, trigger)
+        return True
+    
+    def disarm(self):
+        """取消预备状态并关闭已打开的写入器"""
+        self._arm_request = None
+        with self._stop_lock:
+            if self.armed:
+                self.armed = False
+                self.trigger = None
+                self._finish_writer()
+    
+    def _process_arm_request(self):
+        """在录制线程中处理预备请求"""
+        request, self._arm_request = self._arm_request, None
+        if request is None:
+            return
+        duration, subject_name, trigger = request
+        
+        setup_start_ns = time.monotonic_ns()
+        try:
+            ok = self._open_writer(subject_name)
+        except Exception as e:
+            self.error.emit(f"打开视频写入器失败: {str(e)}", self.camera_id)
+            ok = False
+        
+        if ok:
+            self.record_duration = duration
+            self.trigger = trigger
+            self.armed = True
+            self.arm_setup_ms = (time.monotonic_ns() - setup_start_ns) / 1e6
+        self.armed_changed.emit(self.camera_id, ok)
     
     def start_recording(self, duration=0, subject_name=""):
+        """立即开始录制（写入器在调用线程中打开）"""
         if not self.cap or not self.cap.isOpened():
             return False
         
+        if not self._open_writer(subject_name):
+            return False
+        
+        self.record_duration = duration
+        self.trigger = None
+        self.arm_setup_ms = 0.0
+        self._begin_recording(time.monotonic_ns())
+        return True
+    
+    def _open_writer(self, subject_name=""):
+        """创建被测对象文件夹、视频写入器、时间戳文件和编码线程
+        
+        Returns:
+            bool: 是否成功
+        """
         # 设置被测对象
         if subject_name:
             self.set_subject(subject_name)
@@ -96,49 +364,149 @@ class VideoRecorder(QThread):
         
         width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
         height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.source_size = (width, height)
         
-        # 按照摄像头编号命名视频文件
-        timestamp = get_timestamp()
-        self.output_filename = f"camera_{self.camera_id}.avi"
-        output_path = os.path.join(self.subject_folder, self.output_filename)
+        # 帧变换在录制期间保持不变，写入器按变换后的尺寸创建
+        transform = self.frame_transform
+        if transform is not None and transform.is_identity:
+            transform = None
+        is_color = True
+        if transform is not None:
+            width, height = transform.output_frame_size(width, height)
+            is_color = transform.channels == 3
+        self._active_transform = transform
         
-        fourcc = cv2.VideoWriter_fourcc(*'XVID')
-        self.out = cv2.VideoWriter(output_path, fourcc, self.custom_fps, (width, height))
+        # 按照摄像头编号命名视频文件，扩展名由录制格式决定
+        if self.segment_seconds > 0 or self.segment_mb > 0:
+            # 分段录制：camera_{id}_seg000.avi ...，分段信息记录在清单文件中
+            def create_segment(index):
+                return create_video_writer(self.recording_format, self.subject_folder,
+                                           f"camera_{self.camera_id}_seg{index:03d}", self.custom_fps, (width, height),
+                                           is_color)
+            out = SegmentedVideoWriter(create_segment,
+                                       os.path.join(self.subject_folder, f"camera_{self.camera_id}_segments.json"),
+                                       self.custom_fps,
+                                       segment_frames=int(self.segment_seconds * self.custom_fps),
+                                       segment_bytes=int(self.segment_mb * 1e6))
+        else:
+            out = create_video_writer(self.recording_format, self.subject_folder, f"camera_{self.camera_id}",
+                                      self.custom_fps, (width, height), is_color)
+        self.output_filename = os.path.basename(out.output_path)
         
-        self.recording = True
-        self.start_time = datetime.datetime.now()
-        self.record_duration = duration
-        self.frame_count = 0  # 重置帧数计数
+        # 逐帧时间戳附属文件，与视频文件一一对应
+        timestamps_path = os.path.join(self.subject_folder, f"camera_{self.camera_id}_timestamps.bin")
+        timestamp_sidecar = TimestampSidecar(timestamps_path, self.custom_fps)
+        timeline_corrector = TimelineCorrector(self.custom_fps) if self.timeline_correction else None
+        
+        # 启动独立的编码线程，采集线程只负责把帧放入环形缓冲区
+        frame_buffer = FrameRingBuffer(self.buffer_depth, policy=self.backpressure_policy)
+        frame_writer = FrameWriter(self.camera_id, frame_buffer, out,
+                                   timestamp_sidecar=timestamp_sidecar,
+                                   timeline_corrector=timeline_corrector,
+                                   telemetry=self.telemetry)
+        frame_writer.error.connect(self.error)
+        frame_writer.start()
+        
+        with self._writer_lock:
+            self.out = out
+            self.frame_buffer = frame_buffer
+            self.frame_writer = frame_writer
         return True
     
+    def _begin_recording(self, start_ns):
+        """切换为录制状态，start_ns为第一帧的采集时间"""
+        self.frame_count = 0  # 重置帧数计数
+        self.start_monotonic_ns = start_ns
+        self.start_time = datetime.datetime.now()
+        self.start_offset_ns = start_ns - self.trigger.start_ns if self.trigger is not None else 0
+        # 遥测时间序列从第一帧开始记录，预备期间不写入
+        self.telemetry.start_log(os.path.join(self.subject_folder, f"camera_{self.camera_id}_telemetry.csv"),
+                                 start_ns)
+        self.armed = False
+        self.recording = True
+    
     def stop_recording(self):
-        """停止录制并返回录制信息"""
-        if not self.recording:
-            return
+        """停止录制并返回录制信息
+        
+        录制线程（到达停止时刻）和界面线程（强制停止）可能同时调用，加锁后只有第一次调用
+        关闭写入器并发出recording_finished信号。
+        """
+        with self._stop_lock:
+            if not self.recording:
+                return
             
-        self.recording = False
-        self.end_time = datetime.datetime.now()
-        
-        if self.out:
-            self.out.release()
-            self.out = None
-        
-        # 收集录制信息
-        recording_info = {
-            "camera_id": self.camera_id,
-            "start_time": self.start_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            "end_time": self.end_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
-            "duration_seconds": (self.end_time - self.start_time).total_seconds(),
-            "frame_count": self.frame_count,
-            "fps_setting": self.custom_fps,
-            "filename": self.output_filename,
-            "subject": self.subject_name
-        }
-        
-        # 发出录制完成信号
+            self.recording = False
+            self.trigger = None
+            self.end_time = datetime.datetime.now()
+            
+            # 等待编码线程写完缓冲区中剩余的帧
+            writer_stats = self._finish_writer()
+            
+            # 收集录制信息
+            recording_info = {
+                "camera_id": self.camera_id,
+                "start_time": self.start_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                "end_time": self.end_time.strftime("%Y-%m-%d %H:%M:%S.%f")[:-3],
+                "duration_seconds": (self.end_time - self.start_time).total_seconds(),
+                "frame_count": self.frame_count,
+                "average_fps": 0.0,
+                "fps_setting": self.custom_fps,
+                "timeline_correction": self.timeline_correction,
+                "recording_format": self.recording_format,
+                "frame_transform": (self._active_transform.describe(*self.source_size)
+                                    if self._active_transform is not None else None),
+                "missed_deadlines": self.pacer.missed_deadlines if self.pacer else 0,
+                "start_offset_ms": round(self.start_offset_ns / 1e6, 3),
+                "arm_setup_ms": round(self.arm_setup_ms, 3),
+                "filename": self.output_filename,
+                "subject": self.subject_name
+            }
+            recording_info.update(writer_stats)
+            if recording_info["duration_seconds"] > 0:
+                recording_info["average_fps"] = round(self.frame_count / recording_info["duration_seconds"], 3)
+            if recording_info["duration_seconds"] > 0 and "bytes_written" in writer_stats:
+                recording_info["write_mb_per_s"] = round(
+                    writer_stats["bytes_written"] / 1e6 / recording_info["duration_seconds"], 3)
+        
+        # 在锁外发出录制完成信号（同线程连接的槽函数会直接执行）
         self.recording_finished.emit(self.camera_id, recording_info)
     
+    def _finish_writer(self):
+        """关闭环形缓冲区，等待编码线程写完剩余帧并释放视频写入器
+        
+        Returns:
+            dict: 缓冲区与编码线程的统计信息
+        """
+        with self._writer_lock:
+            frame_buffer, self.frame_buffer = self.frame_buffer, None
+            frame_writer, self.frame_writer = self.frame_writer, None
+            out, self.out = self.out, None
+        
+        stats = {}
+        if frame_buffer is not None:
+            frame_buffer.close()
+        if frame_writer is not None:
+            frame_writer.wait()
+            stats.update(frame_writer.stats())
+        if frame_buffer is not None:
+            stats.update(frame_buffer.stats())
+        if out is not None:
+            out.release()
+            stats["bytes_written"] = out.bytes_written
+            if isinstance(out, SegmentedVideoWriter):
+                stats["segments"] = len(out.segments)
+        if self.telemetry.is_logging:
+            telemetry_stats = self.telemetry.stop_log()
+            telemetry_stats["telemetry_file"] = os.path.basename(self.telemetry.log_path)
+            stats.update(telemetry_stats)
+        return stats
+    
+    def snapshot(self):
+        """读取一致的帧计数快照（可在任意线程调用，见FrameCounter.snapshot）"""
+        return self.counter.snapshot()
+    
     def stop(self):
         self.running = False
         self.recording = False
+        self.armed = False
         self.wait()
@@ -0,0 +1,354 @@
+import os
+import json
+import time
+import threading
+import cv2
+import numpy as np
+
+# 可选的录制格式
+# bytes_ratio为相对原始BGR数据的典型码率比例，仅用于估算所需的磁盘带宽（MJPG质量100实测约为原始数据的0.35-0.45）
+# api为指定的cv2.VideoWriter后端：.avi默认走FFMPEG后端，该后端不支持设置JPEG质量，MJPG改用OpenCV自带的MJPEG编码器
+RECORDING_FORMATS = {
+    "xvid": {"label": "XVID (有损压缩)", "fourcc": "XVID", "extension": ".avi", "lossless": False, "bytes_ratio": 0.02},
+    "mjpg": {"label": "MJPG 质量100", "fourcc": "MJPG", "extension": ".avi", "lossless": False, "bytes_ratio": 0.4,
+             "api": cv2.CAP_OPENCV_MJPEG},
+    "ffv1": {"label": "FFV1 (无损)", "fourcc": "FFV1", "extension": ".avi", "lossless": True, "bytes_ratio": 0.5},
+    "raw": {"label": "原始帧 (无压缩分段文件)", "fourcc": None, "extension": "_raw", "lossless": True, "bytes_ratio": 1.0},
+}
+DEFAULT_RECORDING_FORMAT = "xvid"
+
+# 原始帧分段文件的索引文件名
+RAW_INDEX_FILENAME = "index.json"
+
+
+class OpenCVVideoWriter:
+    """cv2.VideoWriter的封装，统一写入器接口并统计写入字节数"""
+
+    def __init__(self, output_path, fourcc, fps, frame_size, quality=None, is_color=True, api_preference=None):
+        self.output_path = output_path
+        # OpenCV自带的MJPEG编码器在高质量下编码部分灰度帧（如纯白）会抛出put_bits异常，
+        # 灰度录制时按彩色打开，写入前把灰度帧转换成BGR
+        self._gray_to_bgr = api_preference == cv2.CAP_OPENCV_MJPEG and not is_color
+        if self._gray_to_bgr:
+            is_color = True
+        if api_preference is None:
+            self._writer = cv2.VideoWriter(output_path, cv2.VideoWriter_fourcc(*fourcc), fps, frame_size, is_color)
+        else:
+            self._writer = cv2.VideoWriter(output_path, api_preference, cv2.VideoWriter_fourcc(*fourcc), fps,
+                                           frame_size, is_color)
+        if not self._writer.isOpened():
+            raise IOError(f"无法以 {fourcc} 编码创建视频文件: {output_path}")
+        if quality is not None and not self._writer.set(cv2.VIDEOWRITER_PROP_QUALITY, quality):
+            # 后端不支持设置质量时文件会以默认质量写入
+            print(f"警告: 视频写入后端 {self._writer.getBackendName()} 不支持设置编码质量 {quality}，"
+                  f"将以默认质量录制: {output_path}")
+
+    def write(self, frame):
+        if self._gray_to_bgr and frame.ndim == 2:
+            frame = cv2.cvtColor(frame, cv2.COLOR_GRAY2BGR)
+        self._writer.write(frame)
+
+    def release(self):
+        self._writer.release()
+
+    @property
+    def bytes_written(self):
+        """已写入磁盘的字节数（以文件大小计）"""
+        try:
+            return os.path.getsize(self.output_path)
+        except OSError:
+            return 0
+
+
+class RawChunkWriter:
+    """原始帧分段写入器
+
+    帧按原样写入预分配的定长分段文件（每段frames_per_chunk帧），文件可直接用
+    np.memmap映射读取。关闭时截断最后一段，并写入描述形状和分段信息的索引文件。
+    """
+
+    def __init__(self, output_dir, frames_per_chunk=300):
+        self.output_path = output_dir
+        self.frames_per_chunk = frames_per_chunk
+        self.frame_shape = None
+        self.dtype = None
+        self.chunks = []  # [{'file': ..., 'frames': ...}]
+        self.bytes_written = 0
+        self._chunk = None
+        self._chunk_frames = 0
+        os.makedirs(output_dir, exist_ok=True)
+
+    def _open_chunk(self):
+        """创建并预分配下一个分段文件"""
+        self._close_chunk()
+        filename = f"chunk_{len(self.chunks):05d}.raw"
+        path = os.path.join(self.output_path, filename)
+        chunk_bytes = self.frames_per_chunk * int(np.prod(self.frame_shape)) * self.dtype.itemsize
+        with open(path, "wb") as f:
+            if hasattr(os, "posix_fallocate"):
+                os.posix_fallocate(f.fileno(), 0, chunk_bytes)
+            else:
+                f.truncate(chunk_bytes)
+        self._chunk = np.memmap(path, dtype=self.dtype, mode="r+",
+                                shape=(self.frames_per_chunk,) + self.frame_shape)
+        self._chunk_frames = 0
+        self.chunks.append({"file": filename, "frames": 0})
+
+    def _close_chunk(self):
+        """刷新当前分段，未写满的分段截断到实际帧数"""
+        if self._chunk is None:
+            return
+        self._chunk.flush()
+        path = self._chunk.filename
+        del self._chunk
+        self._chunk = None
+        if self._chunk_frames < self.frames_per_chunk:
+            frame_bytes = int(np.prod(self.frame_shape)) * self.dtype.itemsize
+            with open(path, "r+b") as f:
+                f.truncate(self._chunk_frames * frame_bytes)
+
+    def write(self, frame):
+        if self.frame_shape is None:
+            self.frame_shape = tuple(frame.shape)
+            self.dtype = frame.dtype
+        if self._chunk is None or self._chunk_frames >= self.frames_per_chunk:
+            self._open_chunk()
+
+        self._chunk[self._chunk_frames] = frame
+        self._chunk_frames += 1
+        self.chunks[-1]["frames"] = self._chunk_frames
+        self.bytes_written += frame.nbytes
+
+    def release(self):
+        self._close_chunk()
+        if self.frame_shape is None:
+            return
+        index = {
+            "frame_shape": list(self.frame_shape),
+            "dtype": np.dtype(self.dtype).str,
+            "frames_per_chunk": self.frames_per_chunk,
+            "chunks": self.chunks,
+        }
+        with open(os.path.join(self.output_path, RAW_INDEX_FILENAME), "w", encoding="utf-8") as f:
+            json.dump(index, f, indent=2)
+
+
+def open_raw_recording(raw_dir):
+    """以内存映射方式打开原始帧分段录制
+
+    Args:
+        raw_dir: 分段文件目录
+
+    Returns:
+        list: 每个分段一个只读np.memmap，形状为 (帧数, 高, 宽, 通道)
+    """
+    with open(os.path.join(raw_dir, RAW_INDEX_FILENAME), "r", encoding="utf-8") as f:
+        index = json.load(f)
+    frame_shape = tuple(index["frame_shape"])
+    dtype = np.dtype(index["dtype"])
+    return [
+        np.memmap(os.path.join(raw_dir, chunk["file"]), dtype=dtype, mode="r",
+                  shape=(chunk["frames"],) + frame_shape)
+        for chunk in index["chunks"] if chunk["frames"] > 0
+    ]
+
+
+def create_video_writer(format_key, folder, base_name, fps, frame_size, is_color=True):
+    """按录制格式创建写入器
+
+    Args:
+        format_key: RECORDING_FORMATS中的键
+        folder: 输出目录
+        base_name: 不含扩展名的文件名
+        fps: 帧率
+        frame_size: 帧尺寸 (宽, 高)
+        is_color: 是否为彩色帧，灰度帧为False
+
+    Returns:
+        写入器对象，提供write/release方法以及output_path和bytes_written属性
+    """
+    if format_key not in RECORDING_FORMATS:
+        raise ValueError(f"未知的录制格式: {format_key}")
+    spec = RECORDING_FORMATS[format_key]
+    output_path = os.path.join(folder, base_name + spec["extension"])
+    if format_key == "raw":
+        return RawChunkWriter(output_path)
+    quality = 100 if format_key == "mjpg" else None
+    return OpenCVVideoWriter(output_path, spec["fourcc"], fps, frame_size, quality=quality, is_color=is_color,
+                             api_preference=spec.get("api"))
+
+
+def estimate_required_bandwidth(format_key, frame_sizes, fps):
+    """估算录制所需的持续写入带宽
+
+    Args:
+        format_key: 录制格式
+        frame_sizes: 每个摄像头的帧尺寸列表 [(宽, 高), ...]，可带第三项通道数 (宽, 高, 通道)
+        fps: 帧率
+
+    Returns:
+        float: 所需带宽（MB/s）
+    """
+    ratio = RECORDING_FORMATS[format_key]["bytes_ratio"]
+    raw_bytes = sum(size[0] * size[1] * (size[2] if len(size) > 2 else 3) for size in frame_sizes) * fps
+    return raw_bytes * ratio / 1e6
+
+
+def measure_disk_throughput(directory, size_mb=32, block_mb=4):
+    """测量目录所在磁盘的持续写入带宽
+
+    写入临时文件并fsync，按总耗时计算带宽，测量后删除临时文件。
+
+    Returns:
+        float: 写入带宽（MB/s），测量失败返回None
+    """
+    path = os.path.join(directory, f".throughput_probe_{os.getpid()}.tmp")
+    block = np.random.default_rng().integers(0, 255, block_mb * 1024 * 1024, dtype=np.uint8).tobytes()
+    blocks = max(1, size_mb // block_mb)
+    try:
+        start = time.perf_counter()
+        with open(path, "wb") as f:
+            for _ in range(blocks):
+                f.write(block)
+            f.flush()
+            os.fsync(f.fileno())
+        elapsed = time.perf_counter() - start
+        return blocks * block_mb * 1024 * 1024 / 1e6 / elapsed if elapsed > 0 else None
+    except OSError as e:
+        print(f"测量磁盘写入带宽失败: {str(e)}")
+        return None
+    finally:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class SegmentedVideoWriter:
+    """按时长或大小自动分段的写入器
+
+    达到分段帧数或字节数时先创建下一段的写入器并立即切换，旧写入器在后台线程中
+    释放（完成文件索引等收尾工作），编码线程不会因分段而停顿。每次分段更新清单文件，
+    记录各段文件名、起始帧序号和帧数，下游可并行处理已完成的分段。
+    """
+
+    # 按字节分段时每隔多少帧检查一次文件大小
+    SIZE_CHECK_INTERVAL = 30
+
+    def __init__(self, writer_factory, manifest_path, fps, segment_frames=0, segment_bytes=0):
+        """初始化分段写入器
+
+        Args:
+            writer_factory: 按分段序号创建写入器的函数 factory(segment_index)
+            manifest_path: 分段清单文件路径(.json)
+            fps: 帧率，记录在清单中
+            segment_frames: 每段帧数，0表示不按时长分段
+            segment_bytes: 每段字节数上限，0表示不按大小分段
+        """
+        self.writer_factory = writer_factory
+        self.output_path = manifest_path
+        self.fps = fps
+        self.segment_frames = segment_frames
+        self.segment_bytes = segment_bytes
+        self.segments = []  # [{'index', 'file', 'first_frame', 'frames', 'bytes', 'complete'}]
+        self.frames_written = 0
+        self._lock = threading.Lock()
+        self._release_threads = []
+        self._finished_bytes = 0
+        self._writer = None
+        self._segment_frame_count = 0
+        self._open_segment()
+        self.write_manifest()
+
+    def _open_segment(self):
+        """创建下一段的写入器，返回上一段的写入器"""
+        writer = self.writer_factory(len(self.segments))
+        previous, self._writer = self._writer, writer
+        self._segment_frame_count = 0
+        with self._lock:
+            self.segments.append({
+                "index": len(self.segments),
+                "file": os.path.basename(writer.output_path),
+                "first_frame": self.frames_written,
+                "frames": 0,
+                "bytes": 0,
+                "complete": False,
+            })
+        return previous
+
+    def _rollover_due(self):
+        if self.segment_frames and self._segment_frame_count >= self.segment_frames:
+            return True
+        if (self.segment_bytes and self._segment_frame_count
+                and self._segment_frame_count % self.SIZE_CHECK_INTERVAL == 0):
+            return self._writer.bytes_written >= self.segment_bytes
+        return False
+
+    def write(self, frame):
+        if self._rollover_due():
+            previous = self._open_segment()
+            segment = self.segments[-2]
+            thread = threading.Thread(target=self._release_segment, args=(previous, segment), daemon=True)
+            thread.start()
+            self._release_threads.append(thread)
+
+        self._writer.write(frame)
+        self._segment_frame_count += 1
+        self.frames_written += 1
+        self.segments[-1]["frames"] = self._segment_frame_count
+
+    def _release_segment(self, writer, segment):
+        """释放一段写入器并在清单中标记为完成"""
+        try:
+            writer.release()
+        except Exception as e:
+            print(f"关闭分段 {segment['file']} 失败: {str(e)}")
+        with self._lock:
+            segment["bytes"] = writer.bytes_written
+            segment["complete"] = True
+            self._finished_bytes += segment["bytes"]
+        self.write_manifest()
+
+    def write_manifest(self):
+        """原子地重写分段清单文件"""
+        with self._lock:
+            manifest = {
+                "fps": self.fps,
+                "segment_frames": self.segment_frames,
+                "segment_bytes": self.segment_bytes,
+                "frames_written": self.frames_written,
+                "segments": [dict(segment) for segment in self.segments],
+            }
+            temp_path = self.output_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.output_path)
+
+    def release(self):
+        """释放当前分段并等待所有后台释放完成"""
+        writer, self._writer = self._writer, None
+        if writer is not None:
+            self._release_segment(writer, self.segments[-1])
+        for thread in self._release_threads:
+            thread.join()
+        self._release_threads = []
+
+    @property
+    def bytes_written(self):
+        current = self._writer.bytes_written if self._writer is not None else 0
+        return self._finished_bytes + current
+
+
+def read_segment_manifest(manifest_path):
+    """读取分段清单
+
+    Returns:
+        list: 各分段信息，file字段转换为完整路径
+    """
+    with open(manifest_path, "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+    folder = os.path.dirname(manifest_path)
+    segments = manifest.get("segments", [])
+    for segment in segments:
+        segment["path"] = os.path.join(folder, segment["file"])
+    return segments